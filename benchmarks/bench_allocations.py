@@ -0,0 +1,54 @@
+"""
+Memory allocated per appraised belief, measured with tracemalloc.
+
+Appraisal adds to the intensities of the agents and relations in place (Agent.addIntensity), so once the relations an event
+touches exist, appraising a belief creates no Emotion objects or temporary lists, and the memory it retains is about zero.
+It is not free of allocations: the peak is the most memory allocated at any point during the call, the retained memory is
+what is still allocated after it. The peak, about 330 bytes per belief on CPython 3.11, is the interpreter's own loop
+machinery: the bound __exit__ of the `with self.lock` statement and the iterators of the loops over the affected goals,
+their owners and the observers of each owner, freed as soon as each loop ends. It is a constant that does not depend on the
+number of emotions added, owners or observers, and only the retained memory is near zero.
+"""
+
+import tracemalloc
+
+from benchmarks.world import ENGINES, buildWorld, engineClass, makeBeliefs
+
+def allocationsPerBelief(engine, beliefs) -> tuple[float, float]:
+    """
+    Appraises the beliefs one by one while tracing allocations, returns the average peak and retained bytes per belief.
+    """
+    peak = retained = 0
+    tracemalloc.start()
+    try:
+        for belief in beliefs:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            engine.appraise(belief)
+            current, highest = tracemalloc.get_traced_memory()
+            peak += highest - before
+            retained += current - before
+    finally:
+        tracemalloc.stop()
+    return peak / len(beliefs), retained / len(beliefs)
+
+class AllocationSuite:
+    """
+    Bytes allocated by Gamygdala.appraise() per belief.
+    """
+    params = [[100, 1000], ENGINES]
+    param_names = ['agents', 'engine']
+    unit = 'bytes'
+
+    def setup(self, numAgents, engine):
+        self.engine = buildWorld(numAgents, engineClass=engineClass(engine))
+        self.beliefs = makeBeliefs(numAgents, 500)
+        #Appraise once up front, so that the relations created by the first appraisals are not counted.
+        for belief in self.beliefs:
+            self.engine.appraise(belief)
+
+    def track_peak_bytes_per_belief(self, numAgents, engine):
+        return allocationsPerBelief(self.engine, self.beliefs)[0]
+
+    def track_retained_bytes_per_belief(self, numAgents, engine):
+        return allocationsPerBelief(self.engine, self.beliefs)[1]
@@ -0,0 +1,32 @@
+"""
+Appraisal throughput, in beliefs per second, for growing worlds.
+
+With the goal owner and relation indices, the cost of appraising one belief should not grow with the number of agents.
+"""
+
+from benchmarks.world import ENGINES, buildWorld, engineClass, makeBeliefs
+
+class AppraiseSuite:
+    """
+    Gamygdala.appraise() for all agents, for one affected agent, and appraiseBatch().
+    """
+    params = [[100, 1000, 10000], ENGINES]
+    param_names = ['agents', 'engine']
+    opsPerCall = 200
+
+    def setup(self, numAgents, engine):
+        self.engine = buildWorld(numAgents, engineClass=engineClass(engine))
+        self.beliefs = makeBeliefs(numAgents, self.opsPerCall)
+        #The goal names are agent<i>_goal<j>, so the owner is the part before the last underscore.
+        self.owners = [self.engine.getAgentByName(belief.affectedGoalNames[0].rsplit('_', 1)[0]) for belief in self.beliefs]
+
+    def time_appraise_all_agents(self, numAgents, engine):
+        for belief in self.beliefs:
+            self.engine.appraise(belief)
+
+    def time_appraise_affected_agent(self, numAgents, engine):
+        for belief, owner in zip(self.beliefs, self.owners):
+            self.engine.appraise(belief, owner)
+
+    def time_appraise_batch(self, numAgents, engine):
+        self.engine.appraiseBatch(self.beliefs)
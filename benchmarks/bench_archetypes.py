@@ -0,0 +1,64 @@
+"""
+Creating many agents of one kind: one by one with createAgent() and createGoalForAgent(), or in bulk with spawnAgents().
+
+Every agent has one goal of its own and two goals shared by all of them. Spawned agents keep only the likelihood of their
+own goal (an InstanceGoal pointing at the archetype's GoalTemplate), and ArrayGamygdala grows its arrays once for all of
+them instead of doubling them as agents are registered. The memory is what is still allocated per agent after creating them,
+most of which is the Agent object and its containers, so sharing the goal definitions saves little of it.
+"""
+
+import tracemalloc
+
+from pymygdala.archetypes import Archetype
+
+from benchmarks.world import ENGINES, engineClass
+
+GUARD = Archetype('guard', [('village_safe', 0.8, True), ('gate_closed', 0.4, True), ('{agent}_alive', 1.0, True)])
+
+def createOneByOne(engine, numAgents: int):
+    for i in range(numAgents):
+        name = 'guard%d' % i
+        agent = engine.createAgent(name)
+        for common, utility in (('village_safe', 0.8), ('gate_closed', 0.4)):
+            #Adding the registered common goal directly, createGoalForAgent() would warn for every agent after the first.
+            goal = engine.getGoalByName(common)
+            if goal is None:
+                engine.createGoalForAgent(name, common, utility, True)
+            else:
+                agent.addGoal(goal)
+        engine.createGoalForAgent(name, name + '_alive', 1.0, True)
+
+def spawn(engine, numAgents: int):
+    engine.spawnAgents(GUARD, numAgents)
+
+def bytesPerAgent(engine, create, numAgents: int) -> float:
+    tracemalloc.start()
+    try:
+        create(engine, numAgents)
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return retained / numAgents
+
+class ArchetypeSuite:
+    """
+    Agents created per second, and bytes retained per agent.
+    """
+    params = [[1000, 10000], ENGINES]
+    param_names = ['agents', 'engine']
+
+    def setup(self, numAgents, engine):
+        self.engineClass = engineClass(engine)
+        self.opsPerCall = numAgents
+
+    def time_createAgent(self, numAgents, engine):
+        createOneByOne(self.engineClass(), numAgents)
+
+    def time_spawnAgents(self, numAgents, engine):
+        spawn(self.engineClass(), numAgents)
+
+    def track_bytes_per_agent_createAgent(self, numAgents, engine):
+        return bytesPerAgent(self.engineClass(), createOneByOne, numAgents)
+
+    def track_bytes_per_agent_spawnAgents(self, numAgents, engine):
+        return bytesPerAgent(self.engineClass(), spawn, numAgents)
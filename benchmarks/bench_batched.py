@@ -0,0 +1,60 @@
+"""
+Throughput of BatchedGamygdala, in appraisals (one belief in one environment) per second, by number of environments.
+
+The baseline runs the same beliefs through one Gamygdala per environment, the way independent worlds are simulated
+without the batched engine. The batched engine's cost per belief hardly depends on the number of environments, so its
+throughput should grow close to linearly with it.
+"""
+
+from benchmarks.world import buildWorld, makeBeliefs
+
+class _Recorder:
+    #Records the schema calls of world.buildWorld(), to replay them on a BatchedGamygdala.
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name: str):
+        return lambda *args: self.calls.append((name, args))
+
+class BatchedSuite:
+    """
+    appraiseBelief() and step() in a world of 20 agents, replicated over the environments.
+    """
+    params = [[1, 16, 256], ['BatchedGamygdala', 'Gamygdala']]
+    param_names = ['environments', 'engine']
+
+    def setup(self, numEnvironments, engine):
+        try:
+            from pymygdala.batched import BatchedGamygdala
+        except ImportError:
+            raise NotImplementedError('BatchedGamygdala needs NumPy')
+        numAgents = 20
+        self.beliefs = makeBeliefs(numAgents, 100)
+        if engine == 'Gamygdala':
+            if numEnvironments > 16:
+                raise NotImplementedError('too slow')
+            self.worlds = [buildWorld(numAgents) for _ in range(numEnvironments)]
+        else:
+            recorder = buildWorld(numAgents, engineClass=_Recorder)
+            self.engine = BatchedGamygdala(numEnvironments)
+            for name, args in recorder.calls:
+                getattr(self.engine, name)(*args)
+        self.opsPerCall = len(self.beliefs) * numEnvironments
+
+    def time_appraise(self, numEnvironments, engine):
+        if engine == 'Gamygdala':
+            for world in self.worlds:
+                for belief in self.beliefs:
+                    world.appraise(belief)
+        else:
+            for belief in self.beliefs:
+                self.engine.appraiseBelief(belief.likelihood, belief.causalAgentName, belief.affectedGoalNames, belief.goalCongruences, belief.isIncremental)
+
+    def time_step(self, numEnvironments, engine):
+        if engine == 'Gamygdala':
+            for world in self.worlds:
+                for _ in self.beliefs:
+                    world.decayAll(16)
+        else:
+            for _ in self.beliefs:
+                self.engine.step(16)
@@ -0,0 +1,77 @@
+"""
+Decay throughput, in emotions per second, for agents that have all 16 emotions active.
+
+This is also the regression benchmark for the single pass compaction in Agent.decay and Relation.decay, which used to skip
+emotions and raise an IndexError when several emotions expired in the same tick. Every round refills all emotions, then
+decays them either without expiring any (exponential decay) or expiring all of them at once (linear decay).
+"""
+
+from pymygdala.concepts import Emotion, EMOTION_NAMES
+from pymygdala.decay import ExponentialDecay
+from pymygdala.engines import Gamygdala
+
+from benchmarks.world import ENGINES, buildWorld, engineClass
+
+def fillEmotions(engine: Gamygdala):
+    for agent in engine.agents:
+        for name in EMOTION_NAMES:
+            agent.updateEmotionalState(Emotion(name, 0.5))
+        for relation in agent.currentRelations:
+            for name in ('happy-for', 'pity', 'gloating', 'resentment'):
+                relation.addEmotion(Emotion(name, 0.5))
+
+def decayRound(engine: Gamygdala, expire: bool):
+    fillEmotions(engine)
+    if expire:
+        #Linear decay of 100 per second removes every emotion within one second.
+        engine.setDecay(100.0, engine.linearDecay)
+    else:
+        engine.setDecay(0.8, engine.exponentialDecay)
+    engine.decayAll(1000)
+    if expire:
+        assert all(len(agent.getEmotionalState(False)) == 0 for agent in engine.agents), 'Error: expired emotions were not removed'
+
+class DecaySuite:
+    """
+    decayAll() on agents with all 16 emotions active, refills included.
+    """
+    params = [[10, 100, 1000], ENGINES]
+    param_names = ['agents', 'engine']
+
+    def setup(self, numAgents, engine):
+        self.engine = buildWorld(numAgents, goalsPerAgent=0, relationsPerAgent=1, engineClass=engineClass(engine))
+        self.opsPerCall = numAgents * len(EMOTION_NAMES)
+
+    def time_decay_exponential(self, numAgents, engine):
+        decayRound(self.engine, False)
+
+    def time_decay_linear_expiring(self, numAgents, engine):
+        decayRound(self.engine, True)
+
+    def time_decayAll_only(self, numAgents, engine):
+        self.engine.decayAll(1000)
+
+class DecayPolicySuite:
+    """
+    decayAll() with a decay.ExponentialDecay policy with rates for four agent groups and two emotions, against decayAll() with the single decay factor of setDecay().
+    """
+    params = [[10, 100, 1000], ENGINES]
+    param_names = ['agents', 'engine']
+
+    def setup(self, numAgents, engine):
+        self.engine = buildWorld(numAgents, goalsPerAgent=0, relationsPerAgent=1, engineClass=engineClass(engine))
+        fillEmotions(self.engine)
+        self.policy = ExponentialDecay(0.8, {'anger': 0.95, 'joy': 0.7})
+        for group, rate in enumerate((0.5, 0.6, 0.9)):
+            self.policy.setRate(rate, group=group)
+        for i, agent in enumerate(self.engine.agents):
+            self.engine.setDecayGroup(agent.name, i % 4 if i % 4 < 3 else None)
+        self.opsPerCall = numAgents * len(EMOTION_NAMES)
+
+    def time_decayAll_function(self, numAgents, engine):
+        self.engine.setDecay(0.8, self.engine.exponentialDecay)
+        self.engine.decayAll(1000)
+
+    def time_decayAll_policy(self, numAgents, engine):
+        self.engine.setDecayPolicy(self.policy)
+        self.engine.decayAll(1000)
@@ -0,0 +1,38 @@
+"""
+Social fan-out with and without interest management, in beliefs per second, see Gamygdala.setInterest().
+
+Every agent has a relation to one famous agent, so each belief about the famous agent's goal reaches the whole world
+without interest management. With a SpatialInterest only the agents near the famous agent appraise it (the others'
+appraisals are deferred), so the cost of a belief should depend on the density around it rather than the world size.
+"""
+
+import random
+
+from pymygdala.concepts import Belief
+from pymygdala.interest import SpatialInterest
+
+from benchmarks.world import agentName, buildWorld
+
+class InterestSuite:
+    """
+    appraise() of beliefs about a goal of agent 0, which every agent has a relation to, on a 1000 x 1000 map with an interest radius of 50.
+    """
+    params = [[100, 1000, 10000], ['none', 'spatial', 'spatial-dropped']]
+    param_names = ['agents', 'interest']
+
+    def setup(self, numAgents, interest):
+        rng = random.Random(0)
+        self.engine = buildWorld(numAgents, relationsPerAgent=0)
+        for i in range(1, numAgents):
+            self.engine.createRelation(agentName(i), agentName(0), rng.uniform(-1.0, 1.0))
+        if interest != 'none':
+            spatial = SpatialInterest(50.0)
+            self.engine.setInterest(spatial, maxDeferred=0 if interest == 'spatial-dropped' else 64)
+            for i in range(numAgents):
+                spatial.setPosition(agentName(i), rng.uniform(0.0, 1000.0), rng.uniform(0.0, 1000.0))
+        self.beliefs = [Belief(rng.uniform(0.0, 1.0), '', ['agent0_goal0'], [rng.uniform(-1.0, 1.0)], True) for _ in range(20)]
+        self.opsPerCall = len(self.beliefs)
+
+    def time_appraise_famous(self, numAgents, interest):
+        for belief in self.beliefs:
+            self.engine.appraise(belief)
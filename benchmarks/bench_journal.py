@@ -0,0 +1,45 @@
+"""
+Journaling overhead and replay throughput, in beliefs per second, see Gamygdala.startJournal() and journal.replayJournal().
+"""
+
+import os
+import shutil
+import tempfile
+
+from pymygdala.journal import replayJournal
+
+from benchmarks.world import ENGINES, buildWorld, engineClass, makeBeliefs
+
+class JournalSuite:
+    """
+    appraise() with a journal running, and the replay of a journal of the same beliefs with a decay tick every 20 beliefs.
+    """
+    params = [[100, 1000], ENGINES]
+    param_names = ['agents', 'engine']
+
+    def setup(self, numAgents, engine):
+        self.engineClass = engineClass(engine)
+        self.beliefs = makeBeliefs(numAgents, 1000)
+        self.directory = tempfile.mkdtemp()
+        #Replay starts from an empty engine, so the world is built with the journal running.
+        world = self.engineClass()
+        world.startJournal(os.path.join(self.directory, 'replay.jnl'))
+        self.engine = buildWorld(numAgents, engineClass=lambda: world)
+        for i, belief in enumerate(self.beliefs):
+            self.engine.appraise(belief)
+            if i % 20 == 0:
+                self.engine.decayAll(16)
+        self.engine.stopJournal()
+        self.engine.startJournal(os.path.join(self.directory, 'live.jnl'))
+        self.opsPerCall = len(self.beliefs)
+
+    def teardown(self, numAgents, engine):
+        self.engine.stopJournal()
+        shutil.rmtree(self.directory)
+
+    def time_appraise_journaled(self, numAgents, engine):
+        for belief in self.beliefs:
+            self.engine.appraise(belief)
+
+    def time_replay(self, numAgents, engine):
+        replayJournal(os.path.join(self.directory, 'replay.jnl'), self.engineClass)
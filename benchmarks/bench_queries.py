@@ -0,0 +1,146 @@
+"""
+Emotional state and PAD query throughput, in agents per second, for growing worlds.
+"""
+
+import json
+
+from pymygdala.subscriptions import ThresholdSubscription
+
+from benchmarks.world import ENGINES, buildWorld, engineClass, makeBeliefs
+
+def appraisedWorld(numAgents, engine):
+    world = buildWorld(numAgents, engineClass=engineClass(engine))
+    world.appraiseBatch(makeBeliefs(numAgents, 2 * numAgents))
+    return world
+
+class QuerySuite:
+    """
+    Agent.getEmotionalState(useGain) and Agent.getPADState(useGain) for every agent.
+    Agent caches these until its emotions change, so repeated queries measure the cache, the after_change variants measure computing them.
+    """
+    params = [[100, 1000, 10000], ENGINES]
+    param_names = ['agents', 'engine']
+
+    def setup(self, numAgents, engine):
+        self.engine = appraisedWorld(numAgents, engine)
+        self.opsPerCall = numAgents
+
+    def time_getEmotionalState(self, numAgents, engine):
+        for agent in self.engine.agents:
+            agent.getEmotionalState(True)
+
+    def time_getEmotionalState_without_gain(self, numAgents, engine):
+        for agent in self.engine.agents:
+            agent.getEmotionalState(False)
+
+    def time_getPADState(self, numAgents, engine):
+        for agent in self.engine.agents:
+            agent.getPADState(True)
+
+    def time_getEmotionalState_after_change(self, numAgents, engine):
+        for agent in self.engine.agents:
+            agent._stateCache = None
+            agent.getEmotionalState(True)
+
+    def time_getPADState_after_change(self, numAgents, engine):
+        for agent in self.engine.agents:
+            agent._stateCache = None
+            agent.getPADState(True)
+
+class PopulationQuerySuite:
+    """
+    Gamygdala.getPADStates() for the whole population, which needs NumPy.
+    """
+    params = [[100, 1000, 10000], ENGINES]
+    param_names = ['agents', 'engine']
+
+    def setup(self, numAgents, engine):
+        try:
+            import numpy
+        except ImportError:
+            raise NotImplementedError('NumPy is not installed')
+        self.engine = appraisedWorld(numAgents, engine)
+        self.opsPerCall = numAgents
+
+    def time_getPADStates(self, numAgents, engine):
+        self.engine.getPADStates()
+
+class SharedStateSuite:
+    """
+    SharedEmotionState.publish() and a consistent SharedEmotionReader.snapshot() of the whole population, which need NumPy.
+    """
+    params = [[100, 1000, 10000], ENGINES]
+    param_names = ['agents', 'engine']
+
+    def setup(self, numAgents, engine):
+        try:
+            from pymygdala.sharedstate import SharedEmotionReader, SharedEmotionState
+        except ImportError:
+            raise NotImplementedError('NumPy is not installed')
+        self.engine = appraisedWorld(numAgents, engine)
+        self.state = SharedEmotionState(self.engine)
+        self.state.publish()
+        self.reader = SharedEmotionReader(self.state.name)
+        self.opsPerCall = numAgents
+
+    def teardown(self, numAgents, engine):
+        self.reader.close()
+        self.state.close()
+
+    def time_publish(self, numAgents, engine):
+        self.state.publish()
+
+    def time_snapshot(self, numAgents, engine):
+        self.reader.snapshot()
+
+class SubscriptionSuite:
+    """
+    Noticing anger above 0.7 in one frame (10 beliefs and a decay tick, with lazy decay): by polling every agent, or with a ThresholdSubscription on every agent, in frames per second.
+    """
+    params = [[100, 1000, 10000], ['polling', 'subscriptions']]
+    param_names = ['agents', 'method']
+
+    def setup(self, numAgents, method):
+        self.engine = appraisedWorld(numAgents, 'Gamygdala')
+        self.engine.setLazyDecay(True)
+        self.beliefs = makeBeliefs(numAgents, 10, seed=2)
+        if method == 'subscriptions':
+            for agent in self.engine.agents:
+                self.engine.subscribe(ThresholdSubscription(agent.name, 'anger', 0.7))
+        self.opsPerCall = 1
+
+    def time_frame(self, numAgents, method):
+        engine = self.engine
+        for belief in self.beliefs:
+            engine.appraise(belief)
+        engine.decayAll(16)
+        if method == 'polling':
+            angry = [agent for agent in engine.agents if 'anger' in {emotion.name for emotion in agent.getEmotionalState(True) if emotion.intensity >= 0.7}]
+        else:
+            angry = engine.pollEvents()
+
+class ChangeFeedSuite:
+    """
+    Replicating the emotions of all agents once per frame (10 beliefs and a decay tick, with lazy decay), encoded as JSON: the full state of every agent, or the deltas of drainChanges() with an epsilon of 0.01, in frames per second.
+    A decay tick changes every agent that has emotions, the deltas only skip the ones that are calm, or changed by less than epsilon.
+    """
+    params = [[100, 1000, 10000], ['full state', 'drainChanges']]
+    param_names = ['agents', 'method']
+
+    def setup(self, numAgents, method):
+        self.engine = appraisedWorld(numAgents, 'Gamygdala')
+        self.engine.setLazyDecay(True)
+        self.engine.drainChanges()
+        self.beliefs = makeBeliefs(numAgents, 10, seed=2)
+        self.opsPerCall = 1
+
+    def time_frame(self, numAgents, method):
+        engine = self.engine
+        for belief in self.beliefs:
+            engine.appraise(belief)
+        engine.decayAll(16)
+        if method == 'full state':
+            engine._settleAgents()
+            message = json.dumps([list(agent.intensities) for agent in engine.agents])
+        else:
+            message = json.dumps(engine.drainChanges(0.01))
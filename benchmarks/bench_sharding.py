@@ -0,0 +1,57 @@
+"""
+Appraisal throughput of ShardedGamygdala, in beliefs per second, by number of shards.
+
+Agents are spread round robin over the shards and most of their relations are to agents on the same shard, the case
+sharding is meant for. On a machine with at least as many cores as shards, throughput should grow close to linearly
+with the number of shards.
+"""
+
+import os
+import random
+
+from pymygdala.sharding import ShardedGamygdala
+
+from benchmarks.world import agentName, goalName, makeBeliefs
+
+def buildShardedWorld(numAgents: int, numShards: int, goalsPerAgent: int = 3, relationsPerAgent: int = 5, localRelations: float = 0.9, seed: int = 0) -> ShardedGamygdala:
+    """
+    Like world.buildWorld(), but on a ShardedGamygdala, with the given fraction of the relations to agents on the same shard.
+    """
+    rng = random.Random(seed)
+    engine = ShardedGamygdala(numShards)
+    for i in range(numAgents):
+        engine.createAgent(agentName(i), i % numShards)
+        for g in range(goalsPerAgent):
+            engine.createGoalForAgent(agentName(i), goalName(i, g), rng.uniform(-1.0, 1.0), True)
+    for i in range(numAgents):
+        for _ in range(relationsPerAgent):
+            if rng.random() < localRelations:
+                target = rng.randrange(i % numShards, numAgents, numShards)
+            else:
+                target = rng.randrange(numAgents)
+            if target != i:
+                engine.createRelation(agentName(i), agentName(target), rng.uniform(-1.0, 1.0))
+    engine.flush()
+    return engine
+
+class ShardingSuite:
+    """
+    ShardedGamygdala.appraise() for a batch of beliefs, until all of them are processed.
+    """
+    params = [[1000, 10000], [1, 2, 4]]
+    param_names = ['agents', 'shards']
+    opsPerCall = 2000
+
+    def setup(self, numAgents, numShards):
+        if numShards > (os.cpu_count() or 1):
+            raise NotImplementedError('not enough cores for %d shards' % numShards)
+        self.engine = buildShardedWorld(numAgents, numShards)
+        self.beliefs = makeBeliefs(numAgents, self.opsPerCall)
+
+    def teardown(self, numAgents, numShards):
+        self.engine.close()
+
+    def time_appraise(self, numAgents, numShards):
+        for belief in self.beliefs:
+            self.engine.appraise(belief)
+        self.engine.flush()
@@ -0,0 +1,53 @@
+"""
+Snapshot throughput, in agents per second: Gamygdala.save(), Gamygdala.load(), load() followed by a few appraisals (which restore the agents they use) and an incremental save() after a few appraisals.
+"""
+
+import os
+import shutil
+import tempfile
+
+from benchmarks.world import ENGINES, buildWorld, engineClass, makeBeliefs
+
+class SnapshotSuite:
+    """
+    Full and incremental snapshots of a world with 3 goals and 5 relations per agent, which need NumPy.
+    """
+    params = [[1000, 10000, 100000], ENGINES]
+    param_names = ['agents', 'engine']
+
+    def setup(self, numAgents, engine):
+        try:
+            import numpy
+        except ImportError:
+            raise NotImplementedError('NumPy is not installed')
+        self.engineClass = engineClass(engine)
+        self.engine = buildWorld(numAgents, engineClass=self.engineClass)
+        self.engine.appraiseBatch(makeBeliefs(numAgents, numAgents))
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'world.snap')
+        self.engine.save(self.path)
+        #1% of the agents own a goal that is appraised, their relation holders change too.
+        self.beliefs = makeBeliefs(numAgents, max(1, numAgents // 100), seed=2)
+        self.saves = 0
+        self.opsPerCall = numAgents
+
+    def teardown(self, numAgents, engine):
+        shutil.rmtree(self.directory)
+
+    def time_save(self, numAgents, engine):
+        self.engine.save(os.path.join(self.directory, 'full.snap'))
+
+    def time_load(self, numAgents, engine):
+        self.engineClass.load(self.path)
+
+    def time_load_appraise(self, numAgents, engine):
+        loaded = self.engineClass.load(self.path)
+        for belief in self.beliefs:
+            loaded.appraise(belief)
+
+    def time_save_incremental(self, numAgents, engine):
+        #Every call builds on the previous one, so it only holds the agents changed by the new beliefs.
+        for belief in self.beliefs:
+            self.engine.appraise(belief)
+        self.saves += 1
+        self.engine.save(os.path.join(self.directory, 'delta%d.snap' % self.saves), incremental=True)
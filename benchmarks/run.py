@@ -0,0 +1,129 @@
+"""
+Runs the benchmark suites and reports operations per second and how they scale with the world size.
+
+The suites follow the asv conventions (classes with params, setup(), teardown(), time_* methods and track_* methods that
+return a value in the suite's unit, NotImplementedError in setup() to skip), so they can also be run with asv. This runner needs nothing but pymygdala itself:
+
+    python -m benchmarks.run [--quick] [--filter text] [--json results.json]
+
+The first parameter of every suite is the world size. The scaling column is the time per operation relative to the
+smallest size, so 1.0 means the cost of an operation does not depend on the size of the world.
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import pkgutil
+import platform
+import time
+
+import benchmarks
+
+def discoverSuites(textFilter: str = '') -> list[tuple[str, type, str]]:
+    suites = []
+    for moduleInfo in sorted(pkgutil.iter_modules(benchmarks.__path__), key=lambda info: info.name):
+        if not moduleInfo.name.startswith('bench_'):
+            continue
+        module = importlib.import_module('benchmarks.' + moduleInfo.name)
+        for className, suite in inspect.getmembers(module, inspect.isclass):
+            if suite.__module__ != module.__name__ or not className.endswith('Suite'):
+                continue
+            for methodName in sorted(name for name in dir(suite) if name.startswith(('time_', 'track_'))):
+                fullName = '%s.%s.%s' % (moduleInfo.name, className, methodName)
+                if textFilter in fullName:
+                    suites.append((fullName, suite, methodName))
+    return suites
+
+def measure(suite: type, methodName: str, params: tuple, minTime: float):
+    """
+    Runs one benchmark for one parameter combination, returns its operations per second or None when it is skipped.
+    """
+    instance = suite()
+    try:
+        instance.setup(*params)
+    except NotImplementedError:
+        return None
+    try:
+        method = getattr(instance, methodName)
+        #Warm up once, then repeat until minTime has passed.
+        method(*params)
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            method(*params)
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= minTime:
+                break
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*params)
+    return calls * getattr(instance, 'opsPerCall', 1) / elapsed
+
+def track(suite: type, methodName: str, params: tuple):
+    """
+    Runs one track_* benchmark for one parameter combination, returns the value it tracks or None when it is skipped.
+    """
+    instance = suite()
+    try:
+        instance.setup(*params)
+    except NotImplementedError:
+        return None
+    try:
+        return getattr(instance, methodName)(*params)
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*params)
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the pymygdala benchmarks.')
+    parser.add_argument('--quick', action='store_true', help='only the two smallest world sizes, with shorter timing')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose module.Suite.method name contains this text')
+    parser.add_argument('--json', help='also write the results to this file, to compare releases')
+    parser.add_argument('--min-time', type=float, default=None, help='seconds to repeat every benchmark for (default 0.5, 0.1 with --quick)')
+    args = parser.parse_args()
+    minTime = args.min_time if args.min_time is not None else (0.1 if args.quick else 0.5)
+
+    results = []
+    for fullName, suite, methodName in discoverSuites(args.filter):
+        sizes, *otherParams = suite.params
+        if args.quick:
+            sizes = sizes[:2]
+        print(fullName)
+        if methodName.startswith('track_'):
+            unit = getattr(suite, 'unit', '')
+            print('    %-30s %10s %16s' % ('params', 'size', unit))
+            for others in itertools.product(*otherParams):
+                for size in sizes:
+                    params = (size,) + others
+                    value = track(suite, methodName, params)
+                    print('    %-30s %10s %16s' % (', '.join(map(str, others)), size, 'skipped' if value is None else '%.1f' % value))
+                    if value is not None:
+                        results.append({'benchmark': fullName, 'params': dict(zip(suite.param_names, params)), 'value': value, 'unit': unit})
+            continue
+        print('    %-30s %10s %16s %8s' % ('params', 'size', 'ops/sec', 'scaling'))
+        for others in itertools.product(*otherParams):
+            baseline = None
+            for size in sizes:
+                params = (size,) + others
+                opsPerSecond = measure(suite, methodName, params, minTime)
+                if opsPerSecond is None:
+                    print('    %-30s %10s %16s' % (', '.join(map(str, others)), size, 'skipped'))
+                    continue
+                if baseline is None:
+                    baseline = opsPerSecond
+                print('    %-30s %10s %16.0f %8.2f' % (', '.join(map(str, others)), size, opsPerSecond, baseline / opsPerSecond))
+                results.append({'benchmark': fullName, 'params': dict(zip(suite.param_names, params)), 'opsPerSecond': opsPerSecond})
+    if args.json:
+        try:
+            from importlib.metadata import version
+            pymygdalaVersion = version('Pymygdala')
+        except Exception:
+            pymygdalaVersion = None
+        with open(args.json, 'w') as output:
+            json.dump({'pymygdala': pymygdalaVersion, 'python': platform.python_version(), 'machine': platform.machine(), 'time': time.time(), 'results': results}, output, indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Synthetic worlds for the benchmarks.
+
+A world has numAgents agents, each owning goalsPerAgent maintenance goals and holding relations to relationsPerAgent
+randomly chosen other agents. Everything is generated from a seed, so runs are reproducible.
+"""
+
+import random
+
+from pymygdala.concepts import Belief
+from pymygdala.engines import Gamygdala
+
+def agentName(i: int) -> str:
+    return 'agent%d' % i
+
+def goalName(agent: int, goal: int) -> str:
+    return 'agent%d_goal%d' % (agent, goal)
+
+def buildWorld(numAgents: int, goalsPerAgent: int = 3, relationsPerAgent: int = 5, seed: int = 0, engineClass=Gamygdala) -> Gamygdala:
+    """
+    Builds a world of the given size.
+
+    :param numAgents: The number of agents.
+    :type numAgents: int
+
+    :param goalsPerAgent: The number of goals every agent owns.
+    :type goalsPerAgent: int
+
+    :param relationsPerAgent: The number of other agents every agent has a relation to (the relation density).
+    :type relationsPerAgent: int
+
+    :param seed: The random seed for utilities, relation targets and likes.
+    :type seed: int
+
+    :param engineClass: The engine to build the world in, e.g. Gamygdala or vectorized.ArrayGamygdala.
+    :type engineClass: type
+
+    :return: The engine holding the world.
+    :rtype: Gamygdala
+    """
+    rng = random.Random(seed)
+    engine = engineClass()
+    for i in range(numAgents):
+        engine.createAgent(agentName(i))
+        for g in range(goalsPerAgent):
+            #Maintenance goals keep reacting to beliefs, achievement goals would freeze once reached.
+            engine.createGoalForAgent(agentName(i), goalName(i, g), rng.uniform(-1.0, 1.0), True)
+    relationsPerAgent = min(relationsPerAgent, numAgents - 1)
+    for i in range(numAgents):
+        for j in rng.sample(range(numAgents - 1), relationsPerAgent):
+            #Skip self relations by shifting the targets at or after i.
+            target = j if j < i else j + 1
+            engine.createRelation(agentName(i), agentName(target), rng.uniform(-1.0, 1.0))
+    return engine
+
+def makeBeliefs(numAgents: int, count: int, goalsPerAgent: int = 3, seed: int = 1) -> list[Belief]:
+    """
+    Random incremental beliefs, each about one goal of a random agent and caused by a random agent (or nobody).
+    """
+    rng = random.Random(seed)
+    beliefs = []
+    for _ in range(count):
+        owner = rng.randrange(numAgents)
+        causal = agentName(rng.randrange(numAgents)) if rng.random() < 0.8 else ''
+        beliefs.append(Belief(rng.uniform(0.0, 1.0), causal, [goalName(owner, rng.randrange(goalsPerAgent))], [rng.uniform(-1.0, 1.0)], True))
+    return beliefs
+
+def engineClasses() -> dict[str, type]:
+    """
+    The engines to benchmark, by name. ArrayGamygdala is only included when NumPy is installed.
+    """
+    classes = {'Gamygdala': Gamygdala}
+    try:
+        from pymygdala.vectorized import ArrayGamygdala
+        classes['ArrayGamygdala'] = ArrayGamygdala
+    except ImportError:
+        pass
+    return classes
+
+def engineClass(name: str) -> type:
+    """
+    Looks up an engine by name for a benchmark setup, raising NotImplementedError (which skips the benchmark) when it is not available.
+    """
+    classes = engineClasses()
+    if name not in classes:
+        raise NotImplementedError(name + ' is not available')
+    return classes[name]
+
+ENGINES = ['Gamygdala', 'ArrayGamygdala']
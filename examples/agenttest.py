@@ -1,4 +1,4 @@
-from gamygdala import  concepts, agent
+from pymygdala import concepts, agent
 
 goal = concepts.Goal('G', 1.0)
 agent = agent.Agent('EmoCha')
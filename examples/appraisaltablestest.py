@@ -0,0 +1,77 @@
+import itertools
+
+import numpy as np
+
+from pymygdala.concepts import EmotionType, NUM_EMOTIONS, NO_EMOTION, CAUSED_EMOTIONS, CAUSING_EMOTIONS
+from pymygdala.engines import Gamygdala
+from pymygdala.vectorized import internalEmotions, socialEmotions
+
+#Checks that the compiled appraisal tables (concepts.INTERNAL_EMOTIONS and friends) give the same emotions as the
+#branching OCC rules Gamygdala used before, for every combination of values on and around the thresholds of the rules,
+#both through the engine (one appraisal at a time) and through the NumPy kernels (all combinations in one call).
+
+def referenceInternalEmotions(utility, deltaLikelihood, likelihood):
+    #The rules of Gamygdala._evaluateInternalEmotion as they were written before the tables, as a set of emotion indices.
+    emotions = set()
+    if utility >= 0:
+        positive = deltaLikelihood >= 0
+    else:
+        positive = not deltaLikelihood >= 0
+    if likelihood > 0 and likelihood < 1:
+        emotions.add(EmotionType.HOPE.index if positive else EmotionType.FEAR.index)
+    elif likelihood == 1:
+        if utility >= 0:
+            if deltaLikelihood < 0.5:
+                emotions.add(EmotionType.SATISFACTION.index)
+            emotions.add(EmotionType.JOY.index)
+        else:
+            if deltaLikelihood < 0.5:
+                emotions.add(EmotionType.FEAR_CONFIRMED.index)
+            emotions.add(EmotionType.DISTRESS.index)
+    elif likelihood == 0:
+        if utility >= 0:
+            if deltaLikelihood > 0.5:
+                emotions.add(EmotionType.DISAPPOINTMENT.index)
+            emotions.add(EmotionType.DISTRESS.index)
+        else:
+            if deltaLikelihood > 0.5:
+                emotions.add(EmotionType.RELIEF.index)
+            emotions.add(EmotionType.JOY.index)
+    return emotions
+
+def referenceSocialEmotion(desirability, like):
+    #The rules of Gamygdala._evaluateSocialEmotion before the tables.
+    if desirability >= 0:
+        return EmotionType.HAPPY_FOR.index if like >= 0 else EmotionType.RESENTMENT.index
+    return EmotionType.PITY.index if like >= 0 else EmotionType.GLOATING.index
+
+epsilon = 1e-12
+utilities = [-1.0, -0.5, -epsilon, 0.0, epsilon, 0.5, 1.0]
+deltas = [-2.0, -1.0, -0.5, -epsilon, 0.0, epsilon, 0.25, 0.5 - epsilon, 0.5, 0.5 + epsilon, 1.0, 2.0]
+likelihoods = [-1.0, -epsilon, 0.0, epsilon, 0.5, 1.0 - epsilon, 1.0, 1.0 + epsilon]
+likes = [-1.0, -epsilon, 0.0, epsilon, 1.0]
+
+engine = Gamygdala()
+agent = engine.createAgent('checker')
+combinations = list(itertools.product(utilities, deltas, likelihoods))
+for utility, deltaLikelihood, likelihood in combinations:
+    agent.intensities[:] = [0.0] * NUM_EMOTIONS
+    engine._evaluateInternalEmotion(utility, deltaLikelihood, likelihood, agent)
+    found = {i for i, intensity in enumerate(agent.intensities) if intensity > 0}
+    expected = referenceInternalEmotions(utility, deltaLikelihood, likelihood) if utility * deltaLikelihood != 0 else set()
+    assert found == expected, (utility, deltaLikelihood, likelihood, found, expected)
+
+utility, deltaLikelihood, likelihood = (np.array(column) for column in zip(*combinations))
+emotion, confirmation = internalEmotions(utility, deltaLikelihood, likelihood)
+for i, values in enumerate(combinations):
+    found = {e for e in (int(emotion[i]), int(confirmation[i])) if e != NO_EMOTION}
+    assert found == referenceInternalEmotions(*values), (values, found)
+
+socialCombinations = list(itertools.product(utilities, likes))
+desirability, like = (np.array(column) for column in zip(*socialCombinations))
+for (d, l), e in zip(socialCombinations, socialEmotions(desirability, like)):
+    assert e == referenceSocialEmotion(d, l), (d, l, e)
+for d in utilities:
+    assert CAUSED_EMOTIONS[int(d >= 0)] == (EmotionType.GRATITUDE.index if d >= 0 else EmotionType.ANGER.index)
+    assert CAUSING_EMOTIONS[int(d >= 0)] == (EmotionType.GRATIFICATION.index if d >= 0 else EmotionType.REMORSE.index)
+print('internal emotions: %d combinations, social emotions: %d combinations, all equal to the OCC rules' % (len(combinations), len(socialCombinations)))
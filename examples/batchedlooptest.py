@@ -0,0 +1,40 @@
+from pymygdala.batched import BatchedGamygdala
+import numpy as np
+
+#The game of looptest.py, played in NUM_ENVIRONMENTS worlds at once. Every step appraises the same beliefs in all
+#worlds with per world likelihoods and congruences, environments whose episode ended are reset and start a new one.
+NUM_ENVIRONMENTS = 16
+NUM_STEPS = 200
+STEP_MS = 5100
+rng = np.random.default_rng(0)
+engine = BatchedGamygdala(NUM_ENVIRONMENTS)
+engine.createAgent("EmoCha")
+engine.createGoalForAgent("EmoCha", "GetGold", 1.0, False)
+engine.createGoalForAgent("EmoCha", "CloseToGold", 1.0, False)
+newBelief = np.ones(NUM_ENVIRONMENTS, dtype=bool)
+closeToGoldCounter = np.zeros(NUM_ENVIRONMENTS)
+episodes = 0
+for step in range(NUM_STEPS):
+    roullet = rng.random(NUM_ENVIRONMENTS)
+    win = roullet < 0.1
+    lose = (roullet >= 0.1) & (roullet < 0.15)
+    closer = (roullet >= 0.15) & (roullet < 0.5)
+    farther = roullet >= 0.5
+    done = win | lose
+    engine.appraiseBelief(1.0, "EmoCha", ["GetGold"], [np.where(win, 1.0, -1.0)], ~newBelief, mask=done)
+    closeToGoldCounter = np.where(farther, np.maximum(closeToGoldCounter - 1.0, 0.0), closeToGoldCounter)
+    engine.appraiseBelief(1.0, "EmoCha", ["CloseToGold"], [np.where(closer, 1.0, -1.0)], False, mask=closer | farther)
+    likelihood = np.where(closer, np.maximum(closeToGoldCounter / 100, 0.9), np.clip((100 - closeToGoldCounter) / 100, 0, 0.9))
+    engine.appraiseBelief(likelihood, "EmoCha", ["GetGold"], [np.where(closer, 0.5, -0.5)], ~newBelief, mask=closer | farther)
+    newBelief[:] = False
+    closeToGoldCounter = np.where(closer, closeToGoldCounter + 1, closeToGoldCounter)
+    engine.step(STEP_MS)
+    #The observation of every environment: the PAD state of EmoCha and its 16 emotions.
+    observation = np.concatenate((engine.getPADStates()[:, 0], engine.getEmotionalStates()[:, 0]), axis=1)
+    if done.any():
+        print("step", step, "episodes ended:", np.flatnonzero(done), "final PAD:", observation[done, :3].round(3).tolist())
+        episodes += int(done.sum())
+        engine.reset(done)
+        newBelief[done] = True
+        closeToGoldCounter[done] = 0.0
+print("observation shape:", observation.shape, "episodes:", episodes)
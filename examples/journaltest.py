@@ -0,0 +1,86 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+
+from pymygdala.concepts import Belief
+from pymygdala.engines import Gamygdala
+from pymygdala.journal import replayJournal
+from pymygdala.vectorized import ArrayGamygdala
+
+#Checks that replaying a journal reproduces the journaled run: a run that creates agents, goals and relations, appraises
+#beliefs one at a time, in batches and in columns, and decays, is journaled with Gamygdala and ArrayGamygdala, once from an
+#empty engine and once from an engine that already had a world (which journals a snapshot first), and replayed into both.
+
+def state(engine):
+    agents = []
+    for agent in engine.agents:
+        goals = [(goal.name, goal.utility, goal.likelihood, bool(goal.maintenanceGoal)) for goal in agent.goals]
+        relations = [(relation.agentName, relation.like, float(relation.lastDecayTime), [float(i) for i in relation.intensities]) for relation in agent.currentRelations]
+        agents.append((agent.name, float(agent.gain), float(agent.lastDecayTime), [float(i) for i in agent.intensities], goals, relations))
+    goals = [(goal.name, goal.utility, goal.likelihood, bool(goal.maintenanceGoal)) for goal in engine.goals]
+    return engine.decayFactor, engine.decayFunction.__name__, engine.decayTime, engine.lazyDecay, goals, agents
+
+def createAgents(engine, rng, names):
+    for name in names:
+        engine.createAgent(name)
+        engine.createGoalForAgent(name, name + '_goal', rng.uniform(-1.0, 1.0), rng.random() < 0.5)
+    for name in names:
+        if rng.random() < 0.2:
+            #Warns that 'common' exists, and shares it: the journaled way to give agents a common goal.
+            engine.createGoalForAgent(name, 'common', 0.6, True)
+        for target in rng.sample(names, 2):
+            engine.createRelation(name, target, rng.uniform(-1.0, 1.0))
+
+def randomBelief(rng, names):
+    owner = rng.choice(names)
+    return Belief(rng.uniform(0.0, 1.0), rng.choice(names + [None]), [owner + '_goal', 'common'][:rng.choice([1, 2])], [rng.uniform(-1.0, 1.0), rng.uniform(-1.0, 1.0)], rng.random() < 0.8)
+
+def run(engine, rng, names, steps=20):
+    #A mixed run: new agents and relations, single beliefs, batches, columns, decay, and a switch to lazy decay halfway.
+    for step in range(steps):
+        if step % 5 == 4:
+            newcomers = ['newcomer%d_%d' % (len(engine.agents), i) for i in range(3)]
+            createAgents(engine, rng, newcomers)
+            names = names + newcomers
+        engine.createRelation(rng.choice(names), rng.choice(names), rng.uniform(-1.0, 1.0))
+        for _ in range(10):
+            engine.appraise(randomBelief(rng, names))
+        engine.appraiseBatch([randomBelief(rng, names) for _ in range(10)])
+        engine.appraiseBatch([randomBelief(rng, names) for _ in range(5)], engine.getAgentByName(rng.choice(names)))
+        owners = [rng.choice(names) for _ in range(10)]
+        engine.appraiseColumns([rng.uniform(0.0, 1.0) for _ in owners], [rng.choice(names) for _ in owners], [owner + '_goal' for owner in owners], [rng.uniform(-1.0, 1.0) for _ in owners], rng.random() < 0.5)
+        engine.decayAll(rng.uniform(10.0, 100.0))
+        if step == steps // 2:
+            engine.setLazyDecay(True)
+            engine.setDecay(0.6, engine.linearDecay)
+
+def journalRun(engineClass, directory, fromSnapshot, seed=0):
+    rng = random.Random(seed)
+    names = ['agent%d' % i for i in range(30)]
+    engine = engineClass()
+    engine.setDecay(0.8, engine.exponentialDecay)
+    path = os.path.join(directory, engineClass.__name__ + '.jnl')
+    with contextlib.redirect_stdout(io.StringIO()):
+        if fromSnapshot:
+            createAgents(engine, rng, names)
+            run(engine, rng, names, 5)
+            engine.startJournal(path)
+        else:
+            engine.startJournal(path)
+            createAgents(engine, rng, names)
+        run(engine, rng, names)
+        engine.stopJournal()
+    expected = state(engine)
+    for replayClass in (Gamygdala, ArrayGamygdala):
+        with contextlib.redirect_stdout(io.StringIO()):
+            replayed = replayJournal(path, replayClass)
+        assert state(replayed) == expected, (engineClass, replayClass, fromSnapshot)
+        print('%s journal %s, replayed into %s ok' % (engineClass.__name__, 'from a snapshot' if fromSnapshot else 'from empty', replayClass.__name__))
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        for engineClass in (Gamygdala, ArrayGamygdala):
+            for fromSnapshot in (False, True):
+                journalRun(engineClass, directory, fromSnapshot)
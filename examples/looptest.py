@@ -1,12 +1,15 @@
-from gamygdala.engines import Gamygdala
-import time
+from pymygdala.clock import ManualClock
+from pymygdala.engines import Gamygdala
 import numpy as np
 
+#Every step of an episode is STEP_MS of simulated time, advanced with engine.step() instead of sleeping,
+#so the episodes run as fast as appraisal allows and give the same results for the same seed.
 NUM_EPISODES = 100
-EMOTION_DECAY_SPEED = 2
+STEP_MS = 5100
+rng = np.random.default_rng(0)
 for i in range(NUM_EPISODES):
     done = False
-    engine = Gamygdala()
+    engine = Gamygdala(clock=ManualClock())
     engine.debug = False
     agent1 = engine.createAgent("EmoCha")
     goal = engine.createGoalForAgent("EmoCha", "GetGold", 1.0, False)
@@ -15,7 +18,7 @@ for i in range(NUM_EPISODES):
     steps = 0
     closeToGoldCounter = 0
     while not done:
-        roullet = np.random.random()
+        roullet = rng.random()
         if roullet < 0.1:
             engine.appraiseBelief(1.0, "EmoCha", ["GetGold"], [1.0], not newBeliefAboutGoal['GetGold'])
             newBeliefAboutGoal['GetGold'] = False
@@ -41,15 +44,7 @@ for i in range(NUM_EPISODES):
             engine.appraiseBelief(max(0, min(0.9, p/100) ), "EmoCha", ["GetGold"], [-0.5], not newBeliefAboutGoal['GetGold'])
             newBeliefAboutGoal['GetGold'] = False
             print("Stayed farther from the goal!")
-        time.sleep(0.1)
-        agent1.decay(engine, steps*EMOTION_DECAY_SPEED)
+        engine.step(STEP_MS)
         engine.printAllEmotions()
-        time.sleep(5)
         steps += 1
     print("end epsiode: ", i)
-
-
-
-
-
-
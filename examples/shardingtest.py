@@ -0,0 +1,72 @@
+import random
+
+from pymygdala.concepts import Belief
+from pymygdala.engines import Gamygdala
+from pymygdala.sharding import ShardedGamygdala
+
+#Checks that ShardedGamygdala ends up in the same state as one Gamygdala given the same world and beliefs, including
+#common goals owned by agents on different shards and beliefs appraised for one agent only, whose likelihood has to be
+#kept by the goal's home shard for all owners to see the same value.
+
+def compare(engine, sharded, names, label):
+    worst = 0.0
+    for name in names:
+        expected = {emotion.name: emotion.intensity for emotion in engine.getAgentByName(name).getEmotionalState(True)}
+        actual = {emotion.name: emotion.intensity for emotion in sharded.getEmotionalState(name)}
+        assert expected.keys() == actual.keys(), (label, name, expected, actual)
+        for emotionName, intensity in expected.items():
+            worst = max(worst, abs(intensity - actual[emotionName]))
+    assert worst < 1e-9, (label, worst)
+    print(label, 'ok, largest difference', worst)
+
+def commonGoalOnTwoShards():
+    #Agents a and b share goal g but live on different shards. The beliefs appraised for b alone move the likelihood of g for a as well.
+    engine = Gamygdala()
+    with ShardedGamygdala(2) as sharded:
+        for name, shard in (('a', 0), ('b', 1)):
+            engine.createAgent(name)
+            sharded.createAgent(name, shard)
+            engine.createGoalForAgent(name, 'g', 1.0)
+            sharded.createGoalForAgent(name, 'g', 1.0)
+        belief = Belief(0.5, None, ['g'], [1], True)
+        for _ in range(2):
+            engine.appraise(belief, engine.getAgentByName('b'))
+            sharded.appraise(belief, 'b')
+        engine.appraise(belief)
+        sharded.appraise(belief)
+        compare(engine, sharded, ['a', 'b'], 'common goal on two shards')
+
+def randomWorld(numAgents=40, numShards=3, numBeliefs=400, seed=0):
+    rng = random.Random(seed)
+    names = ['agent%d' % i for i in range(numAgents)]
+    commonGoals = ['common%d' % i for i in range(4)]
+    engine = Gamygdala()
+    with ShardedGamygdala(numShards) as sharded:
+        for name in names:
+            engine.createAgent(name)
+            sharded.createAgent(name)
+            goals = [(name + '_goal', rng.uniform(-1.0, 1.0))] + [(goal, 0.7) for goal in rng.sample(commonGoals, 2)]
+            for goalName, utility in goals:
+                engine.createGoalForAgent(name, goalName, utility, True)
+                sharded.createGoalForAgent(name, goalName, utility, True)
+        for name in names:
+            for target in rng.sample(names, 4):
+                if target != name:
+                    like = rng.uniform(-1.0, 1.0)
+                    engine.createRelation(name, target, like)
+                    sharded.createRelation(name, target, like)
+        for _ in range(numBeliefs):
+            owner = rng.choice(names)
+            goalName = rng.choice([owner + '_goal'] + [goal.name for goal in engine.getAgentByName(owner).goals if goal.name in commonGoals])
+            belief = Belief(rng.uniform(0.0, 1.0), rng.choice(names + [None]), [goalName], [rng.choice([-1.0, 1.0])], rng.random() < 0.8)
+            if rng.random() < 0.3:
+                engine.appraise(belief, engine.getAgentByName(owner))
+                sharded.appraise(belief, owner)
+            else:
+                engine.appraise(belief)
+                sharded.appraise(belief)
+        compare(engine, sharded, names, 'random world on %d shards' % numShards)
+
+if __name__ == '__main__':
+    commonGoalOnTwoShards()
+    randomWorld()
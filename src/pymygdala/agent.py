@@ -1,5 +1,11 @@
+from contextlib import nullcontext
 from typing import Union
-from pymygdala.concepts import Emotion, Goal, Belief, Relation
+from pymygdala.concepts import Emotion, Goal, Belief, Relation, EMOTION_INDEX, EMOTION_NAMES, NUM_EMOTIONS, decayIntensities, emotionsFromIntensities, mapPAD
+
+#Used by queries of agents that are not registered to an engine, see Agent._engineLock.
+_NO_LOCK = nullcontext()
+#The attributes of an agent loaded from a snapshot that are created when they are first used, see Agent.__getattr__.
+_RESTORED_ATTRIBUTES = frozenset(('_intensities', 'goals', '_goalsByName', 'currentRelations', '_relationsByName'))
 
 class Agent:
 	"""
@@ -8,110 +14,194 @@ class Agent:
 	:param name: The name of the agent to be created. self name is used as ref throughout the appraisal engine.
 	:type name: str
 	"""
+	#The emotion to PAD mapping, shared by all agents (see concepts.mapPAD).
+	mapPAD = mapPAD
+	#Whether the engine has subscriptions watching this agent, whose changes it then has to note (see Gamygdala.subscribe).
+	_watched = False
+	#The archetypes.Archetype the agent was spawned from (see Gamygdala.spawnAgents), and whether it shares its goal list and index with the other agents of the archetype.
+	archetype = None
+	_sharedGoals = False
+
 	def __init__(self, name='agent'):
 		self.name = name
 		self.goals = []
+		self._goalsByName: dict[str, Goal] = {}
 		self.currentRelations: list[Relation] = []
-		self.internalState = []
+		self._relationsByName: dict[str, Relation] = {}
+		#The intensity of each emotion, indexed like EMOTION_NAMES. An emotion is present while its intensity is above zero.
+		self._intensities = [0.0] * NUM_EMOTIONS
 		self.gamygdalaInstance = None
-		self.mapPAD = {}
 		self.gain = 1
-		self.mapPAD['distress']=[-0.61,0.28,-0.36]
-		self.mapPAD['fear']=[-0.64,0.6,-0.43]
-		self.mapPAD['hope']=[0.51,0.23,0.14]
-		self.mapPAD['joy']=[0.76,.48,0.35]
-		self.mapPAD['satisfaction']=[0.87,0.2,0.62]
-		self.mapPAD['fear-confirmed']=[-0.61,0.06,-0.32]#defeated
-		self.mapPAD['disappointment']=[-0.61,-0.15,-0.29]
-		self.mapPAD['relief']=[0.29,-0.19,-0.28]
-		self.mapPAD['happy-for']=[0.64,0.35,0.25]
-		self.mapPAD['resentment']=[-0.35,0.35,0.29]
-		self.mapPAD['pity']=[-0.52,0.02,-0.21]#regretful
-		self.mapPAD['gloating']=[-0.45,0.48,0.42]#cruel
-		self.mapPAD['gratitude']=[0.64,0.16,-0.21]#grateful
-		self.mapPAD['anger']=[-0.51,0.59,0.25]
-		self.mapPAD['gratification']=[0.69,0.57,0.63]#triumphant
-		self.mapPAD['remorse']=[-0.57,0.28,-0.34]#guilty
+		#The Gamygdala.decayTime up to which this agent's emotions have been decayed, used for lazy decay (see Gamygdala.setLazyDecay).
+		self.lastDecayTime = 0.0
+		#The states returned by getEmotionalState() and getPADState() since the emotions last changed, keyed by what was asked for (and the gain they were gained with), None when there are none.
+		self._stateCache: Union[dict, None] = None
+		#The group whose rates this agent decays with when the engine has a decay policy, see Gamygdala.setDecayGroup.
+		self.decayGroup = None
+
+	def __getattr__(self, name: str):
+		#Only called for attributes the agent does not have. Agents loaded from a snapshot (see snapshot.loadSnapshot) get their emotions, goals and relations from the snapshot's columns when they are first used, so that loading a large world does not create them all.
+		restore = self.__dict__.get('_restore')
+		if restore is None or name not in _RESTORED_ATTRIBUTES:
+			raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+		restore.restoreAgent(self)
+		return self.__dict__[name]
 	
 	def addGoal(self, goal: Goal):
+		if self._sharedGoals:
+			self._ownGoals()
 		self.goals.append(goal)
+		#The first goal added with a given name wins lookups, as it did with the linear scan.
+		self._goalsByName.setdefault(goal.name, goal)
+		if self.gamygdalaInstance is not None:
+			self.gamygdalaInstance._indexGoal(self, goal.name)
 	
 	def removeGoal(self, goalName: str) -> bool:
+		if goalName not in self._goalsByName:
+			return False
+		if self._sharedGoals:
+			self._ownGoals()
 		for i in range(len(self.goals)):
 			if self.goals[i].name == goalName:
 				self.goals.pop(i)
-				return True
-		return False
+				break
+		del self._goalsByName[goalName]
+		#A duplicate with the same name may still be in the list, it now becomes the one found by name.
+		for goal in self.goals:
+			if goal.name == goalName:
+				self._goalsByName[goalName] = goal
+				break
+		if goalName not in self._goalsByName and self.gamygdalaInstance is not None:
+			self.gamygdalaInstance._unindexGoal(self, goalName)
+		return True
 	
+	def _ownGoals(self):
+		#Copies the goal list and index shared with the other agents of the archetype before they are changed.
+		self.goals = list(self.goals)
+		self._goalsByName = dict(self._goalsByName)
+		self._sharedGoals = False
+
 	def hasGoal(self, goalName: str) -> bool:
-		for i in range(len(self.goals)):
-			if self.goals[i].name == goalName:
-				return True
-		return False
+		return goalName in self._goalsByName
 	
 	def getGoalByName(self, goalName: str) -> Union[Goal, None]:
-		for i in range(len(self.goals)):
-			if self.goals[i].name == goalName:
-				return self.goals[i]
-		return None
+		return self._goalsByName.get(goalName)
 	
 	def setGain(self, gain: int):
 		assert gain > 0 and gain  <= 20, 'Error: gain factor for appraisal integration must be between 0 and 20'
 		self.gain = gain
+		self._stateCache = None
 	
 	def appraise(self, belief: Belief):
 		self.gamygdalaInstance.appraise(belief, self)
 
+	@property
+	def intensities(self) -> list[float]:
+		"""
+		The intensities of this agent's emotions, indexed like EMOTION_NAMES. Changing this list changes the agent's emotional state,
+		but not the states cached by getEmotionalState() and getPADState() until the agent's emotions next change through updateEmotionalState(), decay or the internalState setter.
+		"""
+		return self._intensities
+
+	@property
+	def internalState(self) -> list[Emotion]:
+		"""
+		The emotional state as a new list of Emotion objects. Changing it does not change the agent, use updateEmotionalState() or intensities instead.
+		"""
+		return emotionsFromIntensities(self._intensities)
+
+	@internalState.setter
+	def internalState(self, emotions: list[Emotion]):
+		intensities = [0.0] * NUM_EMOTIONS
+		for emotion in emotions:
+			intensities[EMOTION_INDEX[emotion.name]] += emotion.intensity
+		self._intensities[:] = intensities
+		self._stateCache = None
+
 	def updateEmotionalState(self, emotion: Emotion):
-		for i in range(len(self.internalState)):
-			if self.internalState[i].name == emotion.name:
-				#Appraisals simply add to the old value of the emotion
-				#So repeated appraisals without decay will result in the sum of the appraisals over time
-				#To decay the emotional state, call .decay(decayFunction), or simply use the facilitating function in Gamygdala setDecay(timeMS).
-				self.internalState[i].intensity += emotion.intensity
-				return
-		#copy on keep, we need to maintain a list of current emotions for the state, not a list references to the appraisal engine
-		self.internalState.append(Emotion(emotion.name, emotion.intensity))
-
-	def getEmotionalState(self, useGain: bool) -> list[Emotion]:
+		#Appraisals simply add to the old value of the emotion
+		#So repeated appraisals without decay will result in the sum of the appraisals over time
+		#To decay the emotional state, call .decay(decayFunction), or simply use the facilitating function in Gamygdala setDecay(timeMS).
+		self.addIntensity(EMOTION_INDEX[emotion.name], emotion.intensity)
+
+	def addIntensity(self, emotionIndex: int, intensity: float):
+		"""
+		Adds to the intensity of one emotion, like updateEmotionalState() but without an Emotion object. Appraisal uses this, so adding an emotion allocates no objects.
+
+		:param emotionIndex: The index of the emotion, see EmotionType.index.
+		:type emotionIndex: int
+
+		:param intensity: The intensity to add.
+		:type intensity: float
+		"""
+		self._settle()
+		self._intensities[emotionIndex] += intensity
+		self._stateCache = None
+		if self._watched:
+			self.gamygdalaInstance._touched[self] = None
+
+	def getEmotionalState(self, useGain: bool) -> tuple[Emotion, ...]:
 		"""
 		This function returns either the state as is (gain=false) or a state based on gained limiter (limited between 0 and 1), of which the gain can be set by using setGain(gain).
 		A high gain factor works well when appraisals are small and rare, and you want to see the effect of these appraisals
 		A low gain factor (close to 0 but in any case below 1) works well for high frequency and/or large appraisals, so that the effect of these is dampened.
+		The state is cached until the agent's emotions or gain change, so repeated queries return the same tuple. Its Emotion objects are shared, use updateEmotionalState() to change the agent's emotions.
 
 		:param useGain: Whether to use the gain function or not.
 		:type useGain: bool
 
-		:return: An array of emotions.
-		:rtype: list[Emotion]
+		:return: The present emotions.
+		:rtype: tuple[Emotion, ...]
 		"""
-		if useGain:
-			gainState=[]
-			for i in range(len(self.internalState)):
-				gainEmo=(self.gain*self.internalState[i].intensity)/(self.gain*self.internalState[i].intensity+1)
-				gainState.append(Emotion(self.internalState[i].name, gainEmo))
-			return gainState
-		else:
-			return self.internalState
+		with self._engineLock():
+			self._settle()
+			cache = self._stateCache
+			if cache is None:
+				cache = self._stateCache = {}
+			key = ('emotions', self.gain) if useGain else 'emotions'
+			state = cache.get(key)
+			if state is None:
+				if useGain:
+					gain = self.gain
+					state = tuple(emotionsFromIntensities([(gain*intensity)/(gain*intensity+1) for intensity in self._intensities]))
+				else:
+					state = tuple(emotionsFromIntensities(self._intensities))
+				cache[key] = state
+			return state
 
-	def getPADState(self, useGain: bool) -> list[int]:
+	def getPADState(self, useGain: bool) -> tuple[float, float, float]:
 		"""
 		This function returns a summation-based Pleasure Arousal Dominance mapping of the emotional state as is (gain=false), or a PAD mapping based on a gained limiter (limited between 0 and 1), of which the gain can be set by using setGain(gain).
 		It sums over all emotions the equivalent PAD values of each emotion (i.e., [P,A,D]=SUM(Emotion_i([P,A,D])))), which is then gained or not.
 		A high gain factor works well when appraisals are small and rare, and you want to see the effect of these appraisals.
 		A low gain factor (close to 0 but in any case below 1) works well for high frequency and/or large appraisals, so that the effect of these is dampened.
+		Like the emotional state, the PAD state is cached until the agent's emotions or gain change.
 
 		:param useGain: Whether to use the gain function or not.
 		:type useGain: bool
 
-		:return: An array of doubles with Pleasure at index 0, Arousal at index [1] and Dominance at index [2].
-		:rtype: list[float]
+		:return: Pleasure at index 0, Arousal at index [1] and Dominance at index [2].
+		:rtype: tuple[float, float, float]
 		"""
+		with self._engineLock():
+			self._settle()
+			cache = self._stateCache
+			if cache is None:
+				cache = self._stateCache = {}
+			key = ('PAD', self.gain) if useGain else 'PAD'
+			PAD = cache.get(key)
+			if PAD is None:
+				PAD = cache[key] = tuple(self._calculatePADState(useGain))
+			return PAD
+
+	def _calculatePADState(self, useGain: bool) -> list[float]:
 		PAD=[0, 0, 0]
-		for i in range(len(self.internalState)):
-			PAD[0] += self.internalState[i].intensity*self.mapPAD[self.internalState[i].name][0]
-			PAD[1] += self.internalState[i].intensity*self.mapPAD[self.internalState[i].name][1]
-			PAD[2] += self.internalState[i].intensity*self.mapPAD[self.internalState[i].name][2]
+		for i, intensity in enumerate(self._intensities):
+			if intensity > 0:
+				pad = self.mapPAD[EMOTION_NAMES[i]]
+				PAD[0] += intensity*pad[0]
+				PAD[1] += intensity*pad[1]
+				PAD[2] += intensity*pad[2]
 		if useGain:
 			PAD[0] = self.gain*PAD[0]/(self.gain*PAD[0]+1) if PAD[0]>=0 else -self.gain*PAD[0]/(self.gain*PAD[0]-1)
 			PAD[1] = self.gain*PAD[1]/(self.gain*PAD[1]+1) if PAD[1]>=0 else -self.gain*PAD[1]/(self.gain*PAD[1]-1)
@@ -148,14 +238,23 @@ class Agent:
 		:param like: The relation (between -1 and 1).
 		:type like: float
 		"""
-		if not self.hasRelationWith(agentName):
+		relation = self._relationsByName.get(agentName)
+		if relation is None:
 			#This relation does not exist, just add it.
-			self.currentRelations.append(Relation(agentName,like))   
+			self._settle()
+			relation = self._newRelation(agentName, like)
+			relation.lastDecayTime = self.lastDecayTime
+			self.currentRelations.append(relation)
+			self._relationsByName[agentName] = relation
+			if self.gamygdalaInstance is not None:
+				self.gamygdalaInstance._indexRelation(self, agentName)
 		else:
 			#The relation already exists, update it.
-			for i in range(len(self.currentRelations)):
-				if self.currentRelations[i].agentName == agentName:
-					self.currentRelations[i].like = like
+			relation.like = like
+
+	def _newRelation(self, agentName: str, like: float) -> Relation:
+		#Factory for the relation objects created by updateRelation, so that other state backends can provide their own Relation type.
+		return Relation(agentName, like)
 
 	def hasRelationWith(self, agentName: str) -> bool:
 		"""
@@ -167,7 +266,7 @@ class Agent:
 		:return: True if the relation exists, otherwise false.
 		:rtype: bool
 		"""
-		return self.getRelation(agentName) is not None
+		return agentName in self._relationsByName
 
 	def getRelation(self, agentName: str) -> Union[Relation, None]:
 		"""
@@ -179,10 +278,7 @@ class Agent:
 		:return: The given relation or None
 		:rtype: Relation or None
 		"""
-		for i in range(len(self.currentRelations)):
-			if self.currentRelations[i].agentName == agentName:
-				return self.currentRelations[i]    
-		return None
+		return self._relationsByName.get(agentName)
 
 
 	def printAllRelations(self):
@@ -219,12 +315,56 @@ class Agent:
 
 		:param decayFunction: A reference to the decayFunction property to be used.
 		:type decayFunction: Callable
+
+		:param deltaTime: The time to decay for in seconds, by default the time since the last Gamygdala.decayAll().
+		:type deltaTime: float
 		"""
-		for i in range(len(self.internalState)):
-			newIntensity = decayFunction(self.internalState[i].intensity, deltaTime)
-			if newIntensity < 0:
-				self.internalState.pop(i)
-			else:
-				self.internalState[i].intensity = newIntensity
+		self._decayInternalState(decayFunction, deltaTime)
 		for i in range(len(self.currentRelations)):
-			self.currentRelations[i].decay(decayFunction)
+			self.currentRelations[i].decay(decayFunction, deltaTime)
+
+	def _decayInternalState(self, decayFunction: callable, deltaTime=None):
+		decayIntensities(self._intensities, decayFunction, deltaTime)
+		self._stateCache = None
+
+	def _engineLock(self):
+		#The lock of the engine the agent is registered to. Queries hold it while they settle lazy decay and read the state, so they do not race with decay or appraisal on another thread (or apply the same decay twice).
+		gamygdala = self.gamygdalaInstance
+		return gamygdala.lock if gamygdala is not None else _NO_LOCK
+
+	def _settle(self):
+		#With lazy decay (see Gamygdala.setLazyDecay) this applies, in one closed form step, the decay this agent and its relations missed since they were last touched.
+		gamygdala = self.gamygdalaInstance
+		if gamygdala is None or not gamygdala.lazyDecay:
+			return
+		now = gamygdala.decayTime
+		if self.lastDecayTime >= now:
+			#Relations are settled together with the agent, so they are up to date as well.
+			return
+		policy = gamygdala.decayPolicy
+		if policy is None:
+			self._decayInternalState(gamygdala.decayFunction, (now - self.lastDecayTime) / 1000)
+		else:
+			rates = self._decayRates(policy)
+			policy.decayIntensities(self.intensities, rates, (now - self.lastDecayTime) / 1000)
+			self._stateCache = None
+		self.lastDecayTime = now
+		for relation in self.currentRelations:
+			if relation.lastDecayTime < now:
+				if policy is None:
+					relation.decay(gamygdala.decayFunction, (now - relation.lastDecayTime) / 1000)
+				else:
+					policy.decayIntensities(relation.intensities, rates, (now - relation.lastDecayTime) / 1000)
+				relation.lastDecayTime = now
+
+	def _decayByPolicy(self, policy, deltaTime: float):
+		#Decays the emotional state and relations with the rates of this agent's group in a decay.DecayPolicy, the policy counterpart of decay().
+		rates = self._decayRates(policy)
+		policy.decayIntensities(self.intensities, rates, deltaTime)
+		self._stateCache = None
+		for relation in self.currentRelations:
+			policy.decayIntensities(relation.intensities, rates, deltaTime)
+
+	def _decayRates(self, policy):
+		#The rates of this agent's emotions in a decay.DecayPolicy.
+		return policy.rates(self.decayGroup)
@@ -0,0 +1,98 @@
+"""
+Archetypes, kinds of agents (e.g. guards) whose agents share their goal definitions, gain and decay group, see Gamygdala.spawnAgents().
+
+An archetype lists its goals as GoalTemplate definitions. A template whose name contains {agent} defines a goal of every
+agent of the archetype, named after the agent (template '{agent}_safe' is goal 'guard12_safe' of agent 'guard12'). Such a
+goal is an InstanceGoal, which only holds the agent's likelihood and takes its utility and maintenance from the shared
+template. A template without {agent} is a common goal (see Gamygdala.createGoalForAgent) of all agents of the archetype,
+and agents that only have common goals share their goal list and index until one of them adds or removes a goal.
+The PAD mapping is shared by all agents already (see Agent.mapPAD).
+"""
+
+from typing import Hashable, Iterable, NamedTuple, Union
+
+class GoalTemplate(NamedTuple):
+    """
+    The immutable definition of a goal of an archetype.
+
+    :param name: The name of the goal, {agent} is replaced by the name of each agent for goals of their own.
+    :type name: str
+
+    :param utility: The utility of the goal, between -1 and 1.
+    :type utility: float
+
+    :param isMaintenanceGoal: Whether the goal is a maintenance goal, see Goal.
+    :type isMaintenanceGoal: bool
+    """
+    name: str
+    utility: float
+    isMaintenanceGoal: bool = False
+
+    @property
+    def isCommon(self) -> bool:
+        """
+        Whether all agents of the archetype share the goal, i.e. its name does not contain {agent}.
+        """
+        return '{agent}' not in self.name
+
+    def goalName(self, agentName: str) -> str:
+        """
+        The name of the goal of an agent.
+        """
+        return self.name.replace('{agent}', agentName)
+
+class InstanceGoal:
+    """
+    The goal of one agent made from a GoalTemplate, used like a Goal. It only holds the agent's likelihood, its utility and maintenance are those of the template and cannot be changed per agent.
+
+    :param template: The definition of the goal.
+    :type template: GoalTemplate
+
+    :param agentName: The name of the agent owning the goal.
+    :type agentName: str
+    """
+    __slots__ = ('name', 'likelihood', 'template')
+    #Instance goals always take their likelihood from beliefs, see Goal.calculateLikelyhood.
+    calculateLikelyhood = None
+
+    def __init__(self, template: GoalTemplate, agentName: str):
+        self.name = template.goalName(agentName)
+        self.likelihood = 0.5
+        self.template = template
+
+    @property
+    def utility(self) -> float:
+        return self.template.utility
+
+    @property
+    def maintenanceGoal(self) -> bool:
+        return self.template.isMaintenanceGoal
+
+    def __str__(self):
+        return "Goal: name(" + self.name + "), utility(" + str(self.utility) + "), likelihood(" + str(self.likelihood) + ")."
+
+class Archetype:
+    """
+    A kind of agent, whose agents are created with Gamygdala.spawnAgents().
+
+    :param name: The name of the archetype, the default names of its agents start with it.
+    :type name: str
+
+    :param goals: The goals of its agents, as GoalTemplate or (name, utility[, isMaintenanceGoal]) tuples.
+    :type goals: Iterable[GoalTemplate or tuple]
+
+    :param gain: The gain its agents start with, see Agent.setGain.
+    :type gain: float
+
+    :param decayGroup: The group of the engine's decay policy its agents are in (see Gamygdala.setDecayGroup), the name of the archetype when omitted.
+    :type decayGroup: Hashable
+    """
+    def __init__(self, name: str, goals: Iterable[Union[GoalTemplate, tuple]] = (), gain: float = 1, decayGroup: Hashable = None):
+        assert gain > 0 and gain <= 20, 'Error: gain factor for appraisal integration must be between 0 and 20'
+        self.name = name
+        self.goals = tuple(GoalTemplate(*goal) for goal in goals)
+        self.gain = gain
+        self.decayGroup = name if decayGroup is None else decayGroup
+
+    def __repr__(self):
+        return 'Archetype(%r, %d goals)' % (self.name, len(self.goals))
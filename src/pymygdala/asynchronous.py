@@ -0,0 +1,227 @@
+"""
+An asyncio front-end for Gamygdala, for games and servers that run inside an asyncio event loop.
+
+Beliefs are put on an asyncio.Queue and appraised in batches by a background task, decay runs as a periodic task timed by the
+event loop's clock, and the emotional state can be queried with awaitable snapshot methods. Appraisal is done in bounded
+batches that yield to the event loop in between, so emotional processing does not starve other coroutines.
+An exception raised while appraising a batch (e.g. by a malformed Belief or a subscription callback) does not stop the
+appraisal task, it is raised by the next flush() or stop() instead.
+"""
+
+import asyncio
+from typing import Union
+
+from pymygdala.concepts import Belief, Emotion
+from pymygdala.engines import Gamygdala
+
+class AsyncGamygdala:
+    """
+    Drives a Gamygdala engine from an asyncio event loop.
+    Create it, await start() (or use it as an async context manager), submit beliefs with submit() or appraiseBelief(), and await the get...() methods for snapshots of the emotional state.
+
+    :param gamygdala: The engine to drive, a new Gamygdala when omitted. Agents, goals and relations are set up on this engine as usual.
+    :type gamygdala: Gamygdala or None
+
+    :param decayMS: The interval between decay ticks in milliseconds, or None to not decay automatically.
+    :type decayMS: float or None
+
+    :param maxBatch: The maximum number of beliefs appraised before yielding to the event loop.
+    :type maxBatch: int
+
+    :param maxQueued: The maximum number of beliefs waiting to be appraised, 0 for no limit (see asyncio.Queue).
+    :type maxQueued: int
+    """
+    def __init__(self, gamygdala: Union[Gamygdala, None] = None, decayMS: Union[float, None] = None, maxBatch: int = 256, maxQueued: int = 0):
+        self.gamygdala = gamygdala if gamygdala is not None else Gamygdala()
+        self.decayMS = decayMS
+        self.maxBatch = maxBatch
+        self.maxQueued = maxQueued
+        #The queue is created in start(), so that it belongs to the running event loop.
+        self.queue: Union[asyncio.Queue, None] = None
+        self._tasks: list[asyncio.Task] = []
+        #The first exception raised by appraising a batch since it was last raised by flush() or stop().
+        self._error: Union[BaseException, None] = None
+
+    async def __aenter__(self) -> 'AsyncGamygdala':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    @property
+    def isRunning(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """
+        Starts the appraisal task, and the decay task if decayMS is set.
+        """
+        if self._tasks:
+            return
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.maxQueued)
+        self._tasks.append(asyncio.ensure_future(self._appraiseLoop()))
+        if self.decayMS is not None:
+            self._tasks.append(asyncio.ensure_future(self._decayLoop()))
+
+    async def stop(self, drain: bool = True):
+        """
+        Stops the background tasks, then raises the exception of a batch that failed to be appraised since the last flush(), if any.
+
+        :param drain: Whether to appraise the beliefs still in the queue before stopping.
+        :type drain: bool
+        """
+        if drain and self._tasks:
+            await self.queue.join()
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._raiseError()
+
+    def submit(self, belief: Belief):
+        """
+        Queues a belief for appraisal by all registered agents, without waiting.
+        Raises asyncio.QueueFull when maxQueued beliefs are already waiting, use put() to wait for room instead.
+
+        :param belief: The event to be appraised.
+        :type belief: Belief
+        """
+        self._checkStarted()
+        self.queue.put_nowait(belief)
+
+    async def put(self, belief: Belief):
+        """
+        Queues a belief for appraisal by all registered agents, waiting for room in the queue if it is bounded.
+
+        :param belief: The event to be appraised.
+        :type belief: Belief
+        """
+        self._checkStarted()
+        await self.queue.put(belief)
+
+    def appraiseBelief(self, likelihood: float, causalAgentName: str, affectedGoalNames: list[str], goalCongruences: list[float], isIncremental: bool = True):
+        """
+        Queues a belief for appraisal, see Gamygdala.appraiseBelief() for the parameters.
+        """
+        self.submit(Belief(likelihood, causalAgentName, affectedGoalNames, goalCongruences, isIncremental))
+
+    async def flush(self):
+        """
+        Waits until all queued beliefs have been appraised.
+        Raises the exception of a batch that failed to be appraised since the last flush(), the beliefs of that batch after the failing one are not appraised.
+        """
+        self._checkStarted()
+        await self.queue.join()
+        self._raiseError()
+
+    async def getEmotionalState(self, agentName: str, useGain: bool = True, flush: bool = True) -> list[Emotion]:
+        """
+        A snapshot of the emotional state of an agent, see Agent.getEmotionalState().
+
+        :param agentName: The name of the agent.
+        :type agentName: str
+
+        :param useGain: Whether to use the gain function or not.
+        :type useGain: bool
+
+        :param flush: Whether to first wait for the beliefs queued so far to be appraised.
+        :type flush: bool
+
+        :return: A copy of the agent's emotions, or None if the agent does not exist.
+        :rtype: list[Emotion] or None
+        """
+        if flush:
+            await self.flush()
+        agent = self.gamygdala.getAgentByName(agentName)
+        if agent is None:
+            return None
+        with self.gamygdala.lock:
+            return [Emotion(emotion.name, emotion.intensity) for emotion in agent.getEmotionalState(useGain)]
+
+    async def getPADState(self, agentName: str, useGain: bool = True, flush: bool = True) -> Union[list[float], None]:
+        """
+        A snapshot of the PAD state of an agent, see Agent.getPADState().
+
+        :param agentName: The name of the agent.
+        :type agentName: str
+
+        :param useGain: Whether to use the gain function or not.
+        :type useGain: bool
+
+        :param flush: Whether to first wait for the beliefs queued so far to be appraised.
+        :type flush: bool
+
+        :return: Pleasure, Arousal and Dominance, or None if the agent does not exist.
+        :rtype: list[float] or None
+        """
+        if flush:
+            await self.flush()
+        agent = self.gamygdala.getAgentByName(agentName)
+        if agent is None:
+            return None
+        with self.gamygdala.lock:
+            return list(agent.getPADState(useGain))
+
+    async def getPADStates(self, useGain: bool = True, flush: bool = True):
+        """
+        A snapshot of the PAD state of all agents, see Gamygdala.getPADStates(). This needs NumPy.
+
+        :param useGain: Whether to use the gain function or not.
+        :type useGain: bool
+
+        :param flush: Whether to first wait for the beliefs queued so far to be appraised.
+        :type flush: bool
+
+        :return: An (n_agents, 3) array.
+        :rtype: numpy.ndarray
+        """
+        if flush:
+            await self.flush()
+        with self.gamygdala.lock:
+            return self.gamygdala.getPADStates(useGain=useGain)
+
+    async def _appraiseLoop(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.maxBatch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                self.gamygdala.appraiseBatch(batch)
+            except Exception as error:
+                #Keep appraising later beliefs, the error is raised by flush() or stop().
+                if self._error is None:
+                    self._error = error
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            #Let other coroutines run between batches.
+            await asyncio.sleep(0)
+
+    def _checkStarted(self):
+        if self.queue is None:
+            raise RuntimeError('Error: call start() first, the queue is created for the running event loop')
+
+    def _raiseError(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    async def _decayLoop(self):
+        loop = asyncio.get_running_loop()
+        interval = self.decayMS / 1000.0
+        last = loop.time()
+        deadline = last + interval
+        while True:
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            now = loop.time()
+            self.gamygdala.decayAll((now - last) * 1000.0)
+            last = now
+            deadline += interval
+            if deadline < now:
+                #Skip ticks we could not keep up with, the next one decays for the whole time passed.
+                deadline = now + interval
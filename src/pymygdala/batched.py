@@ -0,0 +1,406 @@
+"""
+A NumPy engine that runs many independent worlds with the same agents, goals and relations in lockstep, e.g. the environments of a reinforcement learning run.
+
+BatchedGamygdala keeps the state of all worlds in arrays with a leading environment axis: the intensities of all agents
+(n_envs, n_agents, 16), the emotions of all relations (n_envs, n_relations, 16) and the likelihoods of all goals
+(n_envs, n_goals). The agents, goals and relations themselves (the schema) are shared by all environments. Appraisal walks
+the owners and observers of a goal once, as Gamygdala does, and updates all environments with one array operation per step,
+so every environment ends up in exactly the state a Gamygdala with the same history would be in.
+
+Likelihoods and congruences of a belief can differ per environment, a mask restricts a belief to some environments, and
+reset() puts finished environments back in their initial state. Relation likes and agent gains can also differ per environment.
+
+This module requires NumPy (pip install pymygdala[numpy]).
+"""
+
+from typing import Union
+
+import numpy as np
+
+from pymygdala.concepts import EmotionType, NO_EMOTION, NUM_EMOTIONS
+from pymygdala.vectorized import PAD_MATRIX, applyGain, internalEmotions, socialEmotions
+
+_GRATITUDE = EmotionType.GRATITUDE.index
+_ANGER = EmotionType.ANGER.index
+_GRATIFICATION = EmotionType.GRATIFICATION.index
+_REMORSE = EmotionType.REMORSE.index
+
+def _grownAxis(array: np.ndarray, capacity: int, fill: float = 0.0) -> np.ndarray:
+    #Grows the second (schema) axis of an (n_envs, capacity, ...) array.
+    grown = np.full((array.shape[0], capacity) + array.shape[2:], fill, dtype=array.dtype)
+    grown[:, :array.shape[1]] = array
+    return grown
+
+class BatchedGamygdala:
+    """
+    numEnvironments independent worlds that share one schema of agents, goals and relations, see the module documentation.
+    Build the schema with createAgent(), createGoalForAgent() and createRelation() (which work like those of Gamygdala), then
+    appraise beliefs and decay all environments at once. Agents, goals and relations are referred to by name.
+
+    :param numEnvironments: The number of worlds.
+    :type numEnvironments: int
+
+    :param capacity: The number of agents, goals and relations to allocate room for up front, the arrays grow as needed.
+    :type capacity: int
+    """
+    def __init__(self, numEnvironments: int, capacity: int = 16):
+        self.numEnvironments = numEnvironments
+        self._environments = np.arange(numEnvironments)
+        self.agentNames: list[str] = []
+        self._agentsByName: dict[str, int] = {}
+        self.goalNames: list[str] = []
+        self._goalsByName: dict[str, int] = {}
+        self._goalUtility: list[float] = []
+        self._goalMaintenance: list[bool] = []
+        #Goal name -> owning agents, and target name -> agents holding a relation to it, as insertion ordered sets like in Gamygdala.
+        self._goalOwners: dict[str, dict[int, None]] = {}
+        self._relationHolders: dict[str, dict[int, None]] = {}
+        #The relation row of every (agent, target name), and the agent and target name of every relation row.
+        self._relations: list[dict[str, int]] = []
+        self.relationSources: list[int] = []
+        self.relationTargets: list[str] = []
+        self._intensity = np.zeros((numEnvironments, capacity, NUM_EMOTIONS))
+        self._gain = np.ones((numEnvironments, capacity))
+        self._likelihood = np.full((numEnvironments, capacity), 0.5)
+        self._relationIntensity = np.zeros((numEnvironments, capacity, NUM_EMOTIONS))
+        self._like = np.zeros((numEnvironments, capacity))
+        self.decayFunction = self.exponentialDecay
+        self.decayFactor = 0.8
+        #The decay.DecayPolicy used instead of decayFunction, the decay group of every agent, and the rates of every agent and relation derived from the policy, see setDecayPolicy().
+        self.decayPolicy = None
+        self.decayGroups: list = []
+        self._decayRates = None
+        self._decayRatesKey = None
+        #The time in milliseconds all environments have been decayed for, see step().
+        self.time = 0.0
+
+    @property
+    def intensities(self) -> np.ndarray:
+        """
+        A writable (n_envs, n_agents, 16) view of the emotion intensities of all agents in all environments, columns ordered like EMOTION_NAMES.
+        """
+        return self._intensity[:, :len(self.agentNames)]
+
+    @property
+    def gains(self) -> np.ndarray:
+        """
+        A writable (n_envs, n_agents) view of the gain of all agents in all environments.
+        """
+        return self._gain[:, :len(self.agentNames)]
+
+    @property
+    def likelihoods(self) -> np.ndarray:
+        """
+        A writable (n_envs, n_goals) view of the likelihood of all goals in all environments, columns ordered like goalNames.
+        """
+        return self._likelihood[:, :len(self.goalNames)]
+
+    @property
+    def relationIntensities(self) -> np.ndarray:
+        """
+        A writable (n_envs, n_relations, 16) view of the emotions of all relations, relation i is held by agentNames[relationSources[i]] and targets relationTargets[i].
+        """
+        return self._relationIntensity[:, :len(self.relationTargets)]
+
+    @property
+    def likes(self) -> np.ndarray:
+        """
+        A writable (n_envs, n_relations) view of the like of all relations in all environments.
+        """
+        return self._like[:, :len(self.relationTargets)]
+
+    def createAgent(self, agentName: str) -> Union[int, None]:
+        """
+        Adds an agent to all environments.
+
+        :param agentName: The name of the agent, which has to be unique.
+        :type agentName: str
+
+        :return: The index of the agent along the agent axis, or None if an agent with that name exists already.
+        :rtype: int or None
+        """
+        if agentName in self._agentsByName:
+            print('Error: an agent with name ', agentName, ' exists already')
+            return None
+        index = len(self.agentNames)
+        if index == self._intensity.shape[1]:
+            capacity = 2 * index + 1
+            self._intensity = _grownAxis(self._intensity, capacity)
+            self._gain = _grownAxis(self._gain, capacity, 1.0)
+        self.agentNames.append(agentName)
+        self._agentsByName[agentName] = index
+        self._relations.append({})
+        self.decayGroups.append(None)
+        return index
+
+    def createGoalForAgent(self, agentName: str, goalName: str, goalUtility: float, isMaintenanceGoal: bool = False) -> Union[int, None]:
+        """
+        Adds a goal to an agent in all environments, see Gamygdala.createGoalForAgent(). A goal name that is known already is a common goal, its utility stays the same.
+
+        :return: The index of the goal along the goal axis, or None if the agent does not exist.
+        :rtype: int or None
+        """
+        agent = self._agentsByName.get(agentName)
+        if agent is None:
+            print("Error: agent with name ", agentName ," does not exist, so I cannot add a create a goal for it.")
+            return None
+        goal = self._goalsByName.get(goalName)
+        if goal is not None:
+            print("Warning: I cannot make a new goal with the same name ", goalName, " as one is registered already. I assume the goal is a common goal and will add the already known goal with that name to the agent ", agentName)
+        else:
+            goal = len(self.goalNames)
+            if goal == self._likelihood.shape[1]:
+                self._likelihood = _grownAxis(self._likelihood, 2 * goal + 1, 0.5)
+            self.goalNames.append(goalName)
+            self._goalsByName[goalName] = goal
+            self._goalUtility.append(goalUtility)
+            self._goalMaintenance.append(False)
+        if isMaintenanceGoal:
+            self._goalMaintenance[goal] = True
+        self._goalOwners.setdefault(goalName, {})[agent] = None
+        return goal
+
+    def createRelation(self, sourceName: str, targetName: str, relation: Union[float, np.ndarray]):
+        """
+        Sets the relation of an agent to another agent in all environments, see Gamygdala.createRelation().
+
+        :param relation: The like (between -1 and 1), one for all environments or an (n_envs,) array.
+        :type relation: float or numpy.ndarray
+        """
+        source = self._agentsByName.get(sourceName)
+        relation = np.asarray(relation, dtype=np.float64)
+        if source is None or targetName not in self._agentsByName or np.any(relation < -1) or np.any(relation > 1):
+            print('Error: cannot relate ', sourceName, '  to ', targetName ,' with intensity ', relation)
+            return
+        row = self._relation(source, targetName)
+        self._like[:, row] = relation
+
+    def _relation(self, agent: int, targetName: str) -> int:
+        #The relation row of an agent to a target, added (with a like of 0 and no emotions) if the agent has no relation to the target yet.
+        row = self._relations[agent].get(targetName)
+        if row is None:
+            row = len(self.relationTargets)
+            if row == self._like.shape[1]:
+                capacity = 2 * row + 1
+                self._relationIntensity = _grownAxis(self._relationIntensity, capacity)
+                self._like = _grownAxis(self._like, capacity)
+            self.relationSources.append(agent)
+            self.relationTargets.append(targetName)
+            self._relations[agent][targetName] = row
+            self._relationHolders.setdefault(targetName, {})[agent] = None
+        return row
+
+    def setGain(self, gain: Union[float, np.ndarray], agentName: Union[str, None] = None):
+        """
+        Sets the gain of one agent, or of all agents, see Agent.setGain().
+
+        :param gain: The gain (between 0 and 20), one for all environments or an (n_envs,) array.
+        :type gain: float or numpy.ndarray
+
+        :param agentName: The agent to set the gain of, all agents when omitted.
+        :type agentName: str or None
+        """
+        gain = np.asarray(gain, dtype=np.float64)
+        assert np.all(gain > 0) and np.all(gain <= 20), 'Error: gain factor for appraisal integration must be between 0 and 20'
+        if agentName is None:
+            self.gains[:] = gain[..., None] if gain.ndim else gain
+        else:
+            self._gain[:, self._agentsByName[agentName]] = gain
+
+    def setDecay(self, decayFactor: float, decayFunction: callable):
+        """
+        Sets the decay factor and function, see Gamygdala.setDecay(). Choose between linearDecay and exponentialDecay of this engine.
+        """
+        self.decayFunction = decayFunction
+        self.decayFactor = decayFactor
+        self.decayPolicy = None
+
+    def setDecayPolicy(self, policy: 'DecayPolicy'):
+        """
+        Decays with a decay policy (see the decay module), with rates per agent group and per emotion, instead of the decay function, see Gamygdala.setDecayPolicy().
+        """
+        self.decayPolicy = policy
+
+    def setDecayGroup(self, agentName: str, group):
+        """
+        Puts an agent in a group of the decay policy in all environments, see Gamygdala.setDecayGroup().
+        """
+        self.decayGroups[self._agentsByName[agentName]] = group
+        self._decayRatesKey = None
+
+    def linearDecay(self, value: np.ndarray, deltaTime: float) -> np.ndarray:
+        return value - self.decayFactor * deltaTime
+
+    def exponentialDecay(self, value: np.ndarray, deltaTime: float) -> np.ndarray:
+        return value * self.decayFactor ** deltaTime
+
+    def appraiseBelief(self, likelihood: Union[float, np.ndarray], causalAgentName: Union[str, None], affectedGoalNames: list[str], goalCongruences: list[Union[float, np.ndarray]], isIncremental: Union[bool, np.ndarray] = True, mask: Union[np.ndarray, None] = None) -> bool:
+        """
+        Appraises a belief in all (or the masked) environments, see Gamygdala.appraiseBelief(). The schema of the belief (its causal agent and goals) is the same in all environments,
+        its likelihood, congruences and whether it is incremental can differ per environment.
+
+        :param likelihood: The likelihood of the belief, one for all environments or an (n_envs,) array.
+        :type likelihood: float or numpy.ndarray
+
+        :param causalAgentName: The name of the causal agent, None or '' if the event was not caused by an agent.
+        :type causalAgentName: str or None
+
+        :param affectedGoalNames: The names of the affected goals, goals that are not known are skipped.
+        :type affectedGoalNames: list[str]
+
+        :param goalCongruences: The congruence of the belief with each goal, each one for all environments or an (n_envs,) array.
+        :type goalCongruences: list[float or numpy.ndarray]
+
+        :param isIncremental: Whether the belief is incremental evidence, one for all environments or an (n_envs,) array.
+        :type isIncremental: bool or numpy.ndarray
+
+        :param mask: An (n_envs,) boolean array of the environments the belief happened in, all environments when omitted.
+        :type mask: numpy.ndarray or None
+
+        :return: Whether the belief was appraised.
+        :rtype: bool
+        """
+        if len(goalCongruences) != len(affectedGoalNames):
+            print("Error: the congruence list was not of the same length as the affected goal list")
+            return False
+        if len(self.goalNames) == 0:
+            print("Warning: no goals registered to Gamygdala, all goals to be considered in appraisal need to be registered.")
+            return False
+        likelihood = np.asarray(likelihood, dtype=np.float64)
+        for goalName, congruence in zip(affectedGoalNames, goalCongruences):
+            goal = self._goalsByName.get(goalName)
+            if goal is not None:
+                self._appraiseGoal(goal, np.asarray(congruence, dtype=np.float64), likelihood, isIncremental, causalAgentName, mask)
+        return True
+
+    def _appraiseGoal(self, goal: int, congruence: np.ndarray, likelihood: np.ndarray, isIncremental, causalAgentName: Union[str, None], mask: Union[np.ndarray, None]):
+        #Gamygdala._appraiseGoal for all environments at once. Each environment gets the emotion its conditions select, environments where no emotion arises get zero added, which leaves them unchanged.
+        utility = self._goalUtility[goal]
+        deltaLikelihood = self._calculateDeltaLikelihood(goal, congruence, likelihood, isIncremental, mask)
+        desirability = congruence * utility
+        newLikelihood = self._likelihood[:, goal]
+        intensity = np.abs(utility * deltaLikelihood)
+        goalName = self.goalNames[goal]
+        hasCause = causalAgentName is not None and causalAgentName != ''
+        for owner in self._goalOwners.get(goalName, ()):
+            self._evaluateInternalEmotion(utility, deltaLikelihood, newLikelihood, intensity, owner)
+            if hasCause and self.agentNames[owner] != causalAgentName:
+                self._addCausedEmotion(owner, causalAgentName, desirability, intensity)
+            #The social emotions of everyone with a relation to the owner.
+            ownerName = self.agentNames[owner]
+            for observer in self._relationHolders.get(ownerName, ()):
+                relation = self._relations[observer][ownerName]
+                like = self._like[:, relation]
+                socialIntensity = np.abs(utility * deltaLikelihood * like)
+                self._add(observer, relation, socialEmotions(desirability, like), socialIntensity)
+                if hasCause:
+                    observerName = self.agentNames[observer]
+                    if observer == owner and observerName != causalAgentName:
+                        self._addCausedEmotion(observer, causalAgentName, desirability, intensity)
+                    elif observer != owner and observerName == causalAgentName:
+                        #The observer caused the event, remorse or gratification for agents it likes.
+                        self._add(observer, relation, np.where(desirability >= 0, _GRATIFICATION, _REMORSE), np.where(like >= 0, socialIntensity, 0.0))
+
+    def _calculateDeltaLikelihood(self, goal: int, congruence: np.ndarray, likelihood: np.ndarray, isIncremental, mask: Union[np.ndarray, None]) -> np.ndarray:
+        #Gamygdala._calculateDeltaLikelihood for all environments, environments outside the mask and reached achievement goals do not change.
+        oldLikelihood = self._likelihood[:, goal].copy()
+        incremental = np.clip(oldLikelihood + likelihood * congruence, -1.0, 1.0)
+        absolute = (congruence * likelihood + 1.0) / 2.0
+        newLikelihood = np.where(isIncremental, incremental, absolute)
+        frozen = np.zeros(self.numEnvironments, dtype=bool) if self._goalMaintenance[goal] else (oldLikelihood >= 1.0) | (oldLikelihood <= -1.0)
+        if mask is not None:
+            frozen |= ~mask
+        newLikelihood = np.where(frozen, oldLikelihood, newLikelihood)
+        self._likelihood[:, goal] = newLikelihood
+        return np.where(frozen, 0.0, newLikelihood - oldLikelihood)
+
+    def _evaluateInternalEmotion(self, utility: float, deltaLikelihood: np.ndarray, likelihood: np.ndarray, intensity: np.ndarray, agent: int):
+        #Gamygdala._evaluateInternalEmotion for all environments, with the compiled rule table. Where no emotion arises, zero is added to the last emotion, which leaves it unchanged.
+        emotion, confirmation = internalEmotions(utility, deltaLikelihood, likelihood)
+        state = self._intensity[:, agent]
+        state[self._environments, emotion] += np.where(emotion != NO_EMOTION, intensity, 0.0)
+        state[self._environments, confirmation] += np.where(confirmation != NO_EMOTION, intensity, 0.0)
+
+    def _addCausedEmotion(self, agent: int, causalAgentName: str, desirability: np.ndarray, intensity: np.ndarray):
+        #Gratitude or anger of a goal owner towards the agent that caused the event, see Gamygdala._agentActions.
+        relation = self._relation(agent, causalAgentName)
+        self._add(agent, relation, np.where(desirability >= 0, _GRATITUDE, _ANGER), intensity)
+
+    def _add(self, agent: int, relation: int, emotion: np.ndarray, intensity: np.ndarray):
+        #Adds an emotion per environment to a relation and to the agent holding it.
+        self._relationIntensity[self._environments, relation, emotion] += intensity
+        self._intensity[self._environments, agent, emotion] += intensity
+
+    def decayAll(self, millisPassed: float):
+        """
+        Decays all agents and relations in all environments by millisPassed milliseconds, with the decay function set with setDecay(). Emotions decayed to zero or below are removed.
+
+        :param millisPassed: The time to decay for in milliseconds.
+        :type millisPassed: float
+        """
+        policy = self.decayPolicy
+        if policy is None:
+            for intensities in (self.intensities, self.relationIntensities):
+                intensities[:] = self.decayFunction(intensities, millisPassed / 1000)
+                np.maximum(intensities, 0.0, out=intensities)
+        else:
+            #The (n_agents, 16) and (n_relations, 16) rates broadcast over the environment axis.
+            for intensities, rates in zip((self.intensities, self.relationIntensities), self._policyRates()):
+                intensities[:] = policy.decay(intensities, rates, millisPassed / 1000)
+                np.maximum(intensities, 0.0, out=intensities)
+
+    def _policyRates(self) -> tuple[np.ndarray, np.ndarray]:
+        #The rates of every agent and every relation in the decay policy, derived again when the policy, its rates or the agents change.
+        policy = self.decayPolicy
+        key = (policy, policy.version, len(self.agentNames), len(self.relationTargets))
+        if key != self._decayRatesKey:
+            agentRates = np.array([policy.rates(group) for group in self.decayGroups], dtype=np.float64).reshape(-1, NUM_EMOTIONS)
+            self._decayRates = (agentRates, agentRates[np.asarray(self.relationSources, dtype=np.intp)])
+            self._decayRatesKey = key
+        return self._decayRates
+
+    def step(self, millis: float):
+        """
+        Advances all environments by a fixed time step, see Gamygdala.step().
+
+        :param millis: The time step in milliseconds.
+        :type millis: float
+        """
+        self.time += millis
+        self.decayAll(millis)
+
+    def reset(self, mask: Union[np.ndarray, None] = None):
+        """
+        Puts environments back in their initial state: no emotions, and every goal at its initial likelihood (0.5). Relation likes and gains are kept.
+
+        :param mask: An (n_envs,) boolean array of the environments to reset, all environments when omitted.
+        :type mask: numpy.ndarray or None
+        """
+        if mask is None:
+            mask = slice(None)
+        self._intensity[mask] = 0.0
+        self._relationIntensity[mask] = 0.0
+        self._likelihood[mask] = 0.5
+
+    def getEmotionalStates(self, useGain: bool = True) -> np.ndarray:
+        """
+        The emotional state of all agents in all environments, as is (useGain=False) or gained (see Agent.getEmotionalState).
+
+        :return: An (n_envs, n_agents, 16) array, columns ordered like EMOTION_NAMES.
+        :rtype: numpy.ndarray
+        """
+        if useGain:
+            return applyGain(self.intensities, self.gains[..., None])
+        return self.intensities.copy()
+
+    def getPADStates(self, useGain: bool = True) -> np.ndarray:
+        """
+        The Pleasure Arousal Dominance mapping of the emotional state of all agents in all environments (see Agent.getPADState).
+
+        :return: An (n_envs, n_agents, 3) array with Pleasure, Arousal and Dominance columns.
+        :rtype: numpy.ndarray
+        """
+        PAD = self.intensities @ PAD_MATRIX
+        if useGain:
+            PAD = applyGain(PAD, self.gains[..., None])
+        return PAD
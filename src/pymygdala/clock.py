@@ -0,0 +1,39 @@
+"""
+Clocks that tell a Gamygdala engine the time in milliseconds, see Gamygdala(clock=...) and Gamygdala.step().
+
+decayAll() without an explicit time decays for the time passed on the engine's clock since the previous call. Any object
+with a now() method returning milliseconds can be used as a clock; clocks that also have an advance(millis) method are
+advanced by Gamygdala.step().
+"""
+
+import time
+
+class WallClock:
+    """
+    The real time, the default clock. It is monotonic, so changes of the system time do not cause jumps in decay.
+    """
+    def now(self) -> float:
+        return time.monotonic() * 1000.0
+
+class ManualClock:
+    """
+    A clock that only moves when it is advanced, for headless simulations that run faster (or slower) than real time.
+    With a ManualClock, decay only depends on the time steps taken, so simulation runs are reproducible.
+
+    :param start: The time to start at, in milliseconds.
+    :type start: float
+    """
+    def __init__(self, start: float = 0.0):
+        self.time = start
+
+    def now(self) -> float:
+        return self.time
+
+    def advance(self, millis: float):
+        """
+        Moves the clock forward.
+
+        :param millis: The time to advance in milliseconds.
+        :type millis: float
+        """
+        self.time += millis
@@ -1,16 +1,171 @@
+from enum import Enum
 from typing import Union
 
+class EmotionType(str, Enum):
+    """
+    The 16 OCC emotions known to Gamygdala. The members are strings, so they compare and hash like the emotion names ('joy' == EmotionType.JOY), and each has an index into fixed-index intensity storage, in EMOTION_NAMES order.
+    """
+    def __new__(cls, name: str):
+        member = str.__new__(cls, name)
+        member._value_ = name
+        member.index = len(cls.__members__)
+        return member
+
+    DISTRESS = 'distress'
+    FEAR = 'fear'
+    HOPE = 'hope'
+    JOY = 'joy'
+    SATISFACTION = 'satisfaction'
+    FEAR_CONFIRMED = 'fear-confirmed'
+    DISAPPOINTMENT = 'disappointment'
+    RELIEF = 'relief'
+    HAPPY_FOR = 'happy-for'
+    RESENTMENT = 'resentment'
+    PITY = 'pity'
+    GLOATING = 'gloating'
+    GRATITUDE = 'gratitude'
+    ANGER = 'anger'
+    GRATIFICATION = 'gratification'
+    REMORSE = 'remorse'
+
+    __hash__ = str.__hash__
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+#The 16 OCC emotions known to Gamygdala, in a fixed order so they can be used as indices into intensity arrays.
+EMOTION_TYPES = tuple(EmotionType)
+EMOTION_NAMES = tuple(emotionType.value for emotionType in EMOTION_TYPES)
+EMOTION_INDEX = {name: i for i, name in enumerate(EMOTION_NAMES)}
+NUM_EMOTIONS = len(EMOTION_NAMES)
+#Interns emotion names, EmotionType members hash like their names so they are found as well.
+_EMOTION_TYPE_BY_NAME = {emotionType.value: emotionType for emotionType in EMOTION_TYPES}
+
+#The Pleasure Arousal Dominance values of each emotion. This table is shared by all agents, do not change it per agent.
+mapPAD = {
+    'distress': (-0.61, 0.28, -0.36),
+    'fear': (-0.64, 0.6, -0.43),
+    'hope': (0.51, 0.23, 0.14),
+    'joy': (0.76, .48, 0.35),
+    'satisfaction': (0.87, 0.2, 0.62),
+    'fear-confirmed': (-0.61, 0.06, -0.32), #defeated
+    'disappointment': (-0.61, -0.15, -0.29),
+    'relief': (0.29, -0.19, -0.28),
+    'happy-for': (0.64, 0.35, 0.25),
+    'resentment': (-0.35, 0.35, 0.29),
+    'pity': (-0.52, 0.02, -0.21), #regretful
+    'gloating': (-0.45, 0.48, 0.42), #cruel
+    'gratitude': (0.64, 0.16, -0.21), #grateful
+    'anger': (-0.51, 0.59, 0.25),
+    'gratification': (0.69, 0.57, 0.63), #triumphant
+    'remorse': (-0.57, 0.28, -0.34), #guilty
+}
+
 class Emotion:
     """
     This class is mainly a data structure to store an emotion with its intensity.
+    The name is interned as an EmotionType, a ValueError is raised for names that are not one of the 16 OCC emotions.
     """
-    def __init__(self, name: str = "joy", intensity: float = 0.0):
-        self.name = name
+    __slots__ = ('name', 'intensity')
+
+    def __init__(self, name: Union[str, EmotionType] = "joy", intensity: float = 0.0):
+        self.name = _EMOTION_TYPE_BY_NAME.get(name) or EmotionType(name)
         self.intensity = intensity
     
     def __str__(self):
         return "Emotion: name(" + self.name + "), intensity(" + str(self.intensity) + ")."
 
+def emotionsFromIntensities(intensities: list[float]) -> list[Emotion]:
+    """
+    Converts fixed-index intensities (see EMOTION_NAMES) to a list of Emotion objects, leaving out the emotions that are not present.
+
+    :param intensities: The intensity of each emotion.
+    :type intensities: list[float]
+
+    :return: The present emotions, in EMOTION_NAMES order.
+    :rtype: list[Emotion]
+    """
+    return [Emotion(EMOTION_TYPES[i], intensity) for i, intensity in enumerate(intensities) if intensity > 0]
+
+def decayIntensities(intensities: list[float], decayFunction: callable, deltaTime=None):
+    """
+    Decays fixed-index intensities (see EMOTION_NAMES) in place. Emotions that decay to zero or below are removed, i.e. set to zero.
+
+    :param intensities: The intensity of each emotion.
+    :type intensities: list[float]
+
+    :param decayFunction: The decay function, see Gamygdala.setDecay().
+    :type decayFunction: Callable
+
+    :param deltaTime: The time to decay for in seconds, passed on to the decay function.
+    :type deltaTime: float
+    """
+    for i, intensity in enumerate(intensities):
+        if intensity > 0:
+            intensity = decayFunction(intensity, deltaTime)
+            intensities[i] = intensity if intensity > 0 else 0.0
+
+#The appraisal rules of Gamygdala, compiled into lookup tables of emotion indices (see EmotionType.index) so that they can be applied to single values and to whole NumPy arrays alike.
+#NO_EMOTION marks table entries where no emotion arises.
+NO_EMOTION = -1
+
+def _internalEmotionRule(utilityPositive: bool, deltaBucket: int, likelihoodBucket: int) -> tuple[int, int]:
+    #The OCC rules for hope, fear, joy, distress and the confirmation emotions, for one bucket of values (see internalEmotionKey).
+    #Gamygdala counts a rise in likelihood as positive for a goal with a positive utility, and a fall for one with a negative utility.
+    positive = (deltaBucket > 0) == utilityPositive
+    if likelihoodBucket == 2:
+        return (EmotionType.HOPE.index if positive else EmotionType.FEAR.index), NO_EMOTION
+    if likelihoodBucket == 3:
+        #The goal is certain, confirmed unless the change in likelihood was at least 0.5.
+        if utilityPositive:
+            emotion, confirmation = EmotionType.JOY.index, EmotionType.SATISFACTION.index
+        else:
+            emotion, confirmation = EmotionType.DISTRESS.index, EmotionType.FEAR_CONFIRMED.index
+        return emotion, (confirmation if deltaBucket < 2 else NO_EMOTION)
+    if likelihoodBucket == 1:
+        #The goal is impossible, a disconfirmation if the change in likelihood was more than 0.5.
+        if utilityPositive:
+            emotion, disconfirmation = EmotionType.DISTRESS.index, EmotionType.DISAPPOINTMENT.index
+        else:
+            emotion, disconfirmation = EmotionType.JOY.index, EmotionType.RELIEF.index
+        return emotion, (disconfirmation if deltaBucket == 3 else NO_EMOTION)
+    return NO_EMOTION, NO_EMOTION
+
+#The internal emotions (an emotion and a confirmation emotion) for each key of internalEmotionKey().
+INTERNAL_EMOTIONS = tuple(_internalEmotionRule(utilityPositive, deltaBucket, likelihoodBucket) for utilityPositive in (False, True) for deltaBucket in range(4) for likelihoodBucket in range(5))
+#The social emotion of an observer for each key of socialEmotionKey().
+SOCIAL_EMOTIONS = (EmotionType.GLOATING.index, EmotionType.PITY.index, EmotionType.RESENTMENT.index, EmotionType.HAPPY_FOR.index)
+#The emotion of a goal owner towards the agent that caused an event, and of an agent that caused an event for an agent it likes, indexed by whether the event was desirable.
+CAUSED_EMOTIONS = (EmotionType.ANGER.index, EmotionType.GRATITUDE.index)
+CAUSING_EMOTIONS = (EmotionType.REMORSE.index, EmotionType.GRATIFICATION.index)
+
+def internalEmotionKey(utility, deltaLikelihood, likelihood):
+    """
+    The index into INTERNAL_EMOTIONS for an appraisal of a goal, from the sign of its utility and the bucket of the change in its likelihood (below 0, below 0.5, 0.5, above 0.5)
+    and of its new likelihood (below 0, 0, between 0 and 1, 1, above 1). Works on single values and on NumPy arrays, see vectorized.internalEmotions().
+
+    :param utility: The utility of the goal.
+    :type utility: float or numpy.ndarray
+
+    :param deltaLikelihood: The change in the goal's likelihood.
+    :type deltaLikelihood: float or numpy.ndarray
+
+    :param likelihood: The new likelihood of the goal.
+    :type likelihood: float or numpy.ndarray
+
+    :return: The key, between 0 and 39.
+    :rtype: int or numpy.ndarray
+    """
+    #Every comparison is multiplied separately, NumPy would add boolean arrays as a logical or.
+    return (20 * (utility >= 0) + 5 * (deltaLikelihood >= 0) + 5 * (deltaLikelihood >= 0.5) + 5 * (deltaLikelihood > 0.5)
+            + 1 * (likelihood >= 0) + 1 * (likelihood > 0) + 1 * (likelihood >= 1) + 1 * (likelihood > 1))
+
+def socialEmotionKey(desirability, like):
+    """
+    The index into SOCIAL_EMOTIONS for an observer of an event, from whether the event was desirable for the goal owner and whether the observer likes the owner.
+    Works on single values and on NumPy arrays.
+    """
+    return 2 * (desirability >= 0) + 1 * (like >= 0)
+
 class Goal:
     """
     This class is mainly a data structure to store a goal with it's utility and likelihood of being achieved. 
@@ -25,6 +180,8 @@ class Goal:
     :param isMaintenanceGoal: Determines if this is a maintenance or achievement goal. When an achievement goal is reached (or not), this is definite (e.g., to a the promotion or not). A maintenance goal can become true/false indefinetly (e.g., to be well-fed).
     :type isMaintenanceGoal: bool
     """
+    __slots__ = ('name', 'utility', 'likelihood', 'calculateLikelyhood', 'maintenanceGoal')
+
     def __init__(self, name: str = "main", utility: float = 1.0, isMaintenanceGoal: bool = False):
 
         self.name = name
@@ -57,6 +214,8 @@ class Belief:
     :type isIncremental: bool
 
     """
+    __slots__ = ('likelihood', 'causalAgentName', 'affectedGoalNames', 'goalCongruences', 'isIncremental')
+
     def __init__(self, likelihood: float = 0.0, causalAgentName: str = '', affectedGoalNames: Union[list[str], None] = None, goalCongruences: Union[list[int], None] = None, isIncremental: bool = False):
         self.likelihood = likelihood
         self.causalAgentName = causalAgentName
@@ -80,29 +239,47 @@ class Relation:
     It's main role is to store and manage the emotions felt for a target agent (e.g angry at, or pity for). 
     Each agent maintains a list of relations, one relation for each target agent.
     """
+    __slots__ = ('agentName', 'like', '_intensities', 'lastDecayTime')
+
     def __init__(self, targetName: str, like: float = 1.0):
         self.agentName = targetName
         self.like = like
-        self.emotionList = []
+        #The intensity of each emotion felt for the target, indexed like EMOTION_NAMES. An emotion is present while its intensity is above zero.
+        self._intensities = [0.0] * NUM_EMOTIONS
+        #The Gamygdala.decayTime up to which the emotions of this relation have been decayed, used for lazy decay.
+        self.lastDecayTime = 0.0
+
+    @property
+    def intensities(self) -> list[float]:
+        """
+        The intensities of the emotions felt for the target, indexed like EMOTION_NAMES. Changing this list changes the relation.
+        """
+        return self._intensities
+
+    @property
+    def emotionList(self) -> list[Emotion]:
+        """
+        The emotions felt for the target, as a new list of Emotion objects. Changing it does not change the relation, use addEmotion() instead.
+        """
+        return emotionsFromIntensities(self._intensities)
 
     def addEmotion(self, emotion: Emotion):
-        added = False
-        for  i in range( len(self.emotionList) ):
-            if self.emotionList[i].name == emotion.name:
-                self.emotionList[i].intensity += emotion.intensity
-                added = True
-        if added:
-            #copy on keep, we need to maintain a list of current emotions for the relation, not a list refs to the appraisal engine
-            self.emotionList.append(Emotion(emotion.name, emotion.intensity))
-
-    def decay(self, decayFunction):
-        for  i in range( len(self.emotionList) ):
-            newIntensity=decayFunction(self.emotionList[i].intensity)
-            if newIntensity < 0:
-                #This emotion has decayed below zero, we need to remove it.
-                self.emotionList.pop(i)
-            else:
-                self.emotionList[i].intensity = newIntensity
+        self.addIntensity(EMOTION_INDEX[emotion.name], emotion.intensity)
+
+    def addIntensity(self, emotionIndex: int, intensity: float):
+        """
+        Adds to the intensity of one emotion felt for the target, like addEmotion() but without an Emotion object.
+
+        :param emotionIndex: The index of the emotion, see EmotionType.index.
+        :type emotionIndex: int
+
+        :param intensity: The intensity to add.
+        :type intensity: float
+        """
+        self._intensities[emotionIndex] += intensity
+
+    def decay(self, decayFunction, deltaTime=None):
+        decayIntensities(self._intensities, decayFunction, deltaTime)
 
     def __str__(self):
         s1 = "Target Name: %s, Like: %s\n"%(self.agentName, self.like)
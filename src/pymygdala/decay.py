@@ -0,0 +1,235 @@
+"""
+Decay policies, which decay emotions with a rate per agent group and per emotion, e.g. anger lingering longer than joy, or guards calming down faster than merchants.
+
+A policy is set with Gamygdala.setDecayPolicy(policy) and replaces the engine's decay function and factor, agents are put
+in groups (e.g. their archetype) with Gamygdala.setDecayGroup(). The rate of an emotion of an agent is the first one that
+is set of: the rate for the agent's group and that emotion, the rate for the group, the rate for the emotion, and the
+policy's default rate. Relations decay with the rates of the agent holding them.
+
+Policies implement decay() with arithmetic that works on whole NumPy arrays as well as on single values, so ArrayGamygdala
+and BatchedGamygdala decay all agents, each with its own rates, in one array operation instead of calling a decay function
+per emotion. New kinds of decay are added by subclassing DecayPolicy and registering the class with registerDecayPolicy(),
+which makes it available by name, see createDecayPolicy(). Like linearDecay and exponentialDecay, a policy has to give the
+same result for one long step as for many short ones to be used with lazy decay.
+
+Snapshots and journals save a policy as its settings (see DecayPolicy.getSettings), so only registered policies whose
+groups are strings, numbers or None can be saved.
+"""
+
+from typing import Hashable, Union
+
+from pymygdala.concepts import EMOTION_INDEX, EmotionType, NUM_EMOTIONS
+
+#The registered DecayPolicy classes by name.
+DECAY_POLICIES: dict[str, type] = {}
+
+def registerDecayPolicy(policyClass: type) -> type:
+    """
+    Registers a DecayPolicy subclass under its name, so createDecayPolicy() can create it. Can be used as a class decorator.
+
+    :param policyClass: The DecayPolicy subclass, with a unique name attribute.
+    :type policyClass: type
+
+    :return: The class.
+    :rtype: type
+    """
+    assert policyClass.name, 'Error: a decay policy needs a name to be registered'
+    DECAY_POLICIES[policyClass.name] = policyClass
+    return policyClass
+
+def createDecayPolicy(name: str, rate: float, emotionRates: Union[dict, None] = None) -> 'DecayPolicy':
+    """
+    Creates a registered decay policy by name, e.g. createDecayPolicy('exponential', 0.8, {'anger': 0.95}).
+
+    :param name: The name of the policy, e.g. 'exponential' or 'linear'.
+    :type name: str
+
+    See DecayPolicy for the other parameters.
+
+    :return: The new policy.
+    :rtype: DecayPolicy
+    """
+    policyClass = DECAY_POLICIES.get(name)
+    if policyClass is None:
+        raise ValueError('Error: unknown decay policy ' + str(name))
+    return policyClass(rate, emotionRates)
+
+def decayPolicyFromSettings(settings: dict) -> 'DecayPolicy':
+    """
+    Creates a decay policy from the settings of a saved one, see DecayPolicy.getSettings().
+    """
+    policy = createDecayPolicy(settings['policy'], settings['rate'])
+    policy.setSettings(settings)
+    return policy
+
+def checkSavedGroup(group: Hashable):
+    """
+    Raises a ValueError when a decay group cannot be saved in a snapshot or journal, i.e. it is not a string, a number or None.
+    """
+    if group is not None and not isinstance(group, (str, int, float)):
+        raise ValueError('Error: only decay groups that are strings, numbers or None can be saved, not ' + repr(group))
+
+class DecayPolicy:
+    """
+    The base class of decay policies, see the module documentation. Subclasses set name and implement decay().
+
+    :param rate: The default rate, of every emotion of every agent without a more specific rate.
+    :type rate: float
+
+    :param emotionRates: Rates per emotion, e.g. {'anger': 0.95}.
+    :type emotionRates: dict[EmotionType or str, float] or None
+    """
+    #The name the policy is registered under.
+    name = None
+
+    def __init__(self, rate: float, emotionRates: Union[dict, None] = None):
+        self.rate = rate
+        #The rates set with setRate(), keyed by (group, emotion index), None for all groups or all emotions.
+        self._rates: dict[tuple[Hashable, Union[int, None]], float] = {}
+        #The resolved rates of each emotion per group, see rates().
+        self._rows: dict[Hashable, tuple[float, ...]] = {}
+        #Incremented whenever a rate changes, so engines can tell when the rates they derived from the policy are out of date.
+        self.version = 0
+        if emotionRates:
+            for emotion, emotionRate in emotionRates.items():
+                self.setRate(emotionRate, emotion=emotion)
+
+    def decay(self, intensities, rates, deltaTime):
+        """
+        Decays intensities by their rates, with operations that work element-wise on NumPy arrays (of broadcastable shapes) as well as on floats.
+        Intensities that decay to zero or below are set to zero by the caller.
+
+        :param intensities: The intensities.
+        :type intensities: float or numpy.ndarray
+
+        :param rates: The rate of each intensity.
+        :type rates: float or numpy.ndarray
+
+        :param deltaTime: The time to decay for in seconds.
+        :type deltaTime: float or numpy.ndarray
+
+        :return: The decayed intensities.
+        :rtype: float or numpy.ndarray
+        """
+        raise NotImplementedError
+
+    def setRate(self, rate: float, group: Hashable = None, emotion: Union[EmotionType, str, None] = None):
+        """
+        Sets a rate. With lazy decay, agents that have not been settled since the last decay decay with the new rate for that time as well.
+
+        :param rate: The rate.
+        :type rate: float
+
+        :param group: The group the rate is for, all groups when omitted.
+        :type group: Hashable
+
+        :param emotion: The emotion the rate is for, all emotions when omitted.
+        :type emotion: EmotionType or str or None
+        """
+        if group is None and emotion is None:
+            self.rate = rate
+        else:
+            self._rates[group, None if emotion is None else EMOTION_INDEX[emotion]] = rate
+        self._rows.clear()
+        self.version += 1
+
+    def getRate(self, group: Hashable = None, emotion: Union[EmotionType, str, None] = None) -> float:
+        """
+        The rate an emotion of an agent in a group decays with, the default rate when emotion is omitted.
+        """
+        if emotion is None:
+            return self._rates.get((group, None), self.rate) if group is not None else self.rate
+        return self.rates(group)[EMOTION_INDEX[emotion]]
+
+    def rates(self, group: Hashable = None) -> tuple[float, ...]:
+        """
+        The rates of all emotions of the agents in a group, indexed like EMOTION_NAMES.
+
+        :param group: The group, None for agents that are not in a group.
+        :type group: Hashable
+
+        :return: The rate of each emotion.
+        :rtype: tuple[float, ...]
+        """
+        row = self._rows.get(group)
+        if row is None:
+            rates = self._rates
+            groupRate = rates.get((group, None)) if group is not None else None
+            row = []
+            for emotionIndex in range(NUM_EMOTIONS):
+                rate = rates.get((group, emotionIndex)) if group is not None else None
+                if rate is None:
+                    rate = groupRate if groupRate is not None else rates.get((None, emotionIndex), self.rate)
+                row.append(rate)
+            row = self._rows[group] = tuple(row)
+        return row
+
+    def decayIntensities(self, intensities, rates, deltaTime: float):
+        """
+        Decays fixed-index intensities (see EMOTION_NAMES) in place with the given rates, like concepts.decayIntensities(). Emotions that decay to zero or below are set to zero.
+
+        :param intensities: The intensity of each emotion.
+        :type intensities: list[float] or numpy.ndarray
+
+        :param rates: The rate of each emotion, a NumPy array when intensities is one.
+        :type rates: tuple[float, ...] or numpy.ndarray
+
+        :param deltaTime: The time to decay for in seconds.
+        :type deltaTime: float
+        """
+        if isinstance(intensities, list):
+            decay = self.decay
+            for i, intensity in enumerate(intensities):
+                if intensity > 0:
+                    intensity = decay(intensity, rates[i], deltaTime)
+                    intensities[i] = intensity if intensity > 0 else 0.0
+        else:
+            intensities[:] = self.decay(intensities, rates, deltaTime)
+            intensities[intensities < 0] = 0.0
+
+    def getSettings(self) -> dict:
+        """
+        The name and rates of the policy as JSON compatible values, which snapshots and journals save, see decayPolicyFromSettings().
+
+        :return: The settings.
+        :rtype: dict
+        """
+        if DECAY_POLICIES.get(self.name) is not type(self):
+            raise ValueError('Error: only decay policies registered with registerDecayPolicy can be saved')
+        rates = []
+        for (group, emotionIndex), rate in self._rates.items():
+            checkSavedGroup(group)
+            rates.append([group, emotionIndex, rate])
+        return {'policy': self.name, 'rate': self.rate, 'rates': rates}
+
+    def setSettings(self, settings: dict):
+        """
+        Replaces all rates of the policy with those of saved settings, see getSettings().
+        """
+        self.rate = settings['rate']
+        self._rates = {(group, emotionIndex): rate for group, emotionIndex, rate in settings['rates']}
+        self._rows.clear()
+        self.version += 1
+
+    def __repr__(self):
+        return '%s(%r, %d specific rates)' % (type(self).__name__, self.rate, len(self._rates))
+
+@registerDecayPolicy
+class ExponentialDecay(DecayPolicy):
+    """
+    Intensities are multiplied by their rate every second, like Gamygdala.exponentialDecay with the rate as decay factor. A rate of 1 means no decay.
+    """
+    name = 'exponential'
+
+    def decay(self, intensities, rates, deltaTime):
+        return intensities * rates ** deltaTime
+
+@registerDecayPolicy
+class LinearDecay(DecayPolicy):
+    """
+    Intensities decrease by their rate every second, like Gamygdala.linearDecay with the rate as decay factor. A rate of 0 means no decay.
+    """
+    name = 'linear'
+
+    def decay(self, intensities, rates, deltaTime):
+        return intensities - rates * deltaTime
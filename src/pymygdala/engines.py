@@ -2,10 +2,13 @@
 
 """
 
-from typing import Union
+from collections import deque
+from typing import Iterable, Union
 
 from pymygdala.agent import Agent
-from pymygdala.concepts import Goal, Relation, Belief, Emotion
+from pymygdala.archetypes import InstanceGoal
+from pymygdala.clock import WallClock
+from pymygdala.concepts import Goal, Relation, Belief, Emotion, EmotionType, EMOTION_NAMES, EMOTION_INDEX, NO_EMOTION, INTERNAL_EMOTIONS, SOCIAL_EMOTIONS, CAUSED_EMOTIONS, CAUSING_EMOTIONS, internalEmotionKey, socialEmotionKey
 import time
 import math
 
@@ -14,31 +17,174 @@ current_milli_time = lambda: int(round(time.time() * 1000))
 import threading
 import random
 
-def setInterval(func, sec, args=None):
-    def func_wrapper():
-        setInterval(func, sec, args)
-        if args is not None:
-            func()
-        else:
-            func(args)
-    t = threading.Timer(sec, func_wrapper)
-    t.start()
-    return t
+class DecayScheduler:
+    """
+    Calls decayAll() of a Gamygdala instance at a fixed interval, from one long lived daemon thread.
+    Ticks are scheduled on absolute deadlines, so the interval does not drift with the time decayAll() takes, and ticks that were missed (e.g. because appraisal held the lock) are skipped instead of piling up.
+    decayAll() holds the lock of the Gamygdala instance, so decay never runs in the middle of an appraisal.
+    Usually you do not create this yourself, but use Gamygdala.startDecay() and Gamygdala.stopDecay().
+
+    :param gamygdala: The engine to decay.
+    :type gamygdala: Gamygdala
+
+    :param timeMS: The interval between two decay ticks in milliseconds.
+    :type timeMS: float
+    """
+    def __init__(self, gamygdala: 'Gamygdala', timeMS: float):
+        self.gamygdala = gamygdala
+        self.timeMS = timeMS
+        self.ticks = 0
+        self.missedTicks = 0
+        self._thread = None
+        self._stopped = threading.Event()
+        self._unpaused = threading.Event()
+
+    @property
+    def isRunning(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopped.is_set()
+
+    @property
+    def isPaused(self) -> bool:
+        return self.isRunning and not self._unpaused.is_set()
+
+    def start(self):
+        """
+        Starts the decay thread, or resumes it when it is paused.
+        """
+        if self.isRunning:
+            self.resume()
+            return
+        self._stopped.clear()
+        self._unpaused.set()
+        #Only decay the time passed from now on, not the time since the last (manual) decayAll() call.
+        self.gamygdala.lastMillis = self.gamygdala.clock.now()
+        self._thread = threading.Thread(target=self._run, name='gamygdala-decay', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Union[float, None] = None):
+        """
+        Stops the decay thread and waits (at most timeout seconds) for it to finish.
+        """
+        self._stopped.set()
+        self._unpaused.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def pause(self):
+        """
+        Pauses decay, emotions keep their intensity until resume() is called.
+        """
+        self._unpaused.clear()
+
+    def resume(self):
+        """
+        Resumes a paused decay, the time spent paused is not decayed.
+        """
+        if not self._unpaused.is_set():
+            with self.gamygdala.lock:
+                self.gamygdala.lastMillis = self.gamygdala.clock.now()
+            self._unpaused.set()
+
+    def _run(self):
+        interval = self.timeMS / 1000.0
+        deadline = time.monotonic() + interval
+        while not self._stopped.is_set():
+            if not self._unpaused.is_set():
+                self._unpaused.wait()
+                deadline = time.monotonic() + interval
+                continue
+            if self._stopped.wait(max(0.0, deadline - time.monotonic())):
+                break
+            if not self._unpaused.is_set():
+                continue
+            self.gamygdala.decayAll()
+            self.ticks += 1
+            deadline += interval
+            now = time.monotonic()
+            if deadline < now:
+                #decayAll() decays according to the time passed, so skipped ticks are not lost, only merged into the next one.
+                missed = int((now - deadline) / interval) + 1
+                self.missedTicks += missed
+                deadline += missed * interval
+
+def _column(values) -> list:
+    #Turns a column given as a NumPy array into a list of Python scalars, which are much faster to work with one by one.
+    tolist = getattr(values, 'tolist', None)
+    return tolist() if tolist is not None else values
+
+def _drained(intensities, sent: list[float], epsilon: float) -> list[tuple[int, float]]:
+    #The intensities that changed by more than epsilon since they were sent (or dropped to zero), as (emotion index, intensity), and records them as sent.
+    intensities = _column(intensities)
+    changes = []
+    if intensities == sent:
+        #Most relations (and calm agents) have not changed at all.
+        return changes
+    for emotionIndex, intensity in enumerate(intensities):
+        last = sent[emotionIndex]
+        if intensity != last and (abs(intensity - last) > epsilon or intensity == 0):
+            sent[emotionIndex] = intensity
+            changes.append((emotionIndex, intensity))
+    return changes
 
 class Gamygdala:
     """
     This is the main appraisal engine class taking care of interpreting a situation emotionally.
     Typically you create one instance of this class and then register all agents (emotional entities) to it,
     as well as all goals.
+
+    :param clock: The clock decayAll() measures the time passed with, the wall clock when omitted. Use a clock.ManualClock and step() to simulate faster than real time.
+    :type clock: clock.WallClock or clock.ManualClock or None
     """
-    def __init__(self):
+    #The Agent class instantiated by createAgent().
+    agentClass = Agent
+
+    def __init__(self, clock=None):
         self.agents = []
+        self._agentsByName = {}
         self.goals = []
+        self._goalsByName = {}
+        #Reverse indices used by appraise(): goal name -> agents owning it, and target name -> agents holding a relation to it.
+        #The inner dicts are used as insertion ordered sets.
+        self._goalOwners: dict[str, dict[Agent, None]] = {}
+        self._relationHolders: dict[str, dict[Agent, None]] = {}
         self.decayFunction = self.exponentialDecay
         self.decayFactor = 0.8
-        self.lastMillis = current_milli_time()
+        #The decay.DecayPolicy used instead of decayFunction and decayFactor, see setDecayPolicy().
+        self.decayPolicy = None
+        self.clock = clock if clock is not None else WallClock()
+        self.lastMillis = self.clock.now()
         self.millisPassed = 0
+        #The total time (in milliseconds) decayed by decayAll() so far, and whether agents decay lazily up to it (see setLazyDecay).
+        self.decayTime = 0.0
+        self.lazyDecay = False
         self.debug = False
+        #Serializes appraisal against decay, which may run on the decay scheduler's thread.
+        self.lock = threading.RLock()
+        self.decayScheduler = None
+        #The state written by the last save() or read by load(), which an incremental save() builds on.
+        self._snapshot = None
+        #The snapshot._Restore that creates the emotions, goals and relations of the agents restored by load() when they are first used, None once all of them have been.
+        self._restore = None
+        #The journal.Journal recording the inputs of this engine, see startJournal().
+        self.journal = None
+        #The subscriptions.Subscription objects watching each agent, the watched agents whose emotions changed since they were last checked, and the events of subscriptions without a callback, see subscribe().
+        self._subscriptions: dict[Agent, list] = {}
+        self._touched: dict[Agent, None] = {}
+        #The watched agents with a subscription that decay can make fire (see Subscription.watchesDecay), the only ones checked after decay.
+        self._decayWatched: dict[Agent, None] = {}
+        self.events = deque()
+        #The interest.Interest limiting social emotions to interested observers, and per goal owner the events deferred for observers out of interest, see setInterest().
+        self.interest = None
+        self.maxDeferred = 64
+        self._deferred: dict[str, deque] = {}
+        #The values drainChanges() last reported per agent (its intensities, and per relation target the relation's), for the agents with a nonzero value among them, None until changes are first drained.
+        #Then also the id (index in self.agents) of every agent, the agents whose emotions changed since the last drain, and whether decay ran since then, see drainChanges().
+        self._sent: Union[dict[Agent, tuple[list[float], dict[str, list[float]]]], None] = None
+        self._agentIds: dict[Agent, int] = {}
+        self._changed: dict[Agent, None] = {}
+        self._decayedSinceDrain = False
 
     def createAgent(self, agentName: str) -> Agent:
         """
@@ -50,7 +196,7 @@ class Gamygdala:
         :return: An agent reference to the newly created agent
         :rtype: Agent
         """
-        temp=Agent(agentName)
+        temp=self.agentClass(agentName)
         self.registerAgent(temp)
         return temp
 
@@ -75,6 +221,8 @@ class Gamygdala:
         :return: - a goal reference to the newly created goal.
         :rtype: Goal or None
         """
+        if self.journal is not None:
+            self.journal.recordGoal(agentName, goalName, goalUtility, isMaintenanceGoal)
         tempAgent = self.getAgentByName(agentName)
         if tempAgent:
             tempGoal = self.getGoalByName(goalName)
@@ -85,12 +233,80 @@ class Gamygdala:
                 self.registerGoal(tempGoal)
             tempAgent.addGoal(tempGoal)
             if isMaintenanceGoal:
-                tempGoal.isMaintenanceGoal = isMaintenanceGoal
+                if isinstance(tempGoal, InstanceGoal):
+                    #The definition of the goal is shared by all agents of an archetype, see archetypes.GoalTemplate.
+                    if not tempGoal.maintenanceGoal:
+                        print("Warning: the goal ", goalName, " is defined by the archetype of its agent, so I cannot make it a maintenance goal.")
+                else:
+                    tempGoal.maintenanceGoal = isMaintenanceGoal
             return tempGoal
         else:
             print("Error: agent with name ", agentName ," does not exist, so I cannot add a create a goal for it.")
             return None
 
+    def spawnAgents(self, archetype: 'Archetype', count: int, names: Union[list[str], None] = None) -> list[Agent]:
+        """
+        Creates and registers many agents of an archetype (see the archetypes module) at once. The agents share the archetype's goal definitions and start with its gain and decay group.
+        Goals of their own (templates with {agent} in the name) are created and registered per agent, common goals once.
+
+        :param archetype: The archetype of the agents.
+        :type archetype: archetypes.Archetype
+
+        :param count: The number of agents.
+        :type count: int
+
+        :param names: The names of the agents, the archetype's name followed by the agent's index in self.agents when omitted.
+        :type names: list[str] or None
+
+        :return: The new agents.
+        :rtype: list[Agent]
+        """
+        with self.lock:
+            if names is None:
+                names = ['%s%d' % (archetype.name, i) for i in range(len(self.agents), len(self.agents) + count)]
+            assert len(names) == count, 'Error: spawnAgents needs a name for every agent'
+            if self.journal is not None and archetype.gain != 1:
+                raise ValueError('Error: the gain of spawned agents cannot be journaled')
+            commonGoals = []
+            for template in archetype.goals:
+                if template.isCommon:
+                    goal = self.getGoalByName(template.name)
+                    if goal is None:
+                        goal = Goal(template.name, template.utility, template.isMaintenanceGoal)
+                        self.registerGoal(goal)
+                    commonGoals.append(goal)
+            ownTemplates = [template for template in archetype.goals if not template.isCommon]
+            #Agents with only common goals share one goal list and index, see Agent.addGoal.
+            sharedGoals = sharedGoalsByName = None
+            if not ownTemplates:
+                sharedGoals = commonGoals
+                sharedGoalsByName = {}
+                for goal in commonGoals:
+                    sharedGoalsByName.setdefault(goal.name, goal)
+            agents = []
+            for name in names:
+                agent = self.agentClass(name)
+                agent.archetype = archetype
+                agent.gain = archetype.gain
+                agent.decayGroup = archetype.decayGroup
+                if sharedGoals is not None:
+                    agent.goals = sharedGoals
+                    agent._goalsByName = sharedGoalsByName
+                    agent._sharedGoals = True
+                else:
+                    for goal in commonGoals:
+                        agent.addGoal(goal)
+                    for template in ownTemplates:
+                        goal = InstanceGoal(template, name)
+                        self.registerGoal(goal)
+                        agent.addGoal(goal)
+                self.registerAgent(agent)
+                if self.journal is not None:
+                    for goal in agent.goals:
+                        self.journal.recordGoal(name, goal.name, goal.utility, goal.maintenanceGoal)
+                agents.append(agent)
+            return agents
+
     def createRelation(self, sourceName: str, targetName: str, relation: float):
         """
         A facilitator method to create a relation between two agents. Both source and target have to exist and be registered with this Gamygdala instance.
@@ -105,6 +321,8 @@ class Gamygdala:
         :param relation: The relation (between -1 and 1).
         :type relation: double
         """
+        if self.journal is not None:
+            self.journal.recordRelation(sourceName, targetName, relation)
         source=self.getAgentByName(sourceName)
         target=self.getAgentByName(targetName)
         if source and target and relation>=-1 and relation<=1:
@@ -146,6 +364,36 @@ class Gamygdala:
             self.agents[i].printEmotionalState(useGain)
             self.agents[i].printRelations(None)
 
+    def getPADStates(self, agents: Union[list[Agent], None] = None, useGain: bool = True):
+        """
+        Facilitator method returning the PAD state (see Agent.getPADState) of many agents at once, as one matrix multiply of their intensities by the shared PAD matrix.
+        This method requires NumPy.
+
+        :param agents: The agents to get the PAD state for, all registered agents when omitted.
+        :type agents: list[Agent] or None
+
+        :param useGain: Whether to apply each agent's gain limiter or not.
+        :type useGain: bool
+
+        :return: An (n, 3) array with one row of Pleasure, Arousal and Dominance per agent.
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+        from pymygdala.vectorized import PAD_MATRIX, applyGain
+        if agents is None:
+            agents = self.agents
+        intensities = np.zeros((len(agents), len(EMOTION_NAMES)))
+        gains = np.empty((len(agents), 1))
+        with self.lock:
+            for row, agent in enumerate(agents):
+                agent._settle()
+                intensities[row] = agent.intensities
+                gains[row] = agent.gain
+        PAD = intensities @ PAD_MATRIX
+        if useGain:
+            PAD = applyGain(PAD, gains)
+        return PAD
+
     def setGain(self, gain: float):
         """
         Facilitator to set the gain for the whole set of agents known to gamygdala.
@@ -154,6 +402,8 @@ class Gamygdala:
         :param gain: The gain value [0 and 20].
         :type gain: double
         """
+        if self.journal is not None:
+            self.journal.recordGain(gain)
         for i in range(len(self.agents)):
             self.agents[i].setGain(gain)
 
@@ -169,21 +419,330 @@ class Gamygdala:
         :param decayFunction: The decay function tobe used. choose between linearDecay or exponentialDecay (see the corresponding methods)
         :type decayFunction: callable
         """
+        if self.journal is not None:
+            self.journal.recordDecaySettings(decayFactor, decayFunction)
         self.decayFunction=decayFunction
         self.decayFactor=decayFactor
+        self.decayPolicy = None
+
+    def setDecayPolicy(self, policy: 'DecayPolicy'):
+        """
+        Decays emotions with a decay policy (see the decay module), e.g. decay.ExponentialDecay(0.8, {'anger': 0.95}), which has rates per agent group (see setDecayGroup) and per emotion, instead of the decay function and factor set with setDecay().
+        setDecay() switches back to a decay function. Only policies registered with decay.registerDecayPolicy() can be journaled or saved in snapshots.
 
-    def startDecay(self, timeMS: int):
+        :param policy: The decay policy.
+        :type policy: decay.DecayPolicy
         """
-        This starts the actual gamygdala decay process. It simply calls decayAll() at the specified interval.
+        with self.lock:
+            if self.journal is not None:
+                self.journal.recordDecayPolicy(policy)
+            #Pending lazy decay is applied with the rates it was due with.
+            self._settleAgents()
+            self.decayPolicy = policy
+
+    def setDecayGroup(self, agentName: str, group):
+        """
+        Puts an agent in a group of the decay policy (see setDecayPolicy), e.g. its archetype, so it decays with the rates of that group.
+
+        :param agentName: The name of the agent.
+        :type agentName: str
+
+        :param group: The group, None for the rates of agents without a group.
+        :type group: Hashable
+        """
+        with self.lock:
+            agent = self.getAgentByName(agentName)
+            if agent is not None:
+                if self.journal is not None:
+                    self.journal.recordDecayGroup(agentName, group)
+                agent._settle()
+                agent.decayGroup = group
+
+    def setLazyDecay(self, lazyDecay: bool):
+        """
+        Switches lazy decay on or off. With lazy decay, decayAll() only advances the engine's decay time, and each agent (and each of its relations) applies the decay it missed in one closed form step when it is next appraised or read (getEmotionalState, getPADState).
+        The result is the same as decaying all agents on every decayAll() call, but the cost is proportional to the agents that are active instead of to all agents, which suits large worlds where most agents are dormant.
+        Note that the internalState and Relation.emotionList attributes are only up to date after such a call. The decay function has to give the same result for one long step as for many short ones, which linearDecay and exponentialDecay do.
+
+        :param lazyDecay: Whether to decay lazily.
+        :type lazyDecay: bool
+        """
+        with self.lock:
+            if lazyDecay == self.lazyDecay:
+                return
+            if self.journal is not None:
+                self.journal.recordLazyDecay(lazyDecay)
+            if lazyDecay:
+                #All agents are up to date with eager decay.
+                self._markDecayed()
+                self.lazyDecay = True
+            else:
+                #Apply all pending decay before going back to eager decay.
+                self._settleAgents()
+                self.lazyDecay = False
+
+    def startDecay(self, timeMS: int) -> DecayScheduler:
+        """
+        This starts the actual gamygdala decay process. It simply calls decayAll() at the specified interval, from a single background thread (see DecayScheduler).
         The timeMS only defines the interval at which to decay, not the rate over time, that is defined by the decayFactor and function.
         For more complex games (e.g., games where agents are not active when far away from the player, or games that do not need all agents to decay all the time) you should yourself choose when to decay agents individually.
         To do so you can simply call the agent.decay() method (see the agent class).
+        Calling this again while decay is running only changes the interval, from the next tick on.
 
         :param timeMS: The "framerate" of the decay in milliseconds. 
         :type timeMS: int
+
+        :return: The scheduler, which can be used to pause and resume decay.
+        :rtype: DecayScheduler
         """
-        setInterval(self.decayAll, timeMS, self)
-    
+        if self.decayScheduler is None:
+            self.decayScheduler = DecayScheduler(self, timeMS)
+        elif self.decayScheduler.timeMS != timeMS:
+            #The running thread keeps its interval, so replace it.
+            self.decayScheduler.stop()
+            self.decayScheduler = DecayScheduler(self, timeMS)
+        self.decayScheduler.start()
+        return self.decayScheduler
+
+    def stopDecay(self):
+        """
+        Stops the decay process started with startDecay().
+        """
+        if self.decayScheduler is not None:
+            self.decayScheduler.stop()
+
+    def save(self, path: str, incremental: bool = False):
+        """
+        Saves the complete state of this engine (agents, goals, relations, emotional states and decay settings) to a columnar binary snapshot file, which load() restores exactly.
+        An incremental snapshot only holds the agents and goals that changed since the last save() or load(), and refers to that snapshot, so it is much smaller for large worlds where few agents are active.
+        See the snapshot module for the file format and what is not saved. This method requires NumPy.
+
+        :param path: The snapshot file to write, replaced when it exists.
+        :type path: str
+
+        :param incremental: Whether to save only what changed since the last save() or load() of this engine.
+        :type incremental: bool
+        """
+        from pymygdala.snapshot import saveSnapshot
+        with self.lock:
+            saveSnapshot(self, path, incremental)
+
+    @classmethod
+    def load(cls, path: str) -> 'Gamygdala':
+        """
+        Restores an engine saved with save(), as an instance of this class, e.g. ArrayGamygdala.load(path). This method requires NumPy.
+        The emotions, goals and relations of each agent are restored from the file when the agent is first used, so that large worlds load quickly.
+
+        :param path: The snapshot file, a full or an incremental one.
+        :type path: str
+
+        :return: The restored engine.
+        :rtype: Gamygdala
+        """
+        from pymygdala.snapshot import loadSnapshot
+        return loadSnapshot(path, cls)
+
+    def startJournal(self, path: str, bufferSize: int = 1 << 16) -> 'Journal':
+        """
+        Starts recording the inputs of this engine (beliefs, decay times, and agents, goals, relations and settings created with the facilitator methods) in an append-only binary journal.
+        journal.replayJournal() (or journal.JournalReplay) re-runs the journal deterministically, without waiting for the journaled decay times, e.g. to reproduce an emotional glitch or as a regression test.
+        When the engine already has agents or goals, they are saved with save() next to the journal first, which requires NumPy. See the journal module for what is journaled.
+        Interest management decides which observers feel social emotions outside the journaled inputs, so it cannot be journaled: stop it with setInterest(None) first.
+
+        :param path: The journal file, replaced when it exists.
+        :type path: str
+
+        :param bufferSize: The number of bytes of records to buffer before writing them to the file.
+        :type bufferSize: int
+
+        :return: The journal, which can be flushed to make all records so far readable.
+        :rtype: journal.Journal
+        """
+        from pymygdala.journal import Journal
+        with self.lock:
+            if self.interest is not None:
+                raise ValueError('Error: interest management cannot be journaled, call setInterest(None) first')
+            self.stopJournal()
+            self.journal = Journal(self, path, bufferSize)
+            return self.journal
+
+    def stopJournal(self):
+        """
+        Stops the journal started with startJournal(), writing its buffered records to the file.
+        """
+        if self.journal is not None:
+            self.journal.close()
+
+    def subscribe(self, subscription: 'Subscription') -> 'Subscription':
+        """
+        Adds a subscription (see the subscriptions module), e.g. subscriptions.ThresholdSubscription('guard', 'anger', 0.7, callback), which fires only when its value crosses its threshold or region.
+        The subscriptions of an agent are checked at the end of every appraisal that changed its emotions, and after every decay. A subscription whose value is in range when it is added does not fire until it exits.
+        Changes made directly to a Relation, or to intensities lists, are not noticed until the next appraisal or decay of the agent, or checkSubscriptions().
+
+        :param subscription: The subscription.
+        :type subscription: subscriptions.Subscription
+
+        :return: The subscription, to unsubscribe() it later.
+        :rtype: subscriptions.Subscription
+        """
+        with self.lock:
+            agent = self.getAgentByName(subscription.agentName)
+            if agent is None:
+                return None
+            agent._settle()
+            subscription.inside = subscription.isInside(subscription.value(agent), False)
+            self._subscriptions.setdefault(agent, []).append(subscription)
+            agent._watched = True
+            if subscription.watchesDecay:
+                self._decayWatched[agent] = None
+            return subscription
+
+    def unsubscribe(self, subscription: 'Subscription'):
+        """
+        Removes a subscription added with subscribe().
+        """
+        with self.lock:
+            agent = self._agentsByName.get(subscription.agentName)
+            subscriptions = self._subscriptions.get(agent)
+            if subscriptions is not None and subscription in subscriptions:
+                subscriptions.remove(subscription)
+                if not subscriptions:
+                    del self._subscriptions[agent]
+                    if self._sent is None:
+                        agent._watched = False
+                        self._touched.pop(agent, None)
+                if not any(subscription.watchesDecay for subscription in subscriptions):
+                    self._decayWatched.pop(agent, None)
+
+    def pollEvents(self) -> list['EmotionEvent']:
+        """
+        Takes the events of subscriptions without a callback that fired since the previous call.
+
+        :return: The events, oldest first.
+        :rtype: list[subscriptions.EmotionEvent]
+        """
+        with self.lock:
+            events = list(self.events)
+            self.events.clear()
+            return events
+
+    def checkSubscriptions(self, agentName: Union[str, None] = None):
+        """
+        Checks the subscriptions of an agent (all subscriptions when omitted) now, e.g. after changing a Relation directly.
+        """
+        with self.lock:
+            if agentName is None:
+                self._notify(list(self._subscriptions))
+            else:
+                agent = self._agentsByName.get(agentName)
+                if agent in self._subscriptions:
+                    self._notify((agent,))
+
+    def drainChanges(self, epsilon: float = 1e-3) -> tuple[list[tuple[int, int, float]], list[tuple[int, str, int, float]]]:
+        """
+        The emotions that changed since the previous call, as compact deltas for e.g. replicating emotions to game clients without resending every agent's state.
+        The engine tracks the agents whose emotions appraisal changed, and after decay the ones that had emotions, so a call only looks at those. The first call reports the whole state (every nonzero emotion) and starts the tracking.
+        An emotion is reported when it moved more than epsilon away from the value last reported for it, or dropped to zero, so values that are reported always end up exact within epsilon.
+        Changes made directly to a Relation, or to intensities lists, are only noticed once the agent is appraised again.
+
+        :param epsilon: The smallest change worth reporting.
+        :type epsilon: float
+
+        :return: The changed emotions of agents as (agent id, emotion index, intensity) and of relations as (agent id, target name, emotion index, intensity), where the agent id is the agent's index in self.agents and the emotion index its index in EMOTION_NAMES. Intensities are not gained.
+        :rtype: tuple[list[tuple[int, int, float]], list[tuple[int, str, int, float]]]
+        """
+        with self.lock:
+            if self._sent is None:
+                self._restoreAgents()
+                self._sent = {}
+                self._agentIds = {agent: i for i, agent in enumerate(self.agents)}
+                for agent in self.agents:
+                    agent._watched = True
+                candidates = self.agents
+            else:
+                #Also pick up agents changed outside appraisal (e.g. with updateEmotionalState), which are not checked yet.
+                self._changed.update(self._touched)
+                candidates = self._changed
+                if self._decayedSinceDrain:
+                    candidates = {**self._changed, **dict.fromkeys(self._sent)}
+            emotionChanges = []
+            relationChanges = []
+            for agent in candidates:
+                agent._settle()
+                agentId = self._agentIds[agent]
+                sent = self._sent.get(agent)
+                if sent is None:
+                    sent = ([0.0] * len(EMOTION_NAMES), {})
+                for emotionIndex, intensity in _drained(agent.intensities, sent[0], epsilon):
+                    emotionChanges.append((agentId, emotionIndex, intensity))
+                nonzero = any(sent[0])
+                for relation in agent.currentRelations:
+                    sentRelation = sent[1].get(relation.agentName)
+                    if sentRelation is None:
+                        sentRelation = sent[1][relation.agentName] = [0.0] * len(EMOTION_NAMES)
+                    for emotionIndex, intensity in _drained(relation.intensities, sentRelation, epsilon):
+                        relationChanges.append((agentId, relation.agentName, emotionIndex, intensity))
+                    nonzero = nonzero or any(sentRelation)
+                #Only agents with something reported can change by decay alone.
+                if nonzero:
+                    self._sent[agent] = sent
+                else:
+                    self._sent.pop(agent, None)
+            self._changed.clear()
+            self._decayedSinceDrain = False
+            emotionChanges.sort()
+            relationChanges.sort()
+            return emotionChanges, relationChanges
+
+    def setInterest(self, interest: Union['Interest', None], maxDeferred: int = 64):
+        """
+        Limits the social emotions (happy-for, pity, gloating, resentment, gratification and remorse) of events to the observers that are interested in the goal owner, see the interest module.
+        The social appraisals of observers that are not interested are deferred, and delivered when they are in interest of the owner again, see deliverDeferred().
+        The interest manager and the deferred appraisals are not part of snapshots or journals, so interest cannot be set while the engine is journaled (see startJournal()).
+
+        :param interest: The interest manager, e.g. interest.SpatialInterest or interest.GroupInterest, None to stop limiting (which delivers all deferred appraisals).
+        :type interest: interest.Interest or None
+
+        :param maxDeferred: The number of events to keep deferred per goal owner, the oldest are dropped beyond it. 0 drops the social emotions of observers out of interest.
+        :type maxDeferred: int
+        """
+        with self.lock:
+            if interest is not None and self.journal is not None:
+                raise ValueError('Error: interest management cannot be journaled, call stopJournal() first')
+            if self.interest is not None:
+                self.interest.gamygdala = None
+            self.interest = interest
+            self.maxDeferred = maxDeferred
+            if interest is not None:
+                interest.gamygdala = self
+            self.deliverDeferred()
+
+    def deliverDeferred(self, agentName: Union[str, None] = None):
+        """
+        Evaluates the deferred social appraisals of the observers that are interested in the goal owner now (see setInterest), in the order the events happened, with the observers' current relations to the owner.
+        Interest managers call this when an agent moves or changes group, call it yourself after changes an interest.PredicateInterest cannot see.
+        Observers that got a relation to the owner after an event also receive it.
+
+        :param agentName: Only deliver the appraisals of events of this agent's goals and of events this agent observes, all when omitted.
+        :type agentName: str or None
+        """
+        with self.lock:
+            if not self._deferred:
+                return
+            if agentName is None:
+                for ownerName in list(self._deferred):
+                    self._deliverDeferred(ownerName)
+            else:
+                if agentName in self._deferred:
+                    self._deliverDeferred(agentName)
+                observer = self._agentsByName.get(agentName)
+                if observer is not None:
+                    for relation in observer.currentRelations:
+                        if relation.agentName in self._deferred:
+                            self._deliverDeferred(relation.agentName, observer)
+            if self._touched:
+                self._notify(self._touched)
+
     #////////////////////////////////////////////////////////
     #//Below this is more detailed gamygdala stuff to use it more flexibly.
     #////////////////////////////////////////////////////////
@@ -197,7 +756,25 @@ class Gamygdala:
         :type agent: Agent
         """
         self.agents.append(agent)
+        #Like the old linear scan, the first agent registered under a name is the one found by name.
+        self._agentsByName.setdefault(agent.name, agent)
         agent.gamygdalaInstance = self
+        #A new agent owes no decay.
+        agent.lastDecayTime = self.decayTime
+        for relation in agent.currentRelations:
+            relation.lastDecayTime = self.decayTime
+        for goalName in agent._goalsByName:
+            self._indexGoal(agent, goalName)
+        for targetName in agent._relationsByName:
+            self._indexRelation(agent, targetName)
+        if self.journal is not None:
+            self.journal.recordAgent(agent.name)
+            if agent.decayGroup is not None:
+                self.journal.recordDecayGroup(agent.name, agent.decayGroup)
+        if self._sent is not None:
+            self._agentIds[agent] = len(self.agents) - 1
+            agent._watched = True
+            self._changed[agent] = None
 
     def getAgentByName(self, agentName: str) -> Union[Agent, None]:
         """
@@ -209,11 +786,10 @@ class Gamygdala:
         :return: None or an agent reference that has the name property equal to the agentName argument
         :rtype: Agent or None
         """
-        for i in range(len(self.agents)):
-            if self.agents[i].name == agentName:
-                return self.agents[i]
-        print('Warning: agent ', agentName, ' not found')
-        return None
+        agent = self._agentsByName.get(agentName)
+        if agent is None:
+            print('Warning: agent ', agentName, ' not found')
+        return agent
 
     def registerGoal(self, goal: Goal):
         """
@@ -223,8 +799,9 @@ class Gamygdala:
         :param goal: The goal to be registered.
         :type goal: Goal
         """
-        if self.getGoalByName(goal.name) == None:
+        if goal.name not in self._goalsByName:
             self.goals.append(goal)
+            self._goalsByName[goal.name] = goal
         else:
             print("Warning: failed adding a second goal with the same name: ", goal.name)
 
@@ -238,10 +815,7 @@ class Gamygdala:
         :return: None or a goal reference that has the name property equal to the goalName argument
         :rtype: Goal
         """
-        for i in range(len(self.goals)):
-            if self.goals[i].name == goalName:
-                return self.goals[i]
-        return None
+        return self._goalsByName.get(goalName)
 
     def appraise(self, belief: Belief, affectedAgent: Union[Agent, None] = None) -> bool:
         """
@@ -260,100 +834,350 @@ class Gamygdala:
         :return:
         :rtype: bool
         """
-        if affectedAgent is None:
-            #check all
-            if self.debug:
-                print(belief)
+        with self.lock:
+            if affectedAgent is None:
+                #check all
+                if self.debug:
+                    print(belief)
             
-            if not (len(belief.goalCongruences) == len(belief.affectedGoalNames)):
-                print("Error: the congruence list was not of the same length as the affected goal list")
-                return False #The congruence list must be of the same length as the affected goals list.
+                if not (len(belief.goalCongruences) == len(belief.affectedGoalNames)):
+                    print("Error: the congruence list was not of the same length as the affected goal list")
+                    return False #The congruence list must be of the same length as the affected goals list.
             
-            if len(self.goals) == 0:
+                if len(self.goals) == 0:
+                    print("Warning: no goals registered to Gamygdala, all goals to be considered in appraisal need to be registered.")
+                    return False #The congruence list must be of the same length as the affected goals list.
+
+                if self.journal is not None:
+                    self.journal.recordAppraisal(belief.likelihood, belief.causalAgentName, belief.affectedGoalNames, belief.goalCongruences, belief.isIncremental)
+                for i in range( len(belief.affectedGoalNames) ):
+                    #Loop through every goal in the list of affected goals by self event.
+                    currentGoal=self.getGoalByName(belief.affectedGoalNames[i])
+                    if not (currentGoal==None):
+                        #the goal exists, appraise it for all its owners
+                        self._appraiseGoal(currentGoal, belief.goalCongruences[i], belief.likelihood, belief.isIncremental, belief.causalAgentName, self._goalOwners.get(currentGoal.name, ()))
+            else:
+                #check only affectedAgent (which can be much faster) and does not involve checks
+                if self.journal is not None:
+                    self.journal.recordAppraisal(belief.likelihood, belief.causalAgentName, belief.affectedGoalNames, belief.goalCongruences, belief.isIncremental, affectedAgent)
+                for i in range(len(belief.affectedGoalNames)):
+                    #Loop through every goal in the list of affected goals by self event.
+                    currentGoal=affectedAgent.getGoalByName(belief.affectedGoalNames[i])
+                    #assume affectedAgent is the only owner to be considered in self appraisal round.
+                    self._appraiseGoal(currentGoal, belief.goalCongruences[i], belief.likelihood, belief.isIncremental, belief.causalAgentName, (affectedAgent,))
+            if self._touched:
+                self._notify(self._touched)
+            #print the emotions to the console for debugging
+            if self.debug:
+                self.printAllEmotions(True)
+
+    def appraiseBatch(self, beliefs, affectedAgent: Union[Agent, None] = None) -> list[Union[list[float], None]]:
+        """
+        Appraises many beliefs in one call, with the same result as calling appraise() for each of them in order.
+        Goals (and their owners) are looked up once per distinct affected goal in the batch instead of once per belief, and the per call checks and debug output of appraise() are done once.
+
+        :param beliefs: The events to be appraised, in the order they happened.
+        :type beliefs: Iterable[Belief]
+
+        :param affectedAgent: If given, the only goal owner to appraise the beliefs for (see appraise()).
+        :type affectedAgent: Agent
+
+        :return: For every belief, the change in likelihood of each of its affected goals (None for goals that are not known), or None if the belief is malformed.
+        :rtype: list[list[float] or None]
+        """
+        with self.lock:
+            if affectedAgent is None and len(self.goals) == 0:
                 print("Warning: no goals registered to Gamygdala, all goals to be considered in appraisal need to be registered.")
-                return False #The congruence list must be of the same length as the affected goals list.
-
-            for i in range( len(belief.affectedGoalNames) ):
-                #Loop through every goal in the list of affected goals by self event.
-                currentGoal=self.getGoalByName(belief.affectedGoalNames[i])
-                if not (currentGoal==None):
-                    #the goal exists, appraise it
-                    utility = currentGoal.utility
-                    deltaLikelihood = self._calculateDeltaLikelihood(currentGoal, belief.goalCongruences[i], belief.likelihood, belief.isIncremental)
-                    desirability = belief.goalCongruences[i] * utility
-                    if self.debug:
-                        print('Evaluated goal: ', currentGoal.name, '(', utility, ', ', deltaLikelihood, ')')	
-
-                    #now find the owners, and update their emotional states
-                    for j in range(len(self.agents)):
-                        if self.agents[j].hasGoal(currentGoal.name):
-                            owner=self.agents[j]
-                            if self.debug:
-                                print('....owned by ', owner.name)
-                            self._evaluateInternalEmotion(utility, deltaLikelihood, currentGoal.likelihood, owner)  
-                            self._agentActions(owner.name, belief.causalAgentName, owner.name, desirability, utility, deltaLikelihood) 
-                            #now check if anyone has a relation to self goal owner, and update the social emotions accordingly.
-                            for k in range(len(self.agents)):
-                                relation=self.agents[k].getRelation(owner.name)
-                                if not (relation==None):
-                                    if self.debug:
-                                        print(self.agents[k].name, ' has a relationship with ', owner.name)
-                                        print(relation)
-                                    #The agent has relationship with the goal owner which has nonzero utility, add relational effects to the relations for agent[k]. 
-                                    self._evaluateSocialEmotion(utility, desirability, deltaLikelihood, relation, self.agents[k])
-                                    #also add remorse and gratification if conditions are met within (i.e., agent[k] did something bad/good for owner)
-                                    self._agentActions(owner.name, belief.causalAgentName, self.agents[k].name, desirability, utility, deltaLikelihood)
-                                else:
-                                    if self.debug:
-                                        print(self.agents[k].name, ' has NO relationship with ', owner.name)
-        else:
-            #check only affectedAgent (which can be much faster) and does not involve console output nor checks
-            for i in range(len(belief.affectedGoalNames)):
-                #Loop through every goal in the list of affected goals by self event.
-                currentGoal=affectedAgent.getGoalByName(belief.affectedGoalNames[i])
-                utility = currentGoal.utility
-                deltaLikelihood = self._calculateDeltaLikelihood(currentGoal, belief.goalCongruences[i], belief.likelihood, belief.isIncremental)
-                desirability = belief.goalCongruences[i] * utility
-                #assume affectedAgent is the only owner to be considered in self appraisal round.
-                owner=affectedAgent
-                self._evaluateInternalEmotion(utility, deltaLikelihood, currentGoal.likelihood, owner)  
-                self._agentActions(owner.name, belief.causalAgentName, owner.name, desirability, utility, deltaLikelihood) 
-                #now check if anyone has a relation to self goal owner, and update the social emotions accordingly.
-                for k in range(len(self.agents)):
-                    relation=self.agents[k].getRelation(owner.name)
-                    if relation is not None:
-                        if self.debug:
-                            print(self.agents[k].name, ' has a relationship with ', owner.name)
-                            print(relation)
-                        #The agent has relationship with the goal owner which has nonzero utility, add relational effects to the relations for agent[k]. 
-                        self._evaluateSocialEmotion(utility, desirability, deltaLikelihood, relation, self.agents[k])
-                        #also add remorse and gratification if conditions are met within (i.e., agent[k] did something bad/good for owner)
-                        self._agentActions(owner.name, belief.causalAgentName, self.agents[k].name, desirability, utility, deltaLikelihood) 
+                return [None for belief in beliefs]
+            resolved = {}
+            deltas = []
+            for belief in beliefs:
+                if not (len(belief.goalCongruences) == len(belief.affectedGoalNames)):
+                    print("Error: the congruence list was not of the same length as the affected goal list")
+                    deltas.append(None)
+                    continue
+                if self.journal is not None:
+                    self.journal.recordAppraisal(belief.likelihood, belief.causalAgentName, belief.affectedGoalNames, belief.goalCongruences, belief.isIncremental, affectedAgent)
+                beliefDeltas = []
+                for goalName, congruence in zip(belief.affectedGoalNames, belief.goalCongruences):
+                    goalAndOwners = resolved.get(goalName)
+                    if goalAndOwners is None:
+                        goalAndOwners = resolved[goalName] = self._resolveGoal(goalName, affectedAgent)
+                    goal, owners = goalAndOwners
+                    if goal is None:
+                        beliefDeltas.append(None)
                     else:
-                        if self.debug:
-                            print(self.agents[k].name, ' has NO relationship with ', owner.name)
-        #print the emotions to the console for debugging
-        if self.debug:
-            self.printAllEmotions(True)
+                        beliefDeltas.append(self._appraiseGoal(goal, congruence, belief.likelihood, belief.isIncremental, belief.causalAgentName, owners))
+                deltas.append(beliefDeltas)
+            if self._touched:
+                self._notify(self._touched)
+            if self.debug:
+                self.printAllEmotions(True)
+            return deltas
 
-    def decayAll(self):
+    def appraiseColumns(self, likelihoods, causalAgentNames, goalNames, goalCongruences, isIncremental = True) -> list[Union[float, None]]:
+        """
+        Columnar variant of appraiseBatch(), for beliefs that each affect a single goal. Row i of the columns is the belief Belief(likelihoods[i], causalAgentNames[i], [goalNames[i]], [goalCongruences[i]], isIncremental[i]).
+        The columns can be lists or NumPy arrays, and no Belief objects are created. Columns of different lengths are an error, and then nothing is appraised.
+
+        :param likelihoods: The likelihood of each belief.
+        :type likelihoods: Sequence[float]
+
+        :param causalAgentNames: The causal agent's name of each belief.
+        :type causalAgentNames: Sequence[str]
+
+        :param goalNames: The name of the goal affected by each belief.
+        :type goalNames: Sequence[str]
+
+        :param goalCongruences: The congruence of each belief with its goal.
+        :type goalCongruences: Sequence[float]
+
+        :param isIncremental: Whether each belief is incremental, or one flag (e.g. a bool or numpy.bool_) for all of them.
+        :type isIncremental: bool or Sequence[bool]
+
+        :return: The change in likelihood of the affected goal of each belief (None for goals that are not known, and for every belief when the columns have different lengths).
+        :rtype: list[float or None]
+        """
+        with self.lock:
+            if not hasattr(isIncremental, '__len__') or getattr(isIncremental, 'ndim', 1) == 0:
+                #One flag for all beliefs, including NumPy scalars and 0-d arrays.
+                isIncremental = [bool(isIncremental)] * len(goalNames)
+            if not (len(likelihoods) == len(causalAgentNames) == len(goalNames) == len(goalCongruences) == len(isIncremental)):
+                print("Error: the likelihood, causal agent, goal, congruence and isIncremental columns were not of the same length")
+                return [None] * len(goalNames) #Every column must have a value for every belief.
+            if len(self.goals) == 0:
+                print("Warning: no goals registered to Gamygdala, all goals to be considered in appraisal need to be registered.")
+                return [None] * len(goalNames)
+            resolved = {}
+            deltas = []
+            for likelihood, causalAgentName, goalName, congruence, incremental in zip(_column(likelihoods), _column(causalAgentNames), _column(goalNames), _column(goalCongruences), _column(isIncremental)):
+                if self.journal is not None:
+                    self.journal.recordAppraisal(likelihood, causalAgentName, (goalName,), (congruence,), incremental)
+                goalAndOwners = resolved.get(goalName)
+                if goalAndOwners is None:
+                    goalAndOwners = resolved[goalName] = self._resolveGoal(goalName)
+                goal, owners = goalAndOwners
+                if goal is None:
+                    deltas.append(None)
+                else:
+                    deltas.append(self._appraiseGoal(goal, congruence, likelihood, incremental, causalAgentName, owners))
+            if self._touched:
+                self._notify(self._touched)
+            if self.debug:
+                self.printAllEmotions(True)
+            return deltas
+
+    def decayAll(self, millisPassed: Union[float, None] = None):
         """
         This method decays for all registered agents the emotional state and relations. It performs the decay according to the time passed, so longer intervals between consecutive calls result in bigger clunky steps.
         Typically this is called automatically when you use startDecay(), but you can use it yourself if you want to manage the timing.
         This function is keeping track of the millis passed since the last call, and will (try to) keep the decay close to the desired decay factor, regardless the time passed
         So you can call this any time you want (or, e.g., have the game loop call it, or have e.g., Phaser call it in the plugin update, which is default now).
         Further, if you want to tweak the emotional intensity decay of individual agents, you should tweak the decayFactor per agent not the "frame rate" of the decay (as this doesn't change the rate).
+
+        :param millisPassed: The time to decay for in milliseconds, if you keep time yourself (e.g. with the clock of an event loop). When omitted, the time passed on the engine's clock since the last call is used.
+        :type millisPassed: float
         """
-        self.millisPassed=current_milli_time()-self.lastMillis
-        self.lastMillis=current_milli_time()
-        for i in range(len(self.agents)):
-            self.agents[i].decay(self)
+        with self.lock:
+            now = self.clock.now()
+            if millisPassed is None:
+                millisPassed = now - self.lastMillis
+            if self.journal is not None:
+                self.journal.recordDecay(millisPassed)
+            self.millisPassed=millisPassed
+            self.lastMillis=now
+            self.decayTime += millisPassed
+            if not self.lazyDecay:
+                self._decayAgents(millisPassed / 1000)
+            if self._sent is not None:
+                self._decayedSinceDrain = True
+            if self._decayWatched:
+                self._notify(list(self._decayWatched))
+
+    def step(self, millis: float):
+        """
+        Advances the simulation by a fixed time step: the clock is advanced by millis when it can be (see clock.ManualClock), and all agents decay by millis, whatever the wall clock says.
+        With a ManualClock, a headless simulation (e.g. a training episode) can call this instead of sleeping, to run as fast as appraisal allows with results that only depend on the steps taken.
+
+        :param millis: The time step in milliseconds.
+        :type millis: float
+        """
+        with self.lock:
+            advance = getattr(self.clock, 'advance', None)
+            if advance is not None:
+                advance(millis)
+            self.decayAll(millis)
+
+    def setClock(self, clock):
+        """
+        Replaces the clock decayAll() measures the time passed with, the time until now is not decayed.
+
+        :param clock: The new clock, e.g. a clock.ManualClock.
+        :type clock: clock.WallClock or clock.ManualClock
+        """
+        with self.lock:
+            self.clock = clock
+            self.lastMillis = clock.now()
 
 
     #////////////////////////////////////////////////////////
     #//Below this is internal gamygdala stuff not to be used publicly (i.e., never call these methods).
     #////////////////////////////////////////////////////////
     
+    def _decayAgents(self, deltaTime: float):
+        #Decays all agents by deltaTime seconds, called by decayAll() with the lock held.
+        self._restoreAgents()
+        policy = self.decayPolicy
+        if policy is not None:
+            for agent in self.agents:
+                agent._decayByPolicy(policy, deltaTime)
+            return
+        for i in range(len(self.agents)):
+            self.agents[i].decay(self.decayFunction, deltaTime)
+
+    def _settleAgents(self):
+        #With lazy decay, brings all agents up to date with self.decayTime.
+        if self.lazyDecay:
+            self._restoreAgents()
+            for agent in self.agents:
+                agent._settle()
+
+    def _markDecayed(self):
+        #Marks all agents and relations as decayed up to self.decayTime.
+        self._restoreAgents()
+        for agent in self.agents:
+            agent.lastDecayTime = self.decayTime
+            for relation in agent.currentRelations:
+                relation.lastDecayTime = self.decayTime
+
+    def _restoreAgents(self):
+        #Before going through the relations of all agents: restoring the agents of a loaded snapshot that were not used yet in one go is much cheaper than one by one.
+        if self._restore is not None:
+            self._restore.restoreAll()
+
+    def _indexGoal(self, agent: Agent, goalName: str):
+        #Called by Agent.addGoal (and registerAgent) to keep the goal -> owners index current.
+        self._goalOwners.setdefault(goalName, {})[agent] = None
+
+    def _unindexGoal(self, agent: Agent, goalName: str):
+        #Called by Agent.removeGoal once the agent no longer owns any goal with that name.
+        owners = self._goalOwners.get(goalName)
+        if owners is not None:
+            owners.pop(agent, None)
+            if not owners:
+                del self._goalOwners[goalName]
+
+    def _indexRelation(self, agent: Agent, targetName: str):
+        #Called by Agent.updateRelation (and registerAgent) when the agent gets a relation to targetName.
+        self._relationHolders.setdefault(targetName, {})[agent] = None
+
+    def _resolveGoal(self, goalName: str, affectedAgent: Union[Agent, None] = None) -> tuple[Union[Goal, None], tuple[Agent, ...]]:
+        #Finds the goal with the given name and the agents owning it, the way appraise() does.
+        if affectedAgent is not None:
+            return affectedAgent.getGoalByName(goalName), (affectedAgent,)
+        return self.getGoalByName(goalName), tuple(self._goalOwners.get(goalName, ()))
+
+    def _appraiseGoal(self, goal: Goal, congruence: float, likelihood: float, isIncremental: bool, causalAgentName: str, owners: Iterable[Agent]) -> float:
+        #Appraises the effect of one belief on one goal for all given owners of the goal (and everyone with a relation to them), returns the change in the goal's likelihood.
+        utility = goal.utility
+        deltaLikelihood = self._calculateDeltaLikelihood(goal, congruence, likelihood, isIncremental)
+        desirability = congruence * utility
+        if self.debug:
+            print('Evaluated goal: ', goal.name, '(', utility, ', ', deltaLikelihood, ')')
+
+        #now update the emotional states of the owners
+        for owner in owners:
+            if self.debug:
+                print('....owned by ', owner.name)
+            owner._settle()
+            self._evaluateInternalEmotion(utility, deltaLikelihood, goal.likelihood, owner)
+            self._agentActions(owner.name, causalAgentName, owner.name, desirability, utility, deltaLikelihood)
+            #now check if anyone has a relation to self goal owner, and update the social emotions accordingly.
+            self._evaluateObservers(owner.name, causalAgentName, desirability, utility, deltaLikelihood)
+        return deltaLikelihood
+
+    def _evaluateObservers(self, ownerName: str, causalAgentName: str, desirability: float, utility: float, deltaLikelihood: float):
+        #Adds the social emotions of every agent that has a relation to the goal owner (who may live elsewhere, see sharding), using the relation index instead of scanning all agents.
+        #The index is iterated without copying it, appraisal only ever creates relations to the causal agent, never to the owner (see _agentActions).
+        interest = self.interest
+        if interest is None:
+            for observer in self._relationHolders.get(ownerName, ()):
+                observer._settle()
+                self._evaluateObserver(observer, observer.getRelation(ownerName), ownerName, causalAgentName, desirability, utility, deltaLikelihood)
+            return
+        holders = self._relationHolders.get(ownerName)
+        if not holders:
+            return
+        observers = interest.observers(ownerName, holders)
+        for observer in observers:
+            observer._settle()
+            self._evaluateObserver(observer, observer.getRelation(ownerName), ownerName, causalAgentName, desirability, utility, deltaLikelihood)
+        if self.maxDeferred > 0 and len(observers) < len(holders):
+            #Logged once per event for the owner, with the observers it reached, rather than once per observer out of interest.
+            log = self._deferred.get(ownerName)
+            if log is None:
+                log = self._deferred[ownerName] = deque(maxlen=self.maxDeferred)
+            log.append(((causalAgentName, desirability, utility, deltaLikelihood), {observer.name for observer in observers}))
+
+    def _evaluateObserver(self, observer: Agent, relation: Relation, ownerName: str, causalAgentName: str, desirability: float, utility: float, deltaLikelihood: float):
+        if self.debug:
+            print(observer.name, ' has a relationship with ', ownerName)
+            print(relation)
+        #The agent has relationship with the goal owner which has nonzero utility, add relational effects to the relations for the observer.
+        self._evaluateSocialEmotion(utility, desirability, deltaLikelihood, relation, observer)
+        #also add remorse and gratification if conditions are met within (i.e., the observer did something bad/good for owner)
+        self._agentActions(ownerName, causalAgentName, observer.name, desirability, utility, deltaLikelihood)
+
+    def _notify(self, agents: Iterable[Agent]):
+        #Checks the subscriptions of the given agents and fires the ones whose value crossed, after all of them are checked, so callbacks see the state after the whole change.
+        #The changed agents are kept for drainChanges() before they are forgotten.
+        if self._sent is not None:
+            self._changed.update(self._touched)
+        events = []
+        for agent in agents:
+            subscriptions = self._subscriptions.get(agent)
+            if subscriptions is not None:
+                agent._settle()
+                watchesDecay = False
+                for subscription in subscriptions:
+                    event = subscription.check(agent)
+                    if event is not None:
+                        events.append(event)
+                    watchesDecay = watchesDecay or subscription.watchesDecay
+                if watchesDecay:
+                    self._decayWatched[agent] = None
+                else:
+                    self._decayWatched.pop(agent, None)
+        self._touched.clear()
+        for event in events:
+            callback = event.subscription.callback
+            if callback is not None:
+                callback(event)
+            else:
+                self.events.append(event)
+
+    def _deliverDeferred(self, ownerName: str, observer: Union[Agent, None] = None):
+        #Delivers the deferred events of one goal owner to one observer, or to all observers interested in the owner now, and forgets the events that reached all observers.
+        holders = self._relationHolders.get(ownerName, {})
+        interest = self.interest
+        if observer is None:
+            candidates = list(holders) if interest is None else interest.observers(ownerName, holders)
+        else:
+            candidates = (observer,) if interest is None or interest.isInterested(observer.name, ownerName) else ()
+        log = self._deferred[ownerName]
+        if candidates:
+            for event, reached in log:
+                for candidate in candidates:
+                    if candidate.name not in reached:
+                        reached.add(candidate.name)
+                        candidate._settle()
+                        self._evaluateObserver(candidate, candidate.getRelation(ownerName), ownerName, *event)
+        waiting = [entry for entry in log if len(entry[1]) < len(holders)]
+        if waiting:
+            self._deferred[ownerName] = deque(waiting, maxlen=self.maxDeferred)
+        else:
+            del self._deferred[ownerName]
+
     def _calculateDeltaLikelihood(self, goal: Goal, congruence: float, likelihood: float, isIncremental: bool) -> float:
         #Defines the change in a goal's likelihood due to the congruence and likelihood of a current event.
         #We cope with two types of beliefs: incremental and absolute beliefs. Incrementals have their likelihood added to the goal, absolute define the current likelihood of the goal
@@ -368,7 +1192,11 @@ class Gamygdala:
         else:
             if isIncremental:
                 newLikelihood = oldLikelihood + likelihood * congruence
-                newLikelihood= max(min(newLikelihood, 1.0), -1.0)
+                #Clamped with comparisons rather than max(min()), which allocates an argument iterator per call.
+                if newLikelihood > 1.0:
+                    newLikelihood = 1.0
+                elif newLikelihood < -1.0:
+                    newLikelihood = -1.0
             else:
                 newLikelihood = (congruence * likelihood + 1.0) / 2.0
         goal.likelihood = newLikelihood
@@ -379,47 +1207,15 @@ class Gamygdala:
 
     def _evaluateInternalEmotion(self, utility: float, deltaLikelihood: float, likelihood: float, agent: Agent):
         #This method evaluates the event in terms of internal emotions that do not need relations to exist, such as hope, fear, etc..
-        positive = False
-        intensity = 0
-        emotion = []
-        if utility >= 0:
-            if deltaLikelihood >= 0:
-                positive = True
-            else:
-                positive = False
-        elif utility < 0:
-            if deltaLikelihood >= 0:
-                positive = False
-            else:
-                positive = True
-
-        if likelihood > 0 and likelihood < 1:
-            if positive:
-                emotion.append('hope')   
-            else:
-                emotion.append('fear')
-        elif likelihood == 1:
-            if utility >= 0:
-                if deltaLikelihood < 0.5:
-                    emotion.append('satisfaction')
-                emotion.append('joy')
-            else:
-                if deltaLikelihood <0.5:
-                    emotion.append('fear-confirmed')
-                emotion.append('distress')
-        elif likelihood == 0:
-            if utility >= 0:
-                if deltaLikelihood > 0.5:
-                    emotion.append('disappointment')
-                emotion.append('distress')
-            else:
-                if (deltaLikelihood > 0.5):
-                    emotion.append('relief')
-                emotion.append('joy')
+        #The emotions are looked up in the compiled rule table (see concepts.INTERNAL_EMOTIONS), and their intensities are added to the agent's state directly (see Agent.addIntensity), so no Emotion objects are created.
         intensity = abs(utility * deltaLikelihood)
-        if not (intensity == 0):
-            for i in range(len(emotion)):
-                agent.updateEmotionalState(Emotion(emotion[i], intensity))
+        if intensity == 0:
+            return
+        emotion, confirmation = INTERNAL_EMOTIONS[internalEmotionKey(utility, deltaLikelihood, likelihood)]
+        if emotion != NO_EMOTION:
+            agent.addIntensity(emotion, intensity)
+        if confirmation != NO_EMOTION:
+            agent.addIntensity(confirmation, intensity)
 
     def _agentActions(self, affectedName: str, causalName: str, selfName: str, desirability: float, utility: float, deltaLikelihood: float):
         if causalName is not None and causalName != '':
@@ -428,45 +1224,32 @@ class Gamygdala:
             #The affected agent is SELF and causal agent is other.
             #The affected agent is SELF and causal agent is SELF.
             #The affected agent is OTHER and causal agent is SELF.
-            emotion = Emotion("", 0.0)
             relation = None
             if affectedName == selfName and selfName != causalName:
                 #Case one 
-                if desirability >= 0:
-                    emotion.name = 'gratitude'
-                else:
-                    emotion.name = 'anger'
+                emotion = CAUSED_EMOTIONS[int(desirability >= 0)]
+                intensity = abs(utility * deltaLikelihood)
 
-                emotion.intensity = abs(utility * deltaLikelihood)
                 agent = self.getAgentByName(selfName)
-                if agent.hasRelationWith(causalName):
-                    relation = agent.getRelation(causalName)          
-                else:
+                relation = agent.getRelation(causalName)
+                if relation is None:
                     agent.updateRelation(causalName, 0.0)
                     relation = agent.getRelation(causalName) 
-                relation.addEmotion(emotion)
-                agent.updateEmotionalState(emotion)  #also add relation emotion the emotion to the emotional state
+                relation.addIntensity(emotion, intensity)
+                agent.addIntensity(emotion, intensity)  #also add relation emotion the emotion to the emotional state
             
             if affectedName == selfName and selfName == causalName:
                 #Case two
                 pass #GAMYDALA DONT SUPPORT AUTORELATION
             if affectedName != selfName and causalName == selfName:
                 #Case three
-                relation = None
-                if self.getAgentByName(causalName).hasRelationWith(affectedName):
-                    relation = self.getAgentByName(causalName).getRelation(affectedName)   
-                    if  desirability >= 0:
-                        if relation.like >= 0:
-                            emotion.name = 'gratification'
-                            emotion.intensity = abs(utility * deltaLikelihood * relation.like)
-                            relation.addEmotion(emotion)
-                            self.getAgentByName(causalName).updateEmotionalState(emotion)  #also add relation emotion the emotion to the emotional state
-                    else:
-                        if relation.like >= 0:
-                            emotion.name = 'remorse'
-                            emotion.intensity = abs(utility * deltaLikelihood * relation.like)
-                            relation.addEmotion(emotion)
-                            self.getAgentByName(causalName).updateEmotionalState(emotion)  #also add relation emotion the emotion to the emotional state
+                causalAgent = self.getAgentByName(causalName)
+                relation = causalAgent.getRelation(affectedName)
+                if relation is not None and relation.like >= 0:
+                    emotion = CAUSING_EMOTIONS[int(desirability >= 0)]
+                    intensity = abs(utility * deltaLikelihood * relation.like)
+                    relation.addIntensity(emotion, intensity)
+                    causalAgent.addIntensity(emotion, intensity)  #also add relation emotion the emotion to the emotional state
     """
     #A linear decay function that will decrease the emotion intensity of an emotion every tick by a constant defined by the decayFactor in the gamygdala instance.
     #You can set Gamygdala to use this function for all emotion decay by calling setDecay() and passing this function as second parameter. This function is not to be called directly.
@@ -488,7 +1271,8 @@ class Gamygdala:
         dt = deltaTime
         if dt is None:
             dt = self.millisPassed/1000
-        return value * math.pow(self.decayFactor, dt)
+        #** rather than math.pow, so that value and deltaTime can also be NumPy arrays.
+        return value * self.decayFactor ** dt
 
     def _evaluateSocialEmotion(self, utility: float, desirability: float, deltaLikelihood: float, relation: Relation, agent: Agent):
         #This function is used to evaluate happy-for, pity, gloating or resentment.
@@ -496,18 +1280,8 @@ class Gamygdala:
         #The desirability is the desirability from the goal owner's perspective.
         #The agent is the agent getting evaluated (the agent that gets the social emotion added to his emotional state).
         #The relation is a relation object between the agent being evaluated and the goal owner of the affected goal.
-        emotion = Emotion(None, None)
-        if desirability >= 0:
-            if relation.like >= 0:
-                emotion.name = 'happy-for'
-            else:
-                emotion.name = 'resentment'
-        else:
-            if relation.like >= 0:
-                emotion.name = 'pity'
-            else:
-                emotion.name = 'gloating'
-        emotion.intensity = abs(utility * deltaLikelihood * relation.like)
-        if emotion.intensity != 0:
-            relation.addEmotion(emotion)
-            agent.updateEmotionalState(emotion) #also add relation emotion the emotion to the emotional state
+        intensity = abs(utility * deltaLikelihood * relation.like)
+        if intensity != 0:
+            emotion = SOCIAL_EMOTIONS[socialEmotionKey(desirability, relation.like)]
+            relation.addIntensity(emotion, intensity)
+            agent.addIntensity(emotion, intensity) #also add relation emotion the emotion to the emotional state
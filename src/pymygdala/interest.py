@@ -0,0 +1,246 @@
+"""
+Interest management, which limits the social emotions an event causes to the agents that are interested in the goal owner, e.g. the ones nearby.
+
+Without interest management, every agent with a relation to a goal owner feels happy-for, pity, gloating or resentment
+(and gratification or remorse) whenever one of the owner's goals changes, so one famous agent changing state fans out
+to the whole world. With Gamygdala.setInterest(interest), appraisal asks the interest manager for the observers that are
+interested in the owner, and only evaluates the social emotions of those. SpatialInterest and GroupInterest find them
+without looking at every observer, so the cost of an event depends on the agents near the owner, not on its fame.
+The emotions of the other observers are deferred: the event is kept for the owner and delivered to each observer when
+it comes in interest of the owner (e.g. walks back into range), see Gamygdala.deliverDeferred().
+
+The owner's own emotions are never limited, only those of its observers.
+"""
+
+from typing import Callable, Hashable, Iterable, Union
+
+from pymygdala.agent import Agent
+
+class Interest:
+    """
+    The base class of interest managers, see the module documentation. Subclasses implement isInterested() (and observers() when they can find the interested observers faster),
+    and call changed() when an agent's interest may have changed, so the social emotions deferred for it can be delivered. The base class is interested in everything.
+    """
+    def __init__(self):
+        #The engine using this interest manager, set by Gamygdala.setInterest().
+        self.gamygdala = None
+
+    def isInterested(self, observerName: str, ownerName: str) -> bool:
+        """
+        Whether an observer is interested in what happens to a goal owner it has a relation to, i.e. whether it feels the social emotions of the owner's events now.
+
+        :param observerName: The name of the agent holding the relation.
+        :type observerName: str
+
+        :param ownerName: The name of the goal owner.
+        :type ownerName: str
+
+        :return: Whether the observer's social emotions are evaluated now, rather than deferred.
+        :rtype: bool
+        """
+        return True
+
+    def observers(self, ownerName: str, holders: dict[Agent, None]) -> list[Agent]:
+        """
+        The observers interested in a goal owner now, called by appraisal for every affected owner that has observers.
+
+        :param ownerName: The name of the goal owner.
+        :type ownerName: str
+
+        :param holders: The agents that have a relation to the owner, as keys.
+        :type holders: dict[Agent, None]
+
+        :return: The interested agents among holders.
+        :rtype: list[Agent]
+        """
+        return [observer for observer in holders if self.isInterested(observer.name, ownerName)]
+
+    def _observersAmong(self, ownerName: str, holders: dict[Agent, None], candidateNames: Iterable[str], candidateCount: int) -> list[Agent]:
+        #The interested observers, found among candidateNames (the agents that may be interested) when there are fewer of them than holders.
+        if self.gamygdala is None or len(holders) <= candidateCount:
+            return Interest.observers(self, ownerName, holders)
+        agents = self.gamygdala._agentsByName
+        observers = []
+        for name in candidateNames:
+            agent = agents.get(name)
+            if agent is not None and agent in holders and self.isInterested(name, ownerName):
+                observers.append(agent)
+        return observers
+
+    def changed(self, agentName: str):
+        """
+        Tells the engine that the interest of an agent, or in an agent, may have changed, which delivers the social emotions deferred for it (or its goals) that are in interest now.
+
+        :param agentName: The agent that moved, changed group, etc.
+        :type agentName: str
+        """
+        if self.gamygdala is not None:
+            self.gamygdala.deliverDeferred(agentName)
+
+class PredicateInterest(Interest):
+    """
+    Interest decided by a function, e.g. line of sight or a game's own relevance rules. Call changed() when the outcome of the function changes for an agent.
+
+    :param predicate: Called with the observer's and the owner's name, returns whether the observer is interested in the owner.
+    :type predicate: Callable[[str, str], bool]
+    """
+    def __init__(self, predicate: Callable[[str, str], bool]):
+        super().__init__()
+        self.predicate = predicate
+
+    def isInterested(self, observerName: str, ownerName: str) -> bool:
+        return self.predicate(observerName, ownerName)
+
+class GroupInterest(Interest):
+    """
+    Interest within groups, e.g. factions, rooms or zones: an observer is interested in owners it shares a group with.
+    Everyone is interested in owners that are not in any group, observers that are not in any group are only interested in those.
+    """
+    def __init__(self):
+        super().__init__()
+        self._groups: dict[str, frozenset] = {}
+        self._members: dict[Hashable, set[str]] = {}
+
+    def setGroups(self, agentName: str, groups: Iterable[Hashable]):
+        """
+        Sets the groups of an agent, replacing the ones it was in. Delivers the social emotions deferred for it that are in interest now.
+
+        :param agentName: The name of the agent.
+        :type agentName: str
+
+        :param groups: The groups of the agent, none to no longer limit the agent.
+        :type groups: Iterable[Hashable]
+        """
+        groups = frozenset(groups)
+        for group in self._groups.get(agentName, ()):
+            members = self._members[group]
+            members.discard(agentName)
+            if not members:
+                del self._members[group]
+        if groups:
+            self._groups[agentName] = groups
+            for group in groups:
+                self._members.setdefault(group, set()).add(agentName)
+        else:
+            self._groups.pop(agentName, None)
+        self.changed(agentName)
+
+    def setGroup(self, agentName: str, group: Hashable):
+        """
+        Puts an agent in one group, see setGroups().
+        """
+        self.setGroups(agentName, (group,))
+
+    def getGroups(self, agentName: str) -> frozenset:
+        return self._groups.get(agentName, frozenset())
+
+    def isInterested(self, observerName: str, ownerName: str) -> bool:
+        ownerGroups = self._groups.get(ownerName)
+        if ownerGroups is None:
+            return True
+        observerGroups = self._groups.get(observerName)
+        return observerGroups is not None and not observerGroups.isdisjoint(ownerGroups)
+
+    def observers(self, ownerName: str, holders: dict[Agent, None]) -> list[Agent]:
+        ownerGroups = self._groups.get(ownerName)
+        if ownerGroups is None:
+            return list(holders)
+        if len(ownerGroups) == 1:
+            members = self._members[next(iter(ownerGroups))]
+        else:
+            members = set().union(*(self._members[group] for group in ownerGroups))
+        return self._observersAmong(ownerName, holders, members, len(members))
+
+class SpatialInterest(Interest):
+    """
+    Interest by distance: an observer is interested in owners within radius of it. Positions are kept in a grid of radius sized cells,
+    so finding the observers in range of an owner only looks at the neighbouring cells.
+    Everyone is interested in owners without a position, observers without a position are only interested in those.
+
+    :param radius: The distance up to which agents are interested in each other.
+    :type radius: float
+    """
+    def __init__(self, radius: float):
+        super().__init__()
+        assert radius > 0, 'Error: the interest radius must be positive'
+        self.radius = radius
+        self._positions: dict[str, tuple[float, float]] = {}
+        self._cells: dict[tuple[int, int], set[str]] = {}
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return int(x // self.radius), int(y // self.radius)
+
+    def setPosition(self, agentName: str, x: float, y: float):
+        """
+        Moves an agent. Delivers the social emotions deferred for it, or for agents interested in it, that are in range now.
+
+        :param agentName: The name of the agent.
+        :type agentName: str
+
+        :param x: The x coordinate.
+        :type x: float
+
+        :param y: The y coordinate.
+        :type y: float
+        """
+        cell = self._cell(x, y)
+        old = self._positions.get(agentName)
+        self._positions[agentName] = (x, y)
+        if old is not None:
+            oldCell = self._cell(*old)
+            if oldCell == cell:
+                #Moves within a cell are common and do not change the grid.
+                self.changed(agentName)
+                return
+            members = self._cells[oldCell]
+            members.discard(agentName)
+            if not members:
+                del self._cells[oldCell]
+        self._cells.setdefault(cell, set()).add(agentName)
+        self.changed(agentName)
+
+    def removePosition(self, agentName: str):
+        """
+        Removes the position of an agent, which is no longer limited afterwards.
+        """
+        position = self._positions.pop(agentName, None)
+        if position is not None:
+            cell = self._cell(*position)
+            members = self._cells[cell]
+            members.discard(agentName)
+            if not members:
+                del self._cells[cell]
+            self.changed(agentName)
+
+    def getPosition(self, agentName: str) -> Union[tuple[float, float], None]:
+        return self._positions.get(agentName)
+
+    def agentsNear(self, x: float, y: float) -> list[str]:
+        """
+        The names of the agents within radius of a point.
+        """
+        cellX, cellY = self._cell(x, y)
+        radius2 = self.radius * self.radius
+        near = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for name in self._cells.get((cellX + dx, cellY + dy), ()):
+                    otherX, otherY = self._positions[name]
+                    if (otherX - x) ** 2 + (otherY - y) ** 2 <= radius2:
+                        near.append(name)
+        return near
+
+    def isInterested(self, observerName: str, ownerName: str) -> bool:
+        owner = self._positions.get(ownerName)
+        if owner is None:
+            return True
+        observer = self._positions.get(observerName)
+        return observer is not None and (observer[0] - owner[0]) ** 2 + (observer[1] - owner[1]) ** 2 <= self.radius * self.radius
+
+    def observers(self, ownerName: str, holders: dict[Agent, None]) -> list[Agent]:
+        owner = self._positions.get(ownerName)
+        if owner is None:
+            return list(holders)
+        cellX, cellY = self._cell(*owner)
+        cells = [self._cells.get((cellX + dx, cellY + dy), ()) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        return self._observersAmong(ownerName, holders, (name for cell in cells for name in cell), sum(len(cell) for cell in cells))
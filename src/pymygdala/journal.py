@@ -0,0 +1,388 @@
+"""
+Records the inputs of a Gamygdala engine in an append-only binary journal, and replays them deterministically, see Gamygdala.startJournal().
+
+Appraisal and decay only depend on the beliefs appraised and the time decayed, so a journal of those inputs (together with the
+state the engine started in) reproduces every emotional state of a run exactly. Decay is journaled with the time that was
+actually decayed, so replay does not depend on the wall clock and runs as fast as appraisal allows, without waiting.
+
+A journal file consists of 8 bytes magic (b'GAMYGJNL'), a little endian uint32 format version and a uint32 header length, the
+UTF-8 encoded JSON header, and then the records. Every record starts with a uint8 record type, see the _RECORDS structs.
+Strings (agent and goal names) are written once in a NAME record and referred to by their number afterwards.
+When the engine was not empty when journaling started, its state is saved next to the journal with Gamygdala.save()
+(which needs NumPy) and replay starts from that snapshot.
+
+Only the facilitator methods of the engine are journaled: registerAgent (and createAgent, spawnAgents), createGoalForAgent,
+createRelation, setGain, setDecay, setDecayPolicy, setDecayGroup, setLazyDecay, appraise, appraiseBatch, appraiseColumns and
+decayAll. Changes made to agents, goals and relations directly are not, and neither are Goal.calculateLikelyhood functions.
+Decay policies are journaled with their settings (see decay.DecayPolicy.getSettings), and when the rates of the journaled
+policy change, its settings are journaled again before the next record.
+"""
+
+import json
+import os
+import struct
+from typing import Iterator, Union
+
+from pymygdala.agent import Agent
+from pymygdala.clock import ManualClock
+from pymygdala.concepts import Belief
+from pymygdala.decay import checkSavedGroup, decayPolicyFromSettings
+from pymygdala.engines import Gamygdala
+
+MAGIC = b'GAMYGJNL'
+FORMAT_VERSION = 2
+_PREAMBLE = struct.Struct('<8sII')
+
+NAME, BELIEF, DECAY, AGENT, GOAL, RELATION, GAIN, SET_DECAY, LAZY_DECAY, DECAY_POLICY, DECAY_GROUP = range(11)
+#The fixed part of each record type, after the record type byte.
+_RECORDS = {
+    NAME: struct.Struct('<I'),        #length of the UTF-8 name that follows
+    BELIEF: struct.Struct('<dBiiI'),  #likelihood, isIncremental, causal agent name (-1 for None), affected agent name (-1 for all), goal count
+    DECAY: struct.Struct('<d'),       #millis decayed
+    AGENT: struct.Struct('<I'),       #agent name
+    GOAL: struct.Struct('<IIdB'),     #agent name, goal name, utility, isMaintenanceGoal
+    RELATION: struct.Struct('<IId'),  #source name, target name, like
+    GAIN: struct.Struct('<d'),        #gain
+    SET_DECAY: struct.Struct('<dB'),  #decay factor, decay function (see _DECAY_FUNCTIONS)
+    LAZY_DECAY: struct.Struct('<B'),  #lazyDecay
+    DECAY_POLICY: struct.Struct('<BI'),  #whether the policy was set (1) or only its rates changed (0), length of the UTF-8 JSON settings that follow
+    DECAY_GROUP: struct.Struct('<II'),  #agent name, group (its JSON encoding, as a name)
+}
+#Every affected goal of a belief: goal name, congruence.
+_BELIEF_GOAL = struct.Struct('<Id')
+#A whole belief record with a single goal, the common case.
+_SINGLE_GOAL_BELIEF = struct.Struct('<BdBiiIId')
+_DECAY_FUNCTIONS = ('exponentialDecay', 'linearDecay')
+
+class Journal:
+    """
+    Appends the inputs of a Gamygdala engine to a journal file, see the module documentation.
+    Records are buffered in memory and written whenever the buffer is full, on flush() and on close().
+    Usually you do not create this yourself, but use Gamygdala.startJournal() and Gamygdala.stopJournal().
+
+    :param gamygdala: The engine to journal.
+    :type gamygdala: Gamygdala
+
+    :param path: The journal file, replaced when it exists.
+    :type path: str
+
+    :param bufferSize: The number of bytes to buffer before writing them to the file.
+    :type bufferSize: int
+    """
+    def __init__(self, gamygdala: Gamygdala, path: str, bufferSize: int = 1 << 16):
+        self.gamygdala = gamygdala
+        self.path = path
+        self.bufferSize = bufferSize
+        self.records = 0
+        self._buffer = bytearray()
+        self._names: dict[str, int] = {}
+        #The journaled decay policy and the version of its rates that was journaled.
+        self._policy = None
+        self._policyVersion = 0
+        snapshot = None
+        if gamygdala.agents or gamygdala.goals:
+            snapshot = path + '.snap'
+            gamygdala.save(snapshot)
+        header = json.dumps({'engine': type(gamygdala).__name__, 'snapshot': None if snapshot is None else os.path.basename(snapshot)}).encode('utf-8')
+        self._file = open(path, 'wb')
+        self._file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        self._file.write(header)
+        #The decay settings are part of the engine's state, also when there is no snapshot.
+        self.recordDecaySettings(gamygdala.decayFactor, gamygdala.decayFunction)
+        self.recordLazyDecay(gamygdala.lazyDecay)
+        if gamygdala.decayPolicy is not None:
+            self.recordDecayPolicy(gamygdala.decayPolicy)
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _name(self, name: str) -> int:
+        #The number of a string, writing a NAME record the first time it is used.
+        number = self._names.get(name)
+        if number is None:
+            number = self._names[name] = len(self._names)
+            encoded = name.encode('utf-8')
+            self._buffer += bytes((NAME,)) + _RECORDS[NAME].pack(len(encoded)) + encoded
+        return number
+
+    def _append(self, recordType: int, *values):
+        if self._policy is not None and self._policy.version != self._policyVersion:
+            self._appendPolicy(self._policy, False)
+        self._buffer += bytes((recordType,)) + _RECORDS[recordType].pack(*values)
+        self.records += 1
+        if len(self._buffer) >= self.bufferSize:
+            self.flush()
+
+    def recordAppraisal(self, likelihood: float, causalAgentName: Union[str, None], goalNames: list[str], goalCongruences: list[float], isIncremental: bool, affectedAgent: Union[Agent, None] = None):
+        """
+        Records one belief, called by the appraise methods of the engine with its lock held.
+        """
+        if self._policy is not None and self._policy.version != self._policyVersion:
+            self._appendPolicy(self._policy, False)
+        causal = -1 if causalAgentName is None else self._name(causalAgentName)
+        affected = -1 if affectedAgent is None else self._name(affectedAgent.name)
+        if len(goalNames) == 1 and len(goalCongruences) == 1:
+            self._buffer += _SINGLE_GOAL_BELIEF.pack(BELIEF, likelihood, bool(isIncremental), causal, affected, 1, self._name(goalNames[0]), goalCongruences[0])
+        else:
+            goals = b''.join([_BELIEF_GOAL.pack(self._name(goalName), congruence) for goalName, congruence in zip(goalNames, goalCongruences)])
+            self._buffer += bytes((BELIEF,)) + _RECORDS[BELIEF].pack(likelihood, bool(isIncremental), causal, affected, min(len(goalNames), len(goalCongruences))) + goals
+        self.records += 1
+        if len(self._buffer) >= self.bufferSize:
+            self.flush()
+
+    def recordDecay(self, millisPassed: float):
+        #Called by decayAll() with the engine's lock held.
+        self._append(DECAY, millisPassed)
+
+    def recordAgent(self, agentName: str):
+        with self.gamygdala.lock:
+            self._append(AGENT, self._name(agentName))
+
+    def recordGoal(self, agentName: str, goalName: str, goalUtility: float, isMaintenanceGoal: bool):
+        with self.gamygdala.lock:
+            self._append(GOAL, self._name(agentName), self._name(goalName), goalUtility, bool(isMaintenanceGoal))
+
+    def recordRelation(self, sourceName: str, targetName: str, relation: float):
+        with self.gamygdala.lock:
+            self._append(RELATION, self._name(sourceName), self._name(targetName), relation)
+
+    def recordGain(self, gain: float):
+        with self.gamygdala.lock:
+            self._append(GAIN, gain)
+
+    def recordDecaySettings(self, decayFactor: float, decayFunction: callable):
+        name = getattr(decayFunction, '__name__', None)
+        if name not in _DECAY_FUNCTIONS or getattr(self.gamygdala, name) != decayFunction:
+            raise ValueError('Error: only the linearDecay and exponentialDecay functions of the engine can be journaled')
+        with self.gamygdala.lock:
+            self._append(SET_DECAY, decayFactor, _DECAY_FUNCTIONS.index(name))
+            #setDecay() switches back to the decay function.
+            self._policy = None
+
+    def recordDecayPolicy(self, policy):
+        with self.gamygdala.lock:
+            self._appendPolicy(policy, True)
+
+    def _appendPolicy(self, policy, replaced: bool):
+        #Writes the settings of the policy, which then is the one whose rates are watched.
+        encoded = json.dumps(None if policy is None else policy.getSettings()).encode('utf-8')
+        self._buffer += bytes((DECAY_POLICY,)) + _RECORDS[DECAY_POLICY].pack(replaced, len(encoded)) + encoded
+        self.records += 1
+        self._policy = policy
+        self._policyVersion = 0 if policy is None else policy.version
+
+    def recordDecayGroup(self, agentName: str, group):
+        checkSavedGroup(group)
+        with self.gamygdala.lock:
+            self._append(DECAY_GROUP, self._name(agentName), self._name(json.dumps(group)))
+
+    def recordLazyDecay(self, lazyDecay: bool):
+        with self.gamygdala.lock:
+            self._append(LAZY_DECAY, bool(lazyDecay))
+
+    def flush(self):
+        """
+        Writes the buffered records to the journal file.
+        """
+        with self.gamygdala.lock:
+            if self._file is not None and self._buffer:
+                self._file.write(self._buffer)
+                self._file.flush()
+                self._buffer.clear()
+
+    def close(self):
+        """
+        Writes the buffered records and closes the journal file. The engine stops journaling to it.
+        """
+        with self.gamygdala.lock:
+            if self._file is not None:
+                self.flush()
+                self._file.close()
+                self._file = None
+            if self.gamygdala.journal is self:
+                self.gamygdala.journal = None
+
+def readJournalHeader(path: str) -> dict:
+    """
+    The header of a journal file: the name of the engine class that was journaled and the file name of the snapshot it started from (or None).
+    """
+    with open(path, 'rb') as file:
+        return _readHeader(file, path)[0]
+
+def _readHeader(file, path: str) -> tuple[dict, int]:
+    preamble = file.read(_PREAMBLE.size)
+    if len(preamble) < _PREAMBLE.size:
+        raise ValueError('Error: ' + path + ' is not a Gamygdala journal')
+    magic, version, headerLength = _PREAMBLE.unpack(preamble)
+    if magic != MAGIC:
+        raise ValueError('Error: ' + path + ' is not a Gamygdala journal')
+    if version != FORMAT_VERSION:
+        raise ValueError('Error: ' + path + ' has journal format version %d, this version reads %d' % (version, FORMAT_VERSION))
+    return json.loads(file.read(headerLength).decode('utf-8')), _PREAMBLE.size + headerLength
+
+def readJournal(path: str) -> Iterator[tuple]:
+    """
+    The records of a journal file, in order, with names resolved. A record cut off at the end (e.g. by a crash) ends the journal.
+
+    :param path: The journal file.
+    :type path: str
+
+    :return: Tuples starting with the record type, one of
+        (BELIEF, likelihood, causalAgentName, goalNames, goalCongruences, isIncremental, affectedAgentName),
+        (DECAY, millisPassed), (AGENT, agentName), (GOAL, agentName, goalName, goalUtility, isMaintenanceGoal),
+        (RELATION, sourceName, targetName, relation), (GAIN, gain), (SET_DECAY, decayFactor, decayFunctionName), (LAZY_DECAY, lazyDecay),
+        (DECAY_POLICY, settings, replaced) and (DECAY_GROUP, agentName, group).
+    :rtype: Iterator[tuple]
+    """
+    with open(path, 'rb') as file:
+        _readHeader(file, path)
+        data = file.read()
+    names = []
+    unpackName, unpackBelief, unpackGoal = _RECORDS[NAME].unpack_from, _RECORDS[BELIEF].unpack_from, _BELIEF_GOAL.unpack_from
+    position, end = 0, len(data)
+    while position < end:
+        recordType = data[position]
+        record = _RECORDS.get(recordType)
+        if record is None:
+            raise ValueError('Error: unknown record type %d in journal %s' % (recordType, path))
+        position += 1
+        if position + record.size > end:
+            return
+        if recordType == NAME:
+            length, = unpackName(data, position)
+            position += record.size
+            if position + length > end:
+                return
+            names.append(data[position:position + length].decode('utf-8'))
+            position += length
+        elif recordType == DECAY_POLICY:
+            replaced, length = record.unpack_from(data, position)
+            position += record.size
+            if position + length > end:
+                return
+            yield DECAY_POLICY, json.loads(data[position:position + length].decode('utf-8')), bool(replaced)
+            position += length
+        elif recordType == BELIEF:
+            likelihood, isIncremental, causal, affected, count = unpackBelief(data, position)
+            position += record.size
+            if position + count * _BELIEF_GOAL.size > end:
+                return
+            goalNames, goalCongruences = [], []
+            for _ in range(count):
+                goal, congruence = unpackGoal(data, position)
+                goalNames.append(names[goal])
+                goalCongruences.append(congruence)
+                position += _BELIEF_GOAL.size
+            yield BELIEF, likelihood, None if causal < 0 else names[causal], goalNames, goalCongruences, bool(isIncremental), None if affected < 0 else names[affected]
+        else:
+            values = record.unpack_from(data, position)
+            position += record.size
+            if recordType == AGENT:
+                yield AGENT, names[values[0]]
+            elif recordType == GOAL:
+                yield GOAL, names[values[0]], names[values[1]], values[2], bool(values[3])
+            elif recordType == RELATION:
+                yield RELATION, names[values[0]], names[values[1]], values[2]
+            elif recordType == SET_DECAY:
+                yield SET_DECAY, values[0], _DECAY_FUNCTIONS[values[1]]
+            elif recordType == LAZY_DECAY:
+                yield LAZY_DECAY, bool(values[0])
+            elif recordType == DECAY_GROUP:
+                yield DECAY_GROUP, names[values[0]], json.loads(names[values[1]])
+            else:
+                yield (recordType,) + values
+
+class JournalReplay:
+    """
+    Replays a journal into a new engine, record by record, see the module documentation.
+    The engine starts in the state journaling started in, run() applies the records. The engine gets a clock.ManualClock that
+    step() advances by the journaled decay times, so the replay does not wait and gives the same emotional states as the
+    journaled run, e.g. to compare them in a regression test.
+
+    :param path: The journal file.
+    :type path: str
+
+    :param engineClass: The engine to replay into, e.g. Gamygdala or vectorized.ArrayGamygdala.
+    :type engineClass: type
+    """
+    def __init__(self, path: str, engineClass: type = Gamygdala):
+        header = readJournalHeader(path)
+        if header['snapshot'] is None:
+            self.gamygdala = engineClass()
+        else:
+            self.gamygdala = engineClass.load(os.path.join(os.path.dirname(os.path.abspath(path)), header['snapshot']))
+        self.gamygdala.setClock(ManualClock())
+        #The number of records (other than names) applied so far.
+        self.position = 0
+        self._records = readJournal(path)
+
+    def run(self, count: Union[int, None] = None) -> int:
+        """
+        Applies the next records of the journal.
+
+        :param count: The number of records to apply, all remaining records when omitted.
+        :type count: int or None
+
+        :return: The number of records applied, less than count at the end of the journal.
+        :rtype: int
+        """
+        gamygdala = self.gamygdala
+        applied = 0
+        for record in self._records:
+            recordType = record[0]
+            if recordType == BELIEF:
+                _, likelihood, causalAgentName, goalNames, goalCongruences, isIncremental, affectedAgentName = record
+                belief = Belief(likelihood, causalAgentName, goalNames, goalCongruences, isIncremental)
+                if affectedAgentName is None:
+                    gamygdala.appraise(belief)
+                else:
+                    #Beliefs for one agent may come from appraiseBatch(), which skips goals the agent does not have where appraise() would fail.
+                    gamygdala.appraiseBatch((belief,), gamygdala.getAgentByName(affectedAgentName))
+            elif recordType == DECAY:
+                gamygdala.step(record[1])
+            elif recordType == AGENT:
+                gamygdala.createAgent(record[1])
+            elif recordType == GOAL:
+                gamygdala.createGoalForAgent(*record[1:])
+            elif recordType == RELATION:
+                gamygdala.createRelation(*record[1:])
+            elif recordType == GAIN:
+                gamygdala.setGain(record[1])
+            elif recordType == SET_DECAY:
+                gamygdala.setDecay(record[1], getattr(gamygdala, record[2]))
+            elif recordType == LAZY_DECAY:
+                gamygdala.setLazyDecay(record[1])
+            elif recordType == DECAY_POLICY:
+                _, settings, replaced = record
+                if replaced:
+                    gamygdala.setDecayPolicy(None if settings is None else decayPolicyFromSettings(settings))
+                else:
+                    #Only the rates changed, which applies to the decay that is still pending as well, see DecayPolicy.setRate.
+                    gamygdala.decayPolicy.setSettings(settings)
+            elif recordType == DECAY_GROUP:
+                gamygdala.setDecayGroup(record[1], record[2])
+            applied += 1
+            self.position += 1
+            if count is not None and applied >= count:
+                break
+        return applied
+
+def replayJournal(path: str, engineClass: type = Gamygdala) -> Gamygdala:
+    """
+    Replays a complete journal, see JournalReplay.
+
+    :param path: The journal file.
+    :type path: str
+
+    :param engineClass: The engine to replay into, e.g. Gamygdala or vectorized.ArrayGamygdala.
+    :type engineClass: type
+
+    :return: The engine in the state the journaled engine was in when its journal was closed.
+    :rtype: Gamygdala
+    """
+    replay = JournalReplay(path, engineClass)
+    replay.run()
+    return replay.gamygdala
@@ -0,0 +1,555 @@
+"""
+A Gamygdala engine that spreads the agents of one world over several worker processes, to use more than one core.
+
+Every shard is a process running its own Gamygdala (or ArrayGamygdala) with part of the agents, their goals and the relations
+they hold. The main process keeps track of where agents and goals live and routes work to the shards:
+
+- A goal lives on the shard of its first owner (its home shard), which computes the change in the goal's likelihood and appraises it for its local owners. Owners of the same goal on other shards get the result as an event.
+  The home shard keeps the likelihood of the goal, also for beliefs appraised for one owner on another shard, and the other shards copy it from the events.
+- The social emotions of agents with a relation to a goal owner on another shard are sent to the shard of those agents as an event as well.
+
+Beliefs are queued per shard and sent in batches. The events they cause on other shards are exchanged in rounds, through
+the main process, until none are left. Worlds in which most relations are between agents of the same shard need few such
+events, so their appraisal scales with the number of shards.
+"""
+
+import multiprocessing
+import os
+import threading
+import traceback
+from typing import Union
+
+from pymygdala.concepts import Belief, Emotion
+from pymygdala.clock import WallClock
+from pymygdala.engines import DecayScheduler, Gamygdala
+
+class _ShardWorker:
+    """
+    The part of a sharded world that runs in one worker process. The main process calls its methods by name (see _runShard).
+    """
+    def __init__(self, shard: int, engineClass: type):
+        self.shard = shard
+        self.engine = engineClass()
+        #Goal name -> the other shards owning the goal, only kept on the goal's home shard.
+        self.remoteOwnerShards: dict[str, list[int]] = {}
+        #Agent name -> the other shards holding relations to the agent, only kept on the agent's shard.
+        self.remoteObserverShards: dict[str, list[int]] = {}
+        #The events for other shards caused by the commands processed so far, by shard.
+        self.outgoing: dict[int, list[tuple]] = {}
+
+    def _send(self, shard: int, event: tuple):
+        self.outgoing.setdefault(shard, []).append(event)
+
+    def createAgent(self, agentName: str):
+        self.engine.createAgent(agentName)
+
+    def createGoalForAgent(self, agentName: str, goalName: str, goalUtility: float, isMaintenanceGoal: bool):
+        self.engine.createGoalForAgent(agentName, goalName, goalUtility, isMaintenanceGoal)
+
+    def setMaintenanceGoal(self, goalName: str):
+        self.engine.getGoalByName(goalName).maintenanceGoal = True
+
+    def updateRelation(self, sourceName: str, targetName: str, like: float):
+        self.engine.getAgentByName(sourceName).updateRelation(targetName, like)
+
+    def addRemoteOwnerShard(self, goalName: str, shard: int):
+        self.remoteOwnerShards.setdefault(goalName, []).append(shard)
+
+    def addRemoteObserverShard(self, agentName: str, shard: int):
+        self.remoteObserverShards.setdefault(agentName, []).append(shard)
+
+    def setGain(self, gain: float):
+        self.engine.setGain(gain)
+
+    def setDecay(self, decayFactor: float, decayFunctionName: str):
+        self.engine.setDecay(decayFactor, getattr(self.engine, decayFunctionName))
+
+    def setDecayPolicy(self, policy):
+        self.engine.setDecayPolicy(policy)
+
+    def setDecayGroup(self, agentName: str, group):
+        self.engine.setDecayGroup(agentName, group)
+
+    def setLazyDecay(self, lazyDecay: bool):
+        self.engine.setLazyDecay(lazyDecay)
+
+    def decayAll(self, millisPassed: float):
+        self.engine.decayAll(millisPassed)
+
+    def appraiseGoal(self, goalName: str, congruence: float, likelihood: float, isIncremental: bool, causalAgentName: str):
+        #A belief about a goal that has this shard as its home.
+        engine = self.engine
+        goal = engine.getGoalByName(goalName)
+        if goal is None:
+            return
+        utility = goal.utility
+        deltaLikelihood = engine._calculateDeltaLikelihood(goal, congruence, likelihood, isIncremental)
+        event = ('appraiseOwners', goalName, causalAgentName, utility, deltaLikelihood, goal.likelihood, congruence * utility)
+        self.appraiseOwners(*event[1:])
+        for shard in self.remoteOwnerShards.get(goalName, ()):
+            self._send(shard, event)
+
+    def appraiseAgentGoal(self, agentName: str, goalName: str, congruence: float, likelihood: float, isIncremental: bool, causalAgentName: str):
+        #A belief appraised for one agent only, see Gamygdala.appraise(belief, affectedAgent).
+        engine = self.engine
+        agent = engine.getAgentByName(agentName)
+        goal = agent.getGoalByName(goalName)
+        if goal is None:
+            return
+        utility = goal.utility
+        deltaLikelihood = engine._calculateDeltaLikelihood(goal, congruence, likelihood, isIncremental)
+        self._appraiseOwner(agent, causalAgentName, utility, deltaLikelihood, goal.likelihood, congruence * utility)
+
+    def appraiseGoalForOwner(self, agentName: str, shard: int, goalName: str, congruence: float, likelihood: float, isIncremental: bool, causalAgentName: str):
+        #A belief appraised for one agent only, about a common goal that has this shard as its home but the agent on another shard.
+        goal = self.engine.getGoalByName(goalName)
+        if goal is None:
+            return
+        utility = goal.utility
+        deltaLikelihood = self.engine._calculateDeltaLikelihood(goal, congruence, likelihood, isIncremental)
+        self._send(shard, ('appraiseRemoteOwner', agentName, goalName, causalAgentName, utility, deltaLikelihood, goal.likelihood, congruence * utility))
+
+    def appraiseRemoteOwner(self, agentName: str, goalName: str, causalAgentName: str, utility: float, deltaLikelihood: float, likelihood: float, desirability: float):
+        agent = self.engine.getAgentByName(agentName)
+        agent.getGoalByName(goalName).likelihood = likelihood
+        self._appraiseOwner(agent, causalAgentName, utility, deltaLikelihood, likelihood, desirability)
+
+    def appraiseOwners(self, goalName: str, causalAgentName: str, utility: float, deltaLikelihood: float, likelihood: float, desirability: float):
+        #Keeps the copy of the goal on this shard at the likelihood of its home shard.
+        goal = self.engine.getGoalByName(goalName)
+        if goal is not None:
+            goal.likelihood = likelihood
+        for owner in self.engine._goalOwners.get(goalName, ()):
+            self._appraiseOwner(owner, causalAgentName, utility, deltaLikelihood, likelihood, desirability)
+
+    def appraiseObservers(self, ownerName: str, causalAgentName: str, utility: float, deltaLikelihood: float, desirability: float):
+        self.engine._evaluateObservers(ownerName, causalAgentName, desirability, utility, deltaLikelihood)
+
+    def _appraiseOwner(self, owner, causalAgentName: str, utility: float, deltaLikelihood: float, likelihood: float, desirability: float):
+        #The same as the body of Gamygdala._appraiseGoal for one owner, with the observers on other shards getting an event.
+        engine = self.engine
+        owner._settle()
+        engine._evaluateInternalEmotion(utility, deltaLikelihood, likelihood, owner)
+        engine._agentActions(owner.name, causalAgentName, owner.name, desirability, utility, deltaLikelihood)
+        engine._evaluateObservers(owner.name, causalAgentName, desirability, utility, deltaLikelihood)
+        for shard in self.remoteObserverShards.get(owner.name, ()):
+            self._send(shard, ('appraiseObservers', owner.name, causalAgentName, utility, deltaLikelihood, desirability))
+
+    def getEmotionalState(self, agentName: str, useGain: bool) -> list[tuple[str, float]]:
+        return [(emotion.name.value, emotion.intensity) for emotion in self.engine.getAgentByName(agentName).getEmotionalState(useGain)]
+
+    def getPADState(self, agentName: str, useGain: bool) -> list[float]:
+        return list(self.engine.getAgentByName(agentName).getPADState(useGain))
+
+    def getPADStates(self, useGain: bool) -> list[list[float]]:
+        return [list(agent.getPADState(useGain)) for agent in self.engine.agents]
+
+def _runShard(connection, shard: int, engineClass: type):
+    #The main loop of a worker process. It receives lists of commands, (method name, arguments...) tuples for _ShardWorker, and answers each list
+    #with the results of the get... commands, the events for other shards and the error that stopped the list, if any.
+    worker = _ShardWorker(shard, engineClass)
+    while True:
+        try:
+            commands = connection.recv()
+        except EOFError:
+            return
+        replies = []
+        error = None
+        for command in commands:
+            if command[0] == 'stop':
+                connection.close()
+                return
+            try:
+                result = getattr(worker, command[0])(*command[1:])
+            except Exception:
+                error = RuntimeError('Error: shard %d failed on %s\n%s' % (shard, command[0], traceback.format_exc()))
+                break
+            if command[0].startswith('get'):
+                replies.append(result)
+        outgoing, worker.outgoing = worker.outgoing, {}
+        connection.send((replies, outgoing, error))
+
+class ShardedGamygdala:
+    """
+    A Gamygdala engine whose agents are partitioned over worker processes (shards), see the module documentation.
+    Agents, goals and relations are created with the facilitator methods (createAgent, createGoalForAgent, createRelation), and agents are referred to by name.
+    appraise() only queues the belief, it is processed when maxBatch commands are queued or when the state is read (getEmotionalState, getPADState, getPADStates, flush).
+    The result is the same as that of one Gamygdala, except for the order in which intensities are summed.
+    Shut the worker processes down with close(), or use the engine as a context manager.
+
+    :param numShards: The number of worker processes, the number of CPUs when omitted.
+    :type numShards: int or None
+
+    :param engineClass: The engine each shard runs, e.g. Gamygdala or vectorized.ArrayGamygdala.
+    :type engineClass: type
+
+    :param maxBatch: The number of queued commands that triggers sending them to the shards.
+    :type maxBatch: int
+
+    :param startMethod: The multiprocessing start method ('fork', 'spawn' or 'forkserver'), the platform's default when omitted.
+    :type startMethod: str or None
+
+    :param clock: The clock decayAll() measures the time passed with, see Gamygdala. The shards only decay by the times sent to them.
+    :type clock: clock.WallClock or clock.ManualClock or None
+    """
+    def __init__(self, numShards: Union[int, None] = None, engineClass: type = Gamygdala, maxBatch: int = 4096, startMethod: Union[str, None] = None, clock=None):
+        self.numShards = numShards if numShards is not None else (os.cpu_count() or 1)
+        self.engineClass = engineClass
+        self.maxBatch = maxBatch
+        #The agent names in registration order, the shard of each agent and the rows (into agentNames) of the agents of each shard.
+        self.agentNames: list[str] = []
+        self._agentShards: dict[str, int] = {}
+        self._shardRows: list[list[int]] = [[] for _ in range(self.numShards)]
+        #Goal name -> home shard, goal name -> the shards owning it, and agent name -> the shards holding relations to it.
+        self._goalHomes: dict[str, int] = {}
+        self._goalShards: dict[str, dict[int, None]] = {}
+        #Goal name -> the names of its owners, to send beliefs appraised for one owner of a common goal to the goal's home shard.
+        self._goalOwnerNames: dict[str, dict[str, None]] = {}
+        self._observerShards: dict[str, dict[int, None]] = {}
+        #The commands waiting to be sent to each shard, and whether any of them is an appraisal.
+        self._outboxes: list[list[tuple]] = [[] for _ in range(self.numShards)]
+        self._queued = 0
+        self._appraising = False
+        self.clock = clock if clock is not None else WallClock()
+        self.lastMillis = self.clock.now()
+        self.millisPassed = 0
+        self.lock = threading.RLock()
+        self.decayScheduler = None
+        context = multiprocessing.get_context(startMethod)
+        self._connections = []
+        self._processes = []
+        for shard in range(self.numShards):
+            connection, workerConnection = context.Pipe()
+            process = context.Process(target=_runShard, args=(workerConnection, shard, engineClass), name='gamygdala-shard-%d' % shard, daemon=True)
+            process.start()
+            workerConnection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def __enter__(self) -> 'ShardedGamygdala':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stops decay and the worker processes. Queued commands that were not sent yet are dropped.
+        """
+        self.stopDecay()
+        with self.lock:
+            for connection, process in zip(self._connections, self._processes):
+                if process.is_alive():
+                    connection.send([('stop',)])
+                connection.close()
+                process.join()
+            self._connections = []
+            self._processes = []
+
+    def createAgent(self, agentName: str, shard: Union[int, None] = None) -> Union[int, None]:
+        """
+        Creates an agent on a shard. Put agents that have relations with each other on the same shard where possible, so that appraisal needs few events between shards.
+
+        :param agentName: The name of the agent, which has to be unique.
+        :type agentName: str
+
+        :param shard: The shard to put the agent on, by default agents are spread round robin.
+        :type shard: int or None
+
+        :return: The shard of the agent, or None if an agent with that name exists already.
+        :rtype: int or None
+        """
+        with self.lock:
+            if agentName in self._agentShards:
+                print('Error: an agent with name ', agentName, ' exists already')
+                return None
+            if shard is None:
+                shard = len(self.agentNames) % self.numShards
+            assert 0 <= shard < self.numShards, 'Error: shard must be between 0 and numShards'
+            self._settleAppraisals()
+            self._agentShards[agentName] = shard
+            self._shardRows[shard].append(len(self.agentNames))
+            self.agentNames.append(agentName)
+            self._post(shard, ('createAgent', agentName))
+            return shard
+
+    def getShard(self, agentName: str) -> Union[int, None]:
+        """
+        The shard an agent lives on, or None if there is no agent with that name.
+        """
+        return self._agentShards.get(agentName)
+
+    def createGoalForAgent(self, agentName: str, goalName: str, goalUtility: float, isMaintenanceGoal: bool = False):
+        """
+        Creates a goal for an agent, see Gamygdala.createGoalForAgent(). Goals with the same name are common goals, as with Gamygdala.
+        """
+        with self.lock:
+            shard = self._agentShards.get(agentName)
+            if shard is None:
+                print("Error: agent with name ", agentName ," does not exist, so I cannot add a create a goal for it.")
+                return
+            self._settleAppraisals()
+            self._post(shard, ('createGoalForAgent', agentName, goalName, goalUtility, isMaintenanceGoal))
+            home = self._goalHomes.setdefault(goalName, shard)
+            self._goalOwnerNames.setdefault(goalName, {})[agentName] = None
+            shards = self._goalShards.setdefault(goalName, {})
+            if shard not in shards:
+                shards[shard] = None
+                if shard != home:
+                    self._post(home, ('addRemoteOwnerShard', goalName, shard))
+            if isMaintenanceGoal and shard != home:
+                #The likelihood of a common goal is kept by its home shard.
+                self._post(home, ('setMaintenanceGoal', goalName))
+
+    def createRelation(self, sourceName: str, targetName: str, relation: float):
+        """
+        Creates (or updates) the relation of one agent to another, see Gamygdala.createRelation().
+        """
+        with self.lock:
+            sourceShard = self._agentShards.get(sourceName)
+            targetShard = self._agentShards.get(targetName)
+            if sourceShard is None or targetShard is None or relation < -1 or relation > 1:
+                print('Error: cannot relate ', sourceName, '  to ', targetName ,' with intensity ', relation)
+                return
+            self._settleAppraisals()
+            self._post(sourceShard, ('updateRelation', sourceName, targetName, relation))
+            observerShards = self._observerShards.setdefault(targetName, {})
+            if sourceShard not in observerShards:
+                observerShards[sourceShard] = None
+                if sourceShard != targetShard:
+                    self._post(targetShard, ('addRemoteObserverShard', targetName, sourceShard))
+
+    def appraiseBelief(self, likelihood: float, causalAgentName: str, affectedGoalNames: list[str], goalCongruences: list[float], isIncremental: bool = True):
+        """
+        Queues a belief for appraisal by all agents, see Gamygdala.appraiseBelief() for the parameters.
+        """
+        self.appraise(Belief(likelihood, causalAgentName, affectedGoalNames, goalCongruences, isIncremental))
+
+    def appraise(self, belief: Belief, affectedAgentName: Union[str, None] = None) -> Union[bool, None]:
+        """
+        Queues a belief for appraisal, see Gamygdala.appraise(). Every affected goal is sent to its home shard, which keeps its likelihood.
+
+        :param belief: The current event to be appraised.
+        :type belief: Belief
+
+        :param affectedAgentName: The name of the only agent that needs to appraise the event, using its own goals, see Gamygdala.appraise().
+        :type affectedAgentName: str or None
+
+        :return: False if the belief cannot be appraised.
+        :rtype: bool or None
+        """
+        with self.lock:
+            if not (len(belief.goalCongruences) == len(belief.affectedGoalNames)):
+                print("Error: the congruence list was not of the same length as the affected goal list")
+                return False
+            if affectedAgentName is None:
+                if not self._goalHomes:
+                    print("Warning: no goals registered to Gamygdala, all goals to be considered in appraisal need to be registered.")
+                    return False
+                for goalName, congruence in zip(belief.affectedGoalNames, belief.goalCongruences):
+                    home = self._goalHomes.get(goalName)
+                    if home is not None:
+                        self._post(home, ('appraiseGoal', goalName, congruence, belief.likelihood, belief.isIncremental, belief.causalAgentName))
+            else:
+                shard = self._agentShards.get(affectedAgentName)
+                if shard is None:
+                    print('Warning: agent ', affectedAgentName, ' not found')
+                    return False
+                for goalName, congruence in zip(belief.affectedGoalNames, belief.goalCongruences):
+                    home = self._goalHomes.get(goalName)
+                    if home is not None and home != shard and affectedAgentName in self._goalOwnerNames[goalName]:
+                        #The home shard changes the likelihood of the common goal and sends the result to the agent's shard.
+                        self._post(home, ('appraiseGoalForOwner', affectedAgentName, shard, goalName, congruence, belief.likelihood, belief.isIncremental, belief.causalAgentName))
+                    else:
+                        self._post(shard, ('appraiseAgentGoal', affectedAgentName, goalName, congruence, belief.likelihood, belief.isIncremental, belief.causalAgentName))
+            self._appraising = True
+            if self._queued >= self.maxBatch:
+                self.flush()
+
+    def setGain(self, gain: float):
+        """
+        Sets the gain of all agents, see Gamygdala.setGain().
+        """
+        assert gain > 0 and gain  <= 20, 'Error: gain factor for appraisal integration must be between 0 and 20'
+        with self.lock:
+            self._settleAppraisals()
+            self._broadcast(('setGain', gain))
+
+    def setDecay(self, decayFactor: float, decayFunction: callable):
+        """
+        Sets the decay factor and function of all shards, see Gamygdala.setDecay().
+        The decay function is passed to the shards by name, so it has to be Gamygdala.linearDecay or Gamygdala.exponentialDecay (of any instance).
+        """
+        name = decayFunction.__name__
+        assert name in ('linearDecay', 'exponentialDecay'), 'Error: the decay function of a sharded engine must be linearDecay or exponentialDecay'
+        with self.lock:
+            self._settleAppraisals()
+            self._broadcast(('setDecay', decayFactor, name))
+
+    def setDecayPolicy(self, policy: 'DecayPolicy'):
+        """
+        Sets the decay policy of all shards, see Gamygdala.setDecayPolicy(). The policy is pickled to the shards, so its class has to be importable by them.
+        """
+        with self.lock:
+            self._settleAppraisals()
+            self._broadcast(('setDecayPolicy', policy))
+
+    def setDecayGroup(self, agentName: str, group):
+        """
+        Puts an agent in a group of the decay policy, see Gamygdala.setDecayGroup().
+        """
+        with self.lock:
+            shard = self._agentShards.get(agentName)
+            if shard is None:
+                print('Warning: agent ', agentName, ' not found')
+                return
+            self._settleAppraisals()
+            self._post(shard, ('setDecayGroup', agentName, group))
+
+    def setLazyDecay(self, lazyDecay: bool):
+        """
+        Switches lazy decay on or off for all shards, see Gamygdala.setLazyDecay().
+        """
+        with self.lock:
+            self._settleAppraisals()
+            self._broadcast(('setLazyDecay', lazyDecay))
+
+    def decayAll(self, millisPassed: Union[float, None] = None):
+        """
+        Decays all agents on all shards, see Gamygdala.decayAll(). The beliefs queued so far are appraised before decay.
+
+        :param millisPassed: The time to decay for in milliseconds, by default the time passed on the clock since the last call.
+        :type millisPassed: float
+        """
+        with self.lock:
+            now = self.clock.now()
+            if millisPassed is None:
+                millisPassed = now - self.lastMillis
+            self.millisPassed = millisPassed
+            self.lastMillis = now
+            self._settleAppraisals()
+            self._broadcast(('decayAll', millisPassed))
+
+    def step(self, millis: float):
+        """
+        Advances the simulation by a fixed time step, see Gamygdala.step().
+        """
+        with self.lock:
+            advance = getattr(self.clock, 'advance', None)
+            if advance is not None:
+                advance(millis)
+            self.decayAll(millis)
+
+    def startDecay(self, timeMS: int) -> DecayScheduler:
+        """
+        Calls decayAll() every timeMS milliseconds from a background thread, see Gamygdala.startDecay().
+        """
+        if self.decayScheduler is None:
+            self.decayScheduler = DecayScheduler(self, timeMS)
+        elif self.decayScheduler.timeMS != timeMS:
+            self.decayScheduler.stop()
+            self.decayScheduler = DecayScheduler(self, timeMS)
+        self.decayScheduler.start()
+        return self.decayScheduler
+
+    def stopDecay(self):
+        """
+        Stops the decay process started with startDecay().
+        """
+        if self.decayScheduler is not None:
+            self.decayScheduler.stop()
+
+    def flush(self):
+        """
+        Sends all queued commands to the shards and waits until they, and the events they cause on other shards, are processed.
+        """
+        with self.lock:
+            outboxes = self._outboxes
+            self._outboxes = [[] for _ in range(self.numShards)]
+            self._queued = 0
+            self._appraising = False
+            while any(outboxes):
+                results = self._exchange(outboxes)
+                outboxes = [[] for _ in range(self.numShards)]
+                for replies, outgoing in results.values():
+                    for shard, events in outgoing.items():
+                        outboxes[shard].extend(events)
+
+    def getEmotionalState(self, agentName: str, useGain: bool = True) -> Union[list[Emotion], None]:
+        """
+        The emotional state of an agent, see Agent.getEmotionalState().
+
+        :return: The agent's emotions, or None if the agent does not exist.
+        :rtype: list[Emotion] or None
+        """
+        with self.lock:
+            shard = self._agentShards.get(agentName)
+            if shard is None:
+                return None
+            return [Emotion(name, intensity) for name, intensity in self._call(shard, ('getEmotionalState', agentName, useGain))]
+
+    def getPADState(self, agentName: str, useGain: bool = True) -> Union[list[float], None]:
+        """
+        The PAD state of an agent, see Agent.getPADState().
+
+        :return: Pleasure, Arousal and Dominance, or None if the agent does not exist.
+        :rtype: list[float] or None
+        """
+        with self.lock:
+            shard = self._agentShards.get(agentName)
+            if shard is None:
+                return None
+            return self._call(shard, ('getPADState', agentName, useGain))
+
+    def getPADStates(self, useGain: bool = True):
+        """
+        The PAD state of all agents, in the order of agentNames, see Gamygdala.getPADStates(). This needs NumPy.
+
+        :return: An (n_agents, 3) array with Pleasure, Arousal and Dominance columns.
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+        with self.lock:
+            self.flush()
+            results = self._exchange([[('getPADStates', useGain)] for _ in range(self.numShards)])
+            PAD = np.zeros((len(self.agentNames), 3))
+            for shard, (replies, outgoing) in results.items():
+                if self._shardRows[shard]:
+                    PAD[self._shardRows[shard]] = replies[0]
+            return PAD
+
+    def _post(self, shard: int, command: tuple):
+        self._outboxes[shard].append(command)
+        self._queued += 1
+
+    def _broadcast(self, command: tuple):
+        for shard in range(self.numShards):
+            self._post(shard, command)
+
+    def _settleAppraisals(self):
+        #Commands that change the world or decay it must not overtake the events of the beliefs queued before them, which are only created while flushing.
+        if self._appraising:
+            self.flush()
+
+    def _call(self, shard: int, command: tuple):
+        #Processes everything queued, then runs one get... command on a shard and returns its result.
+        self.flush()
+        messages = [[] for _ in range(self.numShards)]
+        messages[shard].append(command)
+        return self._exchange(messages)[shard][0][0]
+
+    def _exchange(self, messages: list[list[tuple]]) -> dict[int, tuple[list, dict[int, list[tuple]]]]:
+        #Sends the command lists to their shards, which work on them in parallel, then collects the replies and outgoing events of all of them.
+        sent = [shard for shard in range(self.numShards) if messages[shard]]
+        for shard in sent:
+            self._connections[shard].send(messages[shard])
+        results = {}
+        error = None
+        for shard in sent:
+            replies, outgoing, shardError = self._connections[shard].recv()
+            results[shard] = (replies, outgoing)
+            if error is None:
+                error = shardError
+        if error is not None:
+            raise error
+        return results
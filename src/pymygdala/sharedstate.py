@@ -0,0 +1,238 @@
+"""
+Publishes the emotional state of all agents of an engine in shared memory, for other processes (renderers, analytics) to read without copying or calling into the engine.
+
+SharedEmotionState owns a multiprocessing.shared_memory block. Every publish() writes the intensities, gains and PAD
+states of all agents to it under a sequence lock, typically once per frame. SharedEmotionReader maps the block by name in
+another process: its arrays are zero-copy views, and snapshot() returns a consistent copy even while the engine publishes.
+
+The block is laid out as follows, all values little endian and 8 byte aligned, so it can also be read from other languages:
+
+- header, 8 int64: magic, layout version, sequence, capacity, agent count, number of emotions, publish count, reserved.
+- intensities, float64 (capacity, 16), columns ordered like concepts.EMOTION_NAMES, without gain.
+- gains, float64 (capacity,).
+- PAD, float64 (capacity, 3), Pleasure, Arousal and Dominance, gained or not (see SharedEmotionState).
+- names, (capacity,) fixed width byte strings of NAME_BYTES bytes, the UTF-8 encoded agent names, zero padded.
+
+The sequence is odd while a publish() is writing and even otherwise. A reader copies the data and checks that the sequence
+was even and did not change while copying, otherwise it tries again.
+
+This module requires NumPy (pip install pymygdala[numpy]).
+"""
+
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Union
+
+import numpy as np
+
+from pymygdala.concepts import NUM_EMOTIONS
+from pymygdala.engines import Gamygdala
+from pymygdala.vectorized import PAD_MATRIX, applyGain
+
+MAGIC = 0x47414d59
+LAYOUT_VERSION = 1
+NAME_BYTES = 64
+_HEADER_SIZE = 8
+#Indices into the header.
+_MAGIC, _LAYOUT, _SEQUENCE, _CAPACITY, _COUNT, _EMOTIONS, _PUBLISHES = range(7)
+
+def _blockSize(capacity: int) -> int:
+    return 8 * (_HEADER_SIZE + capacity * (NUM_EMOTIONS + 1 + 3)) + NAME_BYTES * capacity
+
+def _views(buffer, capacity: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    #The header, intensity, gain, PAD and name arrays on top of a shared memory buffer.
+    offset = 0
+    header = np.ndarray((_HEADER_SIZE,), dtype='<i8', buffer=buffer, offset=offset)
+    offset += header.nbytes
+    intensities = np.ndarray((capacity, NUM_EMOTIONS), dtype='<f8', buffer=buffer, offset=offset)
+    offset += intensities.nbytes
+    gains = np.ndarray((capacity,), dtype='<f8', buffer=buffer, offset=offset)
+    offset += gains.nbytes
+    PAD = np.ndarray((capacity, 3), dtype='<f8', buffer=buffer, offset=offset)
+    offset += PAD.nbytes
+    names = np.ndarray((capacity,), dtype='S%d' % NAME_BYTES, buffer=buffer, offset=offset)
+    return header, intensities, gains, PAD, names
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    #Attaches to an existing block without letting this process's resource tracker remove it when this process exits.
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        #Before Python 3.13 every attached block is registered with the resource tracker, which may be shared with the publishing process.
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+class SharedEmotionState:
+    """
+    Publishes the emotional state of the agents of an engine to a shared memory block, see the module documentation.
+    The block has room for a fixed number of agents, publish() raises a ValueError when the engine has more.
+    Works with Gamygdala and ArrayGamygdala, the latter copies its arrays in one go. With lazy decay, all agents are brought up to date first.
+
+    :param gamygdala: The engine to publish.
+    :type gamygdala: Gamygdala
+
+    :param capacity: The number of agents the block has room for, twice the current number of agents (at least 64) when omitted.
+    :type capacity: int or None
+
+    :param name: The name of the shared memory block, a random one when omitted. Readers need it, see the name attribute.
+    :type name: str or None
+
+    :param useGain: Whether the published PAD states are gained with each agent's gain (see Agent.getPADState).
+    :type useGain: bool
+    """
+    def __init__(self, gamygdala: Gamygdala, capacity: Union[int, None] = None, name: Union[str, None] = None, useGain: bool = True):
+        self.gamygdala = gamygdala
+        self.capacity = capacity if capacity is not None else max(64, 2 * len(gamygdala.agents))
+        self.useGain = useGain
+        self._block = shared_memory.SharedMemory(name, create=True, size=_blockSize(self.capacity))
+        self.name = self._block.name
+        self._header, self._intensities, self._gains, self._PAD, self._names = _views(self._block.buf, self.capacity)
+        self._header[:] = 0
+        self._header[_MAGIC] = MAGIC
+        self._header[_LAYOUT] = LAYOUT_VERSION
+        self._header[_CAPACITY] = self.capacity
+        self._header[_EMOTIONS] = NUM_EMOTIONS
+        self._namedCount = 0
+
+    def __enter__(self) -> 'SharedEmotionState':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def sequence(self) -> int:
+        return int(self._header[_SEQUENCE])
+
+    def publish(self):
+        """
+        Writes the current emotional state of all agents to the shared memory block, as one consistent snapshot for the readers.
+        """
+        gamygdala = self.gamygdala
+        with gamygdala.lock:
+            agents = gamygdala.agents
+            count = len(agents)
+            if count > self.capacity:
+                raise ValueError('Error: %d agents do not fit in a shared state with capacity %d' % (count, self.capacity))
+            header = self._header
+            header[_SEQUENCE] += 1
+            try:
+                intensities, gains = self._intensities[:count], self._gains[:count]
+                if hasattr(gamygdala, 'intensities'):
+                    #An ArrayGamygdala, whose state is in arrays already.
+                    gamygdala._settleAgents()
+                    intensities[:] = gamygdala.intensities
+                    gains[:] = gamygdala.gains
+                else:
+                    for row, agent in enumerate(agents):
+                        agent._settle()
+                        intensities[row] = agent.intensities
+                        gains[row] = agent.gain
+                PAD = self._PAD[:count]
+                np.matmul(intensities, PAD_MATRIX, out=PAD)
+                if self.useGain:
+                    PAD[:] = applyGain(PAD, gains[:, None])
+                #Agents are only ever added, so only new names need writing.
+                for row in range(self._namedCount, count):
+                    self._names[row] = agents[row].name.encode('utf-8')[:NAME_BYTES]
+                self._namedCount = count
+                header[_COUNT] = count
+                header[_PUBLISHES] += 1
+            finally:
+                header[_SEQUENCE] += 1
+
+    def close(self):
+        """
+        Closes and removes the shared memory block. Readers that are still attached keep their mapping until they close it.
+        """
+        if self._block is not None:
+            self._header = self._intensities = self._gains = self._PAD = self._names = None
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+class SharedEmotionReader:
+    """
+    Reads the emotional state published by a SharedEmotionState, in any process, see the module documentation.
+    The intensities, gains and PAD attributes are zero-copy views that change while the engine publishes, use snapshot() for a consistent copy.
+
+    :param name: The name of the shared memory block, see SharedEmotionState.name.
+    :type name: str
+    """
+    def __init__(self, name: str):
+        self._block = _attach(name)
+        header = np.ndarray((_HEADER_SIZE,), dtype='<i8', buffer=self._block.buf)
+        if header[_MAGIC] != MAGIC or header[_LAYOUT] != LAYOUT_VERSION or header[_EMOTIONS] != NUM_EMOTIONS:
+            self._block.close()
+            raise ValueError('Error: shared memory block ' + name + ' does not hold a Gamygdala emotional state of this version')
+        self.capacity = int(header[_CAPACITY])
+        self._header, self.intensities, self.gains, self.PAD, self._names = _views(self._block.buf, self.capacity)
+        self._agentNames: list[str] = []
+
+    def __enter__(self) -> 'SharedEmotionReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def sequence(self) -> int:
+        """
+        Changes with every publish, so a reader can skip frames that did not change.
+        """
+        return int(self._header[_SEQUENCE])
+
+    @property
+    def count(self) -> int:
+        """
+        The number of agents in the last publish, the rows of the arrays that are in use.
+        """
+        return int(self._header[_COUNT])
+
+    def snapshot(self, timeout: Union[float, None] = None) -> tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        A consistent copy of the published state, retried until no publish happened while copying.
+
+        :param timeout: The number of seconds to keep trying, None to try until it succeeds.
+        :type timeout: float or None
+
+        :return: The sequence of the snapshot, and the (count, 16) intensities, (count,) gains and (count, 3) PAD states.
+        :rtype: tuple[int, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        header = self._header
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sequence = int(header[_SEQUENCE])
+            if not sequence & 1:
+                count = int(header[_COUNT])
+                intensities = self.intensities[:count].copy()
+                gains = self.gains[:count].copy()
+                PAD = self.PAD[:count].copy()
+                if int(header[_SEQUENCE]) == sequence:
+                    return sequence, intensities, gains, PAD
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError('Error: no consistent snapshot of the shared emotional state within the timeout')
+            #Let the publishing process finish.
+            time.sleep(0)
+
+    def agentNames(self) -> list[str]:
+        """
+        The names of the published agents, row i of the arrays belongs to agentNames()[i].
+        """
+        count = self.count
+        for row in range(len(self._agentNames), count):
+            self._agentNames.append(bytes(self._names[row]).decode('utf-8', errors='replace'))
+        return self._agentNames[:count]
+
+    def close(self):
+        """
+        Unmaps the shared memory block, the arrays of this reader must not be used anymore.
+        """
+        if self._block is not None:
+            self._header = self.intensities = self.gains = self.PAD = self._names = None
+            self._block.close()
+            self._block = None
@@ -0,0 +1,591 @@
+"""
+Saves and restores the complete state of a Gamygdala engine, see Gamygdala.save() and Gamygdala.load().
+
+A snapshot file is columnar: every attribute of the agents, goals and relations is one array, so saving and loading do
+not go through an object per value, and the file can be memory mapped to inspect it without restoring an engine (see readSnapshot).
+The file consists of
+
+- 8 bytes magic (b'GAMYGSNP'), a little endian uint32 format version and a uint32 header length.
+- the header, UTF-8 encoded JSON with the engine settings and the name, dtype, shape and offset of every column.
+- the columns, each aligned to 64 bytes, offsets counting from the first aligned byte after the header.
+
+Per agent goals and relations are stored as CSR: agent.goalOffsets[i]:agent.goalOffsets[i+1] are the rows of agent i
+in agentGoal.goal, and likewise agent.relationOffsets for the relation columns. Strings are stored as one UTF-8 text column
+and the offsets of every string in characters.
+
+An incremental snapshot only holds the agents and goals that changed since the previous save() (or load()) of the same
+engine, plus the names of the snapshot it builds on. Loading it loads that chain of snapshots, so keep the base files.
+
+Loading creates the agents, the goals and the engine's indices in bulk, without registering agents one by one. The emotions,
+goals and relations of an agent are created from the columns when the agent is first used, and those of all remaining agents
+at once when the engine goes through all of them (e.g. the decayAll() of a Gamygdala without lazy decay, or save()).
+
+The decay policy is saved with its settings in the header (see decay.DecayPolicy.getSettings), and the decay group of every
+agent as its row in the header's list of groups.
+
+Not saved are the calculateLikelyhood functions of goals, custom decay functions (only linearDecay and exponentialDecay
+can be saved) and decay policies that are not registered, and the wall clock time of the last decay. Integer gains and utilities are restored as floats.
+This module requires NumPy (pip install pymygdala[numpy]).
+"""
+
+import gc
+import json
+import mmap
+import os
+import struct
+import uuid
+from itertools import repeat
+from typing import Union
+
+import numpy as np
+
+from pymygdala.agent import _RESTORED_ATTRIBUTES
+from pymygdala.concepts import Goal, NUM_EMOTIONS
+from pymygdala.decay import checkSavedGroup, decayPolicyFromSettings
+from pymygdala.engines import Gamygdala
+from pymygdala.vectorized import ArrayRelation
+
+MAGIC = b'GAMYGSNP'
+FORMAT_VERSION = 2
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGN = 64
+_DECAY_FUNCTIONS = ('exponentialDecay', 'linearDecay')
+#The per agent columns, and the per relation columns that share agent.relationOffsets.
+_AGENT_COLUMNS = ('agent.gain', 'agent.lastDecayTime', 'agent.intensities', 'agent.decayGroup')
+_RELATION_COLUMNS = ('relation.target', 'relation.like', 'relation.lastDecayTime', 'relation.intensities')
+_GOAL_COLUMNS = ('goal.utility', 'goal.likelihood', 'goal.maintenanceGoal', 'goal.registered')
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def _encodeStrings(columns: dict, prefix: str, strings: list[str]):
+    columns[prefix + '.text'] = np.frombuffer(''.join(strings).encode('utf-8'), dtype=np.uint8)
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in strings], out=offsets[1:])
+    columns[prefix + '.offsets'] = offsets
+
+def _decodeStrings(columns: dict, prefix: str) -> list[str]:
+    text = columns[prefix + '.text'].tobytes().decode('utf-8')
+    offsets = columns[prefix + '.offsets'].tolist()
+    return list(map(text.__getitem__, map(slice, offsets[:-1], offsets[1:])))
+
+def _offsets(counts: np.ndarray) -> np.ndarray:
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+def _segmentIndices(offsets: np.ndarray, selection: np.ndarray) -> np.ndarray:
+    #The element indices of the CSR segments of the selected rows, concatenated in selection order.
+    starts = offsets[selection]
+    lengths = offsets[selection + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    #arange(total) shifted per segment, so that every segment starts at its own offset.
+    return np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+
+def _segmentsDiffer(baseOffsets: np.ndarray, baseValues: list[np.ndarray], offsets: np.ndarray, values: list[np.ndarray]) -> np.ndarray:
+    #For the rows of the base, whether their CSR segments in values differ from those in baseValues.
+    rows = len(baseOffsets) - 1
+    counts = np.diff(offsets[:rows + 1])
+    differ = counts != np.diff(baseOffsets)
+    same = np.flatnonzero(~differ)
+    baseIndices, indices = _segmentIndices(baseOffsets, same), _segmentIndices(offsets, same)
+    changed = np.zeros(len(indices), dtype=bool)
+    for base, value in zip(baseValues, values):
+        different = value[indices] != base[baseIndices]
+        changed |= different.any(axis=1) if different.ndim > 1 else different
+    differ[np.repeat(same, counts[same])[changed]] = True
+    return differ
+
+def _mergeSegments(baseOffsets: np.ndarray, baseValues: list[np.ndarray], rows: np.ndarray, deltaOffsets: np.ndarray, deltaValues: list[np.ndarray], count: int) -> tuple[np.ndarray, list[np.ndarray]]:
+    #Replaces (or adds) the CSR segments of the given rows with those of a delta.
+    counts = np.zeros(count, dtype=np.int64)
+    counts[:len(baseOffsets) - 1] = np.diff(baseOffsets)
+    counts[rows] = np.diff(deltaOffsets)
+    offsets = _offsets(counts)
+    kept = np.ones(len(baseOffsets) - 1, dtype=bool)
+    kept[rows[rows < len(kept)]] = False
+    kept = np.flatnonzero(kept)
+    keptIndices, baseIndices, rowIndices = _segmentIndices(offsets, kept), _segmentIndices(baseOffsets, kept), _segmentIndices(offsets, rows)
+    merged = []
+    for base, delta in zip(baseValues, deltaValues):
+        values = np.empty((int(offsets[-1]),) + base.shape[1:], dtype=base.dtype)
+        values[keptIndices] = base[baseIndices]
+        values[rowIndices] = delta
+        merged.append(values)
+    return offsets, merged
+
+def _writeSnapshot(path: str, header: dict, columns: dict[str, np.ndarray]):
+    directory = {}
+    offset = 0
+    for name, column in columns.items():
+        directory[name] = [column.dtype.str, list(column.shape), offset]
+        offset = _aligned(offset + column.nbytes)
+    header['columns'] = directory
+    encoded = json.dumps(header).encode('utf-8')
+    start = _aligned(_PREAMBLE.size + len(encoded))
+    #Written next to the target and then renamed, so a crash never leaves a half written snapshot behind.
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        file.write(encoded)
+        for name, column in columns.items():
+            file.seek(start + directory[name][2])
+            file.write(np.ascontiguousarray(column).data)
+        file.truncate(start + offset)
+    os.replace(temporary, path)
+
+def readSnapshot(path: str) -> tuple[dict, dict[str, np.ndarray]]:
+    """
+    Memory maps one snapshot file, without restoring an engine.
+    For an incremental snapshot, this is only what changed, see the module documentation for the columns.
+
+    :param path: The snapshot file.
+    :type path: str
+
+    :return: The header and the read-only columns by name.
+    :rtype: tuple[dict, dict[str, numpy.ndarray]]
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < _PREAMBLE.size:
+            raise ValueError('Error: ' + path + ' is not a Gamygdala snapshot')
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, headerLength = _PREAMBLE.unpack_from(mapped)
+    if magic != MAGIC:
+        raise ValueError('Error: ' + path + ' is not a Gamygdala snapshot')
+    if version != FORMAT_VERSION:
+        raise ValueError('Error: ' + path + ' has snapshot format version %d, this version reads %d' % (version, FORMAT_VERSION))
+    header = json.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + headerLength].decode('utf-8'))
+    start = _aligned(_PREAMBLE.size + headerLength)
+    columns = {}
+    for name, (dtype, shape, offset) in header['columns'].items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        columns[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=start + offset).reshape(shape)
+    return header, columns
+
+def _gather(gamygdala: Gamygdala, base: Union[dict, None]) -> dict:
+    #Collects the state of the engine in columns. Goals, relation targets and decay groups keep the rows they had in the base.
+    gamygdala._restoreAgents()
+    agents = gamygdala.agents
+    goals = list(base['goals']) if base is not None else []
+    targetNames = list(base['targetNames']) if base is not None else []
+    decayGroups = list(base['decayGroups']) if base is not None else [None]
+    goalRows = {id(goal): row for row, goal in enumerate(goals)}
+    targetRows = {name: row for row, name in enumerate(targetNames)}
+    groupRows = {group: row for row, group in enumerate(decayGroups)}
+    for goal in gamygdala.goals:
+        if id(goal) not in goalRows:
+            goalRows[id(goal)] = len(goals)
+            goals.append(goal)
+    goalCounts = np.zeros(len(agents), dtype=np.int64)
+    relationCounts = np.zeros(len(agents), dtype=np.int64)
+    agentGroups = np.zeros(len(agents), dtype=np.int64)
+    agentGoals, relationTargets, relationLikes, relationDecay, relationIntensities = [], [], [], [], []
+    for row, agent in enumerate(agents):
+        groupRow = groupRows.get(agent.decayGroup)
+        if groupRow is None:
+            checkSavedGroup(agent.decayGroup)
+            groupRow = groupRows[agent.decayGroup] = len(decayGroups)
+            decayGroups.append(agent.decayGroup)
+        agentGroups[row] = groupRow
+        goalCounts[row] = len(agent.goals)
+        for goal in agent.goals:
+            goalRow = goalRows.get(id(goal))
+            if goalRow is None:
+                goalRow = goalRows[id(goal)] = len(goals)
+                goals.append(goal)
+            agentGoals.append(goalRow)
+        relationCounts[row] = len(agent.currentRelations)
+        for relation in agent.currentRelations:
+            targetRow = targetRows.get(relation.agentName)
+            if targetRow is None:
+                targetRow = targetRows[relation.agentName] = len(targetNames)
+                targetNames.append(relation.agentName)
+            relationTargets.append(targetRow)
+            relationLikes.append(relation.like)
+            relationDecay.append(relation.lastDecayTime)
+            relationIntensities.append(relation.intensities)
+    if hasattr(gamygdala, 'intensities'):
+        #An ArrayGamygdala, whose agent state is in arrays already.
+        intensities = gamygdala.intensities.copy()
+        gains = gamygdala.gains.copy()
+        lastDecay = gamygdala._lastDecay[:len(agents)].copy()
+    else:
+        intensities = np.array([agent.intensities for agent in agents], dtype=np.float64).reshape(len(agents), NUM_EMOTIONS)
+        gains = np.array([agent.gain for agent in agents], dtype=np.float64)
+        lastDecay = np.array([agent.lastDecayTime for agent in agents], dtype=np.float64)
+    registered = gamygdala._goalsByName
+    columns = {
+        'agent.gain': gains,
+        'agent.lastDecayTime': lastDecay,
+        'agent.intensities': intensities,
+        'agent.decayGroup': agentGroups,
+        'agent.goalOffsets': _offsets(goalCounts),
+        'agent.relationOffsets': _offsets(relationCounts),
+        'agentGoal.goal': np.array(agentGoals, dtype=np.int64),
+        'relation.target': np.array(relationTargets, dtype=np.int64),
+        'relation.like': np.array(relationLikes, dtype=np.float64),
+        'relation.lastDecayTime': np.array(relationDecay, dtype=np.float64),
+        'relation.intensities': np.array(relationIntensities, dtype=np.float64).reshape(len(relationTargets), NUM_EMOTIONS),
+        'goal.utility': np.array([goal.utility for goal in goals], dtype=np.float64),
+        'goal.likelihood': np.array([goal.likelihood for goal in goals], dtype=np.float64),
+        'goal.maintenanceGoal': np.array([bool(goal.maintenanceGoal) for goal in goals], dtype=np.uint8),
+        'goal.registered': np.array([registered.get(goal.name) is goal for goal in goals], dtype=np.uint8),
+    }
+    return {'columns': columns, 'agentNames': [agent.name for agent in agents], 'goals': goals, 'targetNames': targetNames, 'decayGroups': decayGroups}
+
+def _engineHeader(gamygdala: Gamygdala) -> dict:
+    decayFunction = getattr(gamygdala.decayFunction, '__name__', None)
+    if decayFunction not in _DECAY_FUNCTIONS or getattr(gamygdala, decayFunction) != gamygdala.decayFunction:
+        raise ValueError('Error: only the linearDecay and exponentialDecay functions of the engine can be saved in a snapshot')
+    return {
+        'engine': type(gamygdala).__name__,
+        'decayFunction': decayFunction,
+        'decayFactor': gamygdala.decayFactor,
+        'decayPolicy': None if gamygdala.decayPolicy is None else gamygdala.decayPolicy.getSettings(),
+        'decayTime': gamygdala.decayTime,
+        'millisPassed': gamygdala.millisPassed,
+        'lazyDecay': gamygdala.lazyDecay,
+        'debug': gamygdala.debug,
+    }
+
+def saveSnapshot(gamygdala: Gamygdala, path: str, incremental: bool = False):
+    """
+    Saves the complete state of an engine, see Gamygdala.save().
+
+    :param gamygdala: The engine to save.
+    :type gamygdala: Gamygdala
+
+    :param path: The snapshot file to write, replaced when it exists.
+    :type path: str
+
+    :param incremental: Whether to save only what changed since the last save() or load() of this engine.
+    :type incremental: bool
+    """
+    base = gamygdala._snapshot
+    if incremental and base is None:
+        raise ValueError('Error: an incremental snapshot needs a previous save() or load() of this engine to build on')
+    if incremental and os.path.abspath(path) == os.path.abspath(base['path']):
+        raise ValueError('Error: an incremental snapshot cannot replace the snapshot it builds on')
+    header = _engineHeader(gamygdala)
+    header['id'] = uuid.uuid4().hex
+    state = _gather(gamygdala, base if incremental else None)
+    columns = state['columns']
+    header['agentCount'] = len(state['agentNames'])
+    header['goalCount'] = len(state['goals'])
+    header['targetCount'] = len(state['targetNames'])
+    #All groups are in every header, there are few of them.
+    header['decayGroups'] = state['decayGroups']
+    if not incremental:
+        header['base'] = None
+        written = dict(columns)
+        _encodeStrings(written, 'agent.name', state['agentNames'])
+        _encodeStrings(written, 'goal.name', [goal.name for goal in state['goals']])
+        _encodeStrings(written, 'target.name', state['targetNames'])
+    else:
+        header['base'] = os.path.relpath(os.path.abspath(base['path']), os.path.dirname(os.path.abspath(path)))
+        header['baseId'] = base['id']
+        old = base['columns']
+        oldAgents, oldGoals, oldTargets = len(old['agent.gain']), len(old['goal.utility']), len(base['targetNames'])
+        changed = np.ones(header['agentCount'], dtype=bool)
+        changed[:oldAgents] = (columns['agent.gain'][:oldAgents] != old['agent.gain']) | (columns['agent.lastDecayTime'][:oldAgents] != old['agent.lastDecayTime']) | (columns['agent.intensities'][:oldAgents] != old['agent.intensities']).any(axis=1) | (columns['agent.decayGroup'][:oldAgents] != old['agent.decayGroup'])
+        changed[:oldAgents] |= _segmentsDiffer(old['agent.goalOffsets'], [old['agentGoal.goal']], columns['agent.goalOffsets'], [columns['agentGoal.goal']])
+        changed[:oldAgents] |= _segmentsDiffer(old['agent.relationOffsets'], [old[name] for name in _RELATION_COLUMNS], columns['agent.relationOffsets'], [columns[name] for name in _RELATION_COLUMNS])
+        rows = np.flatnonzero(changed)
+        goalChanged = np.ones(header['goalCount'], dtype=bool)
+        goalChanged[:oldGoals] = np.zeros(oldGoals, dtype=bool)
+        for name in _GOAL_COLUMNS:
+            goalChanged[:oldGoals] |= columns[name][:oldGoals] != old[name]
+        goalRows = np.flatnonzero(goalChanged)
+        written = {'agent.rows': rows, 'goal.rows': goalRows}
+        for name in _AGENT_COLUMNS:
+            written[name] = columns[name][rows]
+        for name in _GOAL_COLUMNS:
+            written[name] = columns[name][goalRows]
+        for offsetsName, names in (('agent.goalOffsets', ('agentGoal.goal',)), ('agent.relationOffsets', _RELATION_COLUMNS)):
+            offsets = columns[offsetsName]
+            written[offsetsName] = _offsets(offsets[rows + 1] - offsets[rows])
+            indices = _segmentIndices(offsets, rows)
+            for name in names:
+                written[name] = columns[name][indices]
+        #Agents, goals and targets are only ever added, so only the new ones need their names written.
+        _encodeStrings(written, 'agent.name', state['agentNames'][oldAgents:])
+        _encodeStrings(written, 'goal.name', [goal.name for goal in state['goals'][oldGoals:]])
+        _encodeStrings(written, 'target.name', state['targetNames'][oldTargets:])
+    _writeSnapshot(path, header, written)
+    state['path'] = path
+    state['id'] = header['id']
+    gamygdala._snapshot = state
+
+def _resolve(path: str) -> tuple[dict, dict]:
+    #Reads a snapshot and the chain of snapshots it builds on, into the header and the full columns and names.
+    header, written = readSnapshot(path)
+    if header['base'] is None:
+        columns = {name: written[name] for name in _AGENT_COLUMNS + _RELATION_COLUMNS + _GOAL_COLUMNS + ('agent.goalOffsets', 'agent.relationOffsets', 'agentGoal.goal')}
+        return header, {'columns': columns, 'agentNames': _decodeStrings(written, 'agent.name'), 'goalNames': _decodeStrings(written, 'goal.name'), 'targetNames': _decodeStrings(written, 'target.name'), 'decayGroups': header['decayGroups']}
+    basePath = os.path.join(os.path.dirname(os.path.abspath(path)), header['base'])
+    baseHeader, base = _resolve(basePath)
+    if baseHeader['id'] != header['baseId']:
+        raise ValueError('Error: ' + basePath + ' is not the snapshot that ' + path + ' builds on, it was replaced')
+    old = base['columns']
+    columns = {}
+    rows = written['agent.rows']
+    for name in _AGENT_COLUMNS:
+        column = np.empty((header['agentCount'],) + old[name].shape[1:], dtype=old[name].dtype)
+        column[:len(old[name])] = old[name]
+        column[rows] = written[name]
+        columns[name] = column
+    columns['agent.goalOffsets'], (columns['agentGoal.goal'],) = _mergeSegments(old['agent.goalOffsets'], [old['agentGoal.goal']], rows, written['agent.goalOffsets'], [written['agentGoal.goal']], header['agentCount'])
+    columns['agent.relationOffsets'], relationColumns = _mergeSegments(old['agent.relationOffsets'], [old[name] for name in _RELATION_COLUMNS], rows, written['agent.relationOffsets'], [written[name] for name in _RELATION_COLUMNS], header['agentCount'])
+    columns.update(zip(_RELATION_COLUMNS, relationColumns))
+    goalRows = written['goal.rows']
+    for name in _GOAL_COLUMNS:
+        column = np.empty(header['goalCount'], dtype=old[name].dtype)
+        column[:len(old[name])] = old[name]
+        column[goalRows] = written[name]
+        columns[name] = column
+    return header, {
+        'columns': columns,
+        'agentNames': base['agentNames'] + _decodeStrings(written, 'agent.name'),
+        'goalNames': base['goalNames'] + _decodeStrings(written, 'goal.name'),
+        'targetNames': base['targetNames'] + _decodeStrings(written, 'target.name'),
+        'decayGroups': header['decayGroups'],
+    }
+
+def loadSnapshot(path: str, engineClass: type = Gamygdala) -> Gamygdala:
+    """
+    Restores an engine saved with saveSnapshot(), see Gamygdala.load().
+
+    :param path: The snapshot file, a full or an incremental one.
+    :type path: str
+
+    :param engineClass: The engine to restore into, e.g. Gamygdala or vectorized.ArrayGamygdala.
+    :type engineClass: type
+
+    :return: The restored engine.
+    :rtype: Gamygdala
+    """
+    header, state = _resolve(path)
+    #Restoring creates an object per agent, goal and relation, which would trigger many useless garbage collections.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        gamygdala = _build(header, state, engineClass)
+    finally:
+        if collecting:
+            gc.enable()
+    #The loaded state is the base of the next incremental save(). Its columns may be memory mapped, but snapshot files are only ever replaced, never changed.
+    gamygdala._snapshot = {'path': path, 'id': header['id'], 'columns': state['columns'], 'agentNames': state['agentNames'], 'goals': state['goals'], 'targetNames': state['targetNames'], 'decayGroups': state['decayGroups']}
+    return gamygdala
+
+class _RestoredIndex(dict):
+    #An index like Gamygdala._relationHolders ({name: {agent: None}}) of a restored engine, whose entries are created from the snapshot the first time their name is looked up.
+    #Only lookups by name (get, setdefault and []) see the entries that were not created yet, which is how the engines use their indices.
+    def __init__(self, names: list[str], keys: np.ndarray, holderRows: np.ndarray, agents: list):
+        #keys are the rows in names of the entries (e.g. the relations in the snapshot), a name that is in names more than once by its last row, and holderRows the rows of the agents holding them.
+        super().__init__()
+        self._names = names
+        self._keys = keys
+        self._holderRows = holderRows
+        self._agents = agents
+        #The rows of the names whose entries were not created yet, and where the entries of each name end in the holder rows sorted by key, made by the first lookup.
+        self._pending = None
+        self._ends = None
+
+    def __missing__(self, name: str) -> dict:
+        holders = self._take(name)
+        if holders is None:
+            raise KeyError(name)
+        return holders
+
+    def get(self, name: str, default=None):
+        holders = dict.get(self, name)
+        if holders is None:
+            holders = self._take(name)
+        return default if holders is None else holders
+
+    def setdefault(self, name: str, default=None):
+        holders = self.get(name)
+        return dict.setdefault(self, name, default) if holders is None else holders
+
+    def _take(self, name: str) -> Union[dict, None]:
+        #Creates the entry of a name once, an entry removed later is not created again.
+        if self._pending is None:
+            self._pending = dict(zip(self._names, range(len(self._names))))
+            keys = self._keys
+            #Per name the agents keep the order of the entries, which is the order registerAgent would have indexed them in.
+            #Entries are usually sorted already, e.g. the goals of a snapshot saved from a world whose agents each have their own goals.
+            if not np.all(keys[1:] >= keys[:-1]):
+                self._holderRows = self._holderRows[np.argsort(keys, kind='stable')]
+            self._ends = np.cumsum(np.bincount(keys, minlength=len(self._names)))
+        key = self._pending.pop(name, None)
+        if key is None:
+            return None
+        start = self._ends[key - 1] if key > 0 else 0
+        holders = dict.fromkeys(map(self._agents.__getitem__, self._holderRows[start:self._ends[key]].tolist()))
+        if not holders:
+            return None
+        self[name] = holders
+        return holders
+
+class _Restore:
+    #Gives an agent restored by loadSnapshot its emotions, goals and relations from the snapshot's columns the first time they are used (see Agent.__getattr__), so that loading does not create an object per goal and relation of every agent.
+    #For an ArrayGamygdala the emotions are in the engine's arrays already, and the relations keep the rows they have in the snapshot.
+    def __init__(self, gamygdala: Gamygdala, goals: list[Goal], columns: dict, targetNames: list[str]):
+        self.gamygdala = gamygdala
+        #The class of the restored agents, whose _newRelation makes their relations.
+        self.agentClass = gamygdala.agentClass
+        self.goals = goals
+        self.targetNames = targetNames
+        self.columns = columns
+        self.goalOffsets = columns['agent.goalOffsets'].tolist()
+        self.relationOffsets = columns['agent.relationOffsets'].tolist()
+
+    def restoreAll(self):
+        #Restores all agents that were not restored yet, see Gamygdala._restoreAgents. Their entries are taken from the columns at once, which is much cheaper than per agent.
+        with self.gamygdala.lock:
+            agents = [agent for agent in self.gamygdala.agents if agent.__dict__.get('_restore') is self]
+            rows = np.array([agent.__dict__['_restoreRow'] for agent in agents], dtype=np.int64)
+            goalOffsets = self.columns['agent.goalOffsets']
+            relationOffsets = self.columns['agent.relationOffsets']
+            #Like loading, this creates many objects that would trigger many useless garbage collections.
+            collecting = gc.isenabled()
+            gc.disable()
+            try:
+                self._restore(agents, rows, _segmentIndices(goalOffsets, rows), (goalOffsets[rows + 1] - goalOffsets[rows]).tolist(), _segmentIndices(relationOffsets, rows), (relationOffsets[rows + 1] - relationOffsets[rows]).tolist())
+            finally:
+                if collecting:
+                    gc.enable()
+            self.gamygdala._restore = None
+
+    def restoreAgent(self, agent):
+        with self.gamygdala.lock:
+            if '_restore' not in agent.__dict__:
+                #Restored by another thread in the meantime.
+                return
+            row = agent.__dict__['_restoreRow']
+            goalStart, goalEnd = self.goalOffsets[row], self.goalOffsets[row + 1]
+            relationStart, relationEnd = self.relationOffsets[row], self.relationOffsets[row + 1]
+            self._restore([agent], slice(row, row + 1), slice(goalStart, goalEnd), [goalEnd - goalStart], slice(relationStart, relationEnd), [relationEnd - relationStart])
+
+    def _restore(self, agents: list, rows, goalEntries, goalCounts: list[int], relationEntries, relationCounts: list[int]):
+        #rows, goalEntries and relationEntries select the agents and their goals and relations (goalCounts and relationCounts per agent) in the columns, in the order of the agents, as a slice or an index array.
+        columns = self.columns
+        goals = list(map(self.goals.__getitem__, columns['agentGoal.goal'][goalEntries].tolist()))
+        targetNames = list(map(self.targetNames.__getitem__, columns['relation.target'][relationEntries].tolist()))
+        likes = columns['relation.like'][relationEntries].tolist()
+        if hasattr(self.gamygdala, 'intensities'):
+            agentIntensities = repeat(None)
+            #Attached relations do not use the buffers ArrayRelation.__init__ would make.
+            relations = list(map(ArrayRelation.__new__, repeat(ArrayRelation, len(targetNames))))
+            relationRows = range(relationEntries.start, relationEntries.stop) if isinstance(relationEntries, slice) else relationEntries.tolist()
+            for relation, targetName, like, relationRow in zip(relations, targetNames, likes, relationRows):
+                relation.agentName = targetName
+                relation.like = like
+                relation._lastDecayBuffer = 0.0
+                relation._engine = self.gamygdala
+                relation._row = relationRow
+                relation._buffer = None
+        else:
+            agentIntensities = columns['agent.intensities'][rows].tolist()
+            holders = [agent for agent, relationCount in zip(agents, relationCounts) for _ in range(relationCount)]
+            relations = list(map(self.agentClass._newRelation, holders, targetNames, likes))
+            for relation, intensities, lastDecayTime in zip(relations, columns['relation.intensities'][relationEntries].tolist(), columns['relation.lastDecayTime'][relationEntries].tolist()):
+                relation._intensities = intensities
+                relation.lastDecayTime = lastDecayTime
+        goalEnd = relationEnd = 0
+        for agent, intensities, goalCount, relationCount in zip(agents, agentIntensities, goalCounts, relationCounts):
+            goalStart, goalEnd = goalEnd, goalEnd + goalCount
+            relationStart, relationEnd = relationEnd, relationEnd + relationCount
+            agentGoals = goals[goalStart:goalEnd]
+            goalsByName = {}
+            for goal in agentGoals:
+                goalsByName.setdefault(goal.name, goal)
+            agentRelations = relations[relationStart:relationEnd]
+            state = agent.__dict__
+            state.update(_intensities=intensities, goals=agentGoals, _goalsByName=goalsByName, currentRelations=agentRelations, _relationsByName=dict(zip(targetNames[relationStart:relationEnd], agentRelations)))
+            del state['_restore'], state['_restoreRow']
+
+def _build(header: dict, state: dict, engineClass: type) -> Gamygdala:
+    #Creates the engine without registering agents one by one: the agents, the engine's indices and (for an ArrayGamygdala) the arrays are built in bulk.
+    #The goals and relations of every agent are created when the agent is first used, see _Restore.
+    columns = state['columns']
+    gamygdala = engineClass()
+    gamygdala.setDecay(header['decayFactor'], getattr(gamygdala, header['decayFunction']))
+    if header['decayPolicy'] is not None:
+        gamygdala.setDecayPolicy(decayPolicyFromSettings(header['decayPolicy']))
+    gamygdala.decayTime = header['decayTime']
+    gamygdala.millisPassed = header['millisPassed']
+    gamygdala.debug = header['debug']
+
+    goals = state['goals'] = list(map(Goal, state['goalNames'], columns['goal.utility'].tolist(), map(bool, columns['goal.maintenanceGoal'].tolist())))
+    for goal, likelihood in zip(goals, columns['goal.likelihood'].tolist()):
+        goal.likelihood = likelihood
+    #Registered goals have unique names, so they are registered in one go (see registerGoal).
+    registeredRows = np.flatnonzero(columns['goal.registered']).tolist()
+    gamygdala.goals.extend(map(goals.__getitem__, registeredRows))
+    gamygdala._goalsByName.update(zip(map(state['goalNames'].__getitem__, registeredRows), gamygdala.goals))
+
+    names = state['agentNames']
+    decayGroups = state['decayGroups']
+    groups = [decayGroups[row] for row in columns['agent.decayGroup'].tolist()]
+    restore = _Restore(gamygdala, goals, columns, state['targetNames'])
+    agentClass = gamygdala.agentClass
+    #The attributes agentClass.__init__ gives an agent, less those the restore creates.
+    template = agentClass().__dict__
+    for name in _RESTORED_ATTRIBUTES:
+        del template[name]
+    template.update(gamygdalaInstance=gamygdala, _restore=restore)
+    gamygdala._restore = restore
+    agents = list(map(agentClass.__new__, repeat(agentClass, len(names))))
+    if hasattr(gamygdala, 'intensities'):
+        template.update(_engine=gamygdala, _buffer=None)
+        for row, (agent, name, group) in enumerate(zip(agents, names, groups)):
+            agent.__dict__ = dict(template, name=name, decayGroup=group, _row=row, _restoreRow=row)
+    else:
+        for row, (agent, name, group, gain, lastDecayTime) in enumerate(zip(agents, names, groups, columns['agent.gain'].tolist(), columns['agent.lastDecayTime'].tolist())):
+            agent.__dict__ = dict(template, name=name, decayGroup=group, gain=gain, lastDecayTime=lastDecayTime, _restoreRow=row)
+    gamygdala.agents.extend(agents)
+    agentsByName = dict(zip(names, agents))
+    if len(agentsByName) < len(agents):
+        #Like registerAgent, the first agent of a name is the one found by name.
+        agentsByName = {}
+        for name, agent in zip(names, agents):
+            agentsByName.setdefault(name, agent)
+    gamygdala._agentsByName.update(agentsByName)
+
+    #Goals are indexed by name. Registered goals have unique names, goals of the same name (which can only be unregistered ones) are indexed by the row of the last of them.
+    goalNames = state['goalNames']
+    goalRows = columns['agentGoal.goal']
+    if len(registeredRows) < len(goalNames):
+        nameRows = dict(zip(goalNames, range(len(goalNames))))
+        goalRows = np.array(list(map(nameRows.__getitem__, goalNames)), dtype=np.int64)[goalRows]
+    goalOwners = np.repeat(np.arange(len(agents)), np.diff(columns['agent.goalOffsets']))
+    gamygdala._goalOwners = _RestoredIndex(goalNames, goalRows, goalOwners, agents)
+    relationSources = np.repeat(np.arange(len(agents)), np.diff(columns['agent.relationOffsets']))
+    gamygdala._relationHolders = _RestoredIndex(state['targetNames'], columns['relation.target'], relationSources, agents)
+
+    if hasattr(gamygdala, 'intensities'):
+        agentCount = len(agents)
+        gamygdala._reserveAgents(agentCount)
+        gamygdala._intensity[:agentCount] = columns['agent.intensities']
+        gamygdala._gain[:agentCount] = columns['agent.gain']
+        gamygdala._lastDecay[:agentCount] = columns['agent.lastDecayTime']
+        groupIds = np.array([gamygdala._decayGroupId(group) for group in decayGroups], dtype=np.intp)
+        gamygdala._decayGroup[:agentCount] = groupIds[columns['agent.decayGroup']]
+        gamygdala._agentCount = agentCount
+        #The relations of agent i are rows agent.relationOffsets[i]:agent.relationOffsets[i+1], as in the snapshot.
+        relationCount = len(relationSources)
+        gamygdala._reserveRelations(relationCount)
+        gamygdala._relationIntensity[:relationCount] = columns['relation.intensities']
+        gamygdala._relationLastDecay[:relationCount] = columns['relation.lastDecayTime']
+        gamygdala._relationSource[:relationCount] = relationSources
+        #The target names of a snapshot are unique, so they keep their rows.
+        gamygdala.targetNames.extend(state['targetNames'])
+        gamygdala._targetIndex.update(zip(state['targetNames'], range(len(state['targetNames']))))
+        gamygdala._relationTarget[:relationCount] = columns['relation.target']
+        gamygdala._relationCount = relationCount
+    gamygdala.lazyDecay = header['lazyDecay']
+    return gamygdala
@@ -0,0 +1,180 @@
+"""
+Subscriptions to emotion thresholds and PAD regions, so game code hears about the moments that matter instead of polling every agent every frame.
+
+A subscription watches one agent: an emotion crossing a threshold (ThresholdSubscription), optionally the emotion the
+agent feels for another agent (a relation), or the agent's PAD state entering or leaving a region (PADSubscription).
+Subscriptions have hysteresis: a subscription that entered (the value rose above the threshold) only exits once the
+value falls below the threshold minus the hysteresis, so values hovering around a threshold do not fire every frame.
+
+The engine checks the subscriptions of the agents whose emotions changed at the end of every appraisal, and after
+decay the ones decay can change (decay only lowers intensities, so a threshold that was not reached cannot be reached
+by decay), see Gamygdala.subscribe(). Each crossing produces an EmotionEvent, passed to the
+subscription's callback or, without a callback, queued for Gamygdala.pollEvents(). Subscriptions are not part of
+snapshots or journals.
+"""
+
+from typing import Callable, Union
+
+from pymygdala.concepts import EMOTION_INDEX, EmotionType
+
+class EmotionEvent:
+    """
+    One crossing of a subscription.
+
+    :param subscription: The subscription that fired.
+    :type subscription: Subscription
+
+    :param entered: True when the value entered (rose above the threshold, or entered the PAD region), False when it exited.
+    :type entered: bool
+
+    :param value: The value that crossed, an intensity or a [P, A, D] list.
+    :type value: float or list[float]
+    """
+    __slots__ = ('subscription', 'entered', 'value')
+
+    def __init__(self, subscription: 'Subscription', entered: bool, value):
+        self.subscription = subscription
+        self.entered = entered
+        self.value = value
+
+    @property
+    def agentName(self) -> str:
+        return self.subscription.agentName
+
+    def __repr__(self):
+        return 'EmotionEvent(%r, %s, %r)' % (self.subscription, 'entered' if self.entered else 'exited', self.value)
+
+class Subscription:
+    """
+    The base class of subscriptions, which watch a value of one agent and fire when it enters or exits a range.
+
+    :param agentName: The name of the agent to watch.
+    :type agentName: str
+
+    :param callback: Called with the EmotionEvent of every crossing, None to queue the events for Gamygdala.pollEvents().
+    :type callback: Callable[[EmotionEvent], None] or None
+
+    :param hysteresis: How far the value has to be back out of the range before the subscription exits.
+    :type hysteresis: float
+
+    :param useGain: Whether the agent's emotions are gained with its gain (see Agent.getEmotionalState) before they are compared.
+    :type useGain: bool
+    """
+    def __init__(self, agentName: str, callback: Union[Callable[[EmotionEvent], None], None] = None, hysteresis: float = 0.05, useGain: bool = True):
+        assert hysteresis >= 0, 'Error: the hysteresis of a subscription cannot be negative'
+        self.agentName = agentName
+        self.callback = callback
+        self.hysteresis = hysteresis
+        self.useGain = useGain
+        #Whether the value is in the range, set when the subscription is added to an engine.
+        self.inside = False
+
+    def value(self, agent):
+        """
+        The watched value of the agent now.
+        """
+        raise NotImplementedError
+
+    def isInside(self, value, inside: bool) -> bool:
+        """
+        Whether the value is in the range, given whether it was before (which decides whether the hysteresis applies).
+        """
+        raise NotImplementedError
+
+    @property
+    def watchesDecay(self) -> bool:
+        """
+        Whether decay can make this subscription fire now, so it has to be checked after decay.
+        """
+        return True
+
+    def check(self, agent) -> Union[EmotionEvent, None]:
+        #Updates whether the value is in the range, returns the event if that changed.
+        value = self.value(agent)
+        inside = self.isInside(value, self.inside)
+        if inside == self.inside:
+            return None
+        self.inside = inside
+        return EmotionEvent(self, inside, value)
+
+    def _gained(self, agent, intensity: float) -> float:
+        if not self.useGain:
+            return intensity
+        gain = agent.gain
+        return gain * intensity / (gain * intensity + 1)
+
+class ThresholdSubscription(Subscription):
+    """
+    Fires when an emotion of an agent rises to a threshold (entered), and when it falls below the threshold minus the hysteresis again (exited).
+
+    :param agentName: The name of the agent to watch.
+    :type agentName: str
+
+    :param emotion: The emotion to watch, e.g. EmotionType.ANGER or 'anger'.
+    :type emotion: EmotionType or str
+
+    :param threshold: The intensity that enters the subscription, gained when useGain is set (so between 0 and 1).
+    :type threshold: float
+
+    :param targetName: Watch the emotion the agent feels for this agent (its relation to it) instead of its own emotional state. Relation emotions are not gained.
+    :type targetName: str or None
+
+    See Subscription for the other parameters.
+    """
+    def __init__(self, agentName: str, emotion: Union[EmotionType, str], threshold: float, callback: Union[Callable[[EmotionEvent], None], None] = None, hysteresis: float = 0.05, useGain: bool = True, targetName: Union[str, None] = None):
+        super().__init__(agentName, callback, hysteresis, useGain)
+        self.emotion = emotion
+        self.emotionIndex = EMOTION_INDEX[emotion]
+        self.threshold = threshold
+        self.targetName = targetName
+
+    def value(self, agent) -> float:
+        if self.targetName is None:
+            return self._gained(agent, float(agent.intensities[self.emotionIndex]))
+        relation = agent.getRelation(self.targetName)
+        return float(relation.intensities[self.emotionIndex]) if relation is not None else 0.0
+
+    def isInside(self, value: float, inside: bool) -> bool:
+        if inside:
+            return value >= self.threshold - self.hysteresis
+        return value >= self.threshold
+
+    @property
+    def watchesDecay(self) -> bool:
+        #Decay only lowers intensities, so it can only make an entered threshold exit.
+        return self.inside
+
+    def __repr__(self):
+        target = '' if self.targetName is None else ' for ' + self.targetName
+        return 'ThresholdSubscription(%s %s%s >= %s)' % (self.agentName, self.emotion, target, self.threshold)
+
+class PADSubscription(Subscription):
+    """
+    Fires when the PAD state of an agent enters a region (a box in Pleasure Arousal Dominance space), and when it leaves the region grown by the hysteresis again.
+
+    :param agentName: The name of the agent to watch.
+    :type agentName: str
+
+    :param low: The lowest Pleasure, Arousal and Dominance of the region.
+    :type low: list[float]
+
+    :param high: The highest Pleasure, Arousal and Dominance of the region.
+    :type high: list[float]
+
+    See Subscription for the other parameters.
+    """
+    def __init__(self, agentName: str, low: list[float], high: list[float], callback: Union[Callable[[EmotionEvent], None], None] = None, hysteresis: float = 0.05, useGain: bool = True):
+        super().__init__(agentName, callback, hysteresis, useGain)
+        assert len(low) == 3 and len(high) == 3, 'Error: a PAD region needs a low and high Pleasure, Arousal and Dominance'
+        self.low = tuple(low)
+        self.high = tuple(high)
+
+    def value(self, agent) -> list[float]:
+        return [float(v) for v in agent.getPADState(self.useGain)]
+
+    def isInside(self, value: list[float], inside: bool) -> bool:
+        margin = self.hysteresis if inside else 0.0
+        return all(low - margin <= v <= high + margin for v, low, high in zip(value, self.low, self.high))
+
+    def __repr__(self):
+        return 'PADSubscription(%s in %s..%s)' % (self.agentName, list(self.low), list(self.high))
@@ -0,0 +1,530 @@
+"""
+An optional NumPy backed engine that stores the emotional state of all agents as a struct of arrays.
+
+ArrayGamygdala keeps the intensities of the 16 OCC emotions of all its agents in one (n_agents, 16) array, and the emotions
+agents feel for others (their relations) in a sparse (n_agents, n_targets, 16) structure stored as coordinate rows.
+ArrayAgent and ArrayRelation are thin views on rows of these arrays, so the usual Agent and Relation API keeps working,
+while decayAll(), getEmotionalStates() and getPADStates() are single array operations over the whole population.
+
+This module requires NumPy (pip install pymygdala[numpy]).
+"""
+
+from typing import Union
+
+import numpy as np
+
+from pymygdala.agent import Agent
+from pymygdala.concepts import Emotion, Relation, EMOTION_NAMES, EMOTION_INDEX, EMOTION_TYPES, NUM_EMOTIONS, INTERNAL_EMOTIONS, SOCIAL_EMOTIONS, internalEmotionKey, socialEmotionKey, mapPAD
+from pymygdala.engines import Gamygdala
+
+#The shared 16x3 PAD matrix, the Pleasure, Arousal and Dominance of every emotion, one row per emotion in EMOTION_NAMES order.
+PAD_MATRIX = np.array([mapPAD[name] for name in EMOTION_NAMES])
+PAD_MATRIX.setflags(write=False)
+
+def applyGain(values: np.ndarray, gain) -> np.ndarray:
+    """
+    The gain limiter used by Agent.getEmotionalState and Agent.getPADState, applied element-wise.
+    g*x/(g*x+1) for positive values and -g*x/(g*x-1) for negative ones, which both equal g*x/(1+|g*x|).
+
+    :param values: The intensities or PAD values to be gained.
+    :type values: numpy.ndarray
+
+    :param gain: The gain, a scalar or an array that broadcasts against values.
+    :type gain: float or numpy.ndarray
+
+    :return: The gained values.
+    :rtype: numpy.ndarray
+    """
+    gained = gain * values
+    return gained / (1.0 + np.abs(gained))
+
+#The appraisal rule tables of concepts as arrays, (40, 2) and (4,), to classify whole arrays of appraisals with one lookup.
+INTERNAL_EMOTION_TABLE = np.array(INTERNAL_EMOTIONS, dtype=np.intp)
+INTERNAL_EMOTION_TABLE.setflags(write=False)
+SOCIAL_EMOTION_TABLE = np.array(SOCIAL_EMOTIONS, dtype=np.intp)
+SOCIAL_EMOTION_TABLE.setflags(write=False)
+
+def internalEmotions(utility, deltaLikelihood, likelihood) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Classifies appraisals of goals into internal emotions, element-wise, like Gamygdala._evaluateInternalEmotion does for one owner of one goal.
+    The arguments are arrays (or scalars) that broadcast against each other.
+
+    :param utility: The utility of each goal.
+    :type utility: float or numpy.ndarray
+
+    :param deltaLikelihood: The change in likelihood of each goal.
+    :type deltaLikelihood: float or numpy.ndarray
+
+    :param likelihood: The new likelihood of each goal.
+    :type likelihood: float or numpy.ndarray
+
+    :return: The emotion and the confirmation emotion (e.g. satisfaction) of each appraisal, as emotion indices, NO_EMOTION where none arises. Both get abs(utility * deltaLikelihood) added.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    emotions = INTERNAL_EMOTION_TABLE[internalEmotionKey(np.asarray(utility), np.asarray(deltaLikelihood), np.asarray(likelihood))]
+    return emotions[..., 0], emotions[..., 1]
+
+def socialEmotions(desirability, like) -> np.ndarray:
+    """
+    Classifies appraisals of others' goals into happy-for, resentment, pity or gloating, element-wise, like Gamygdala._evaluateSocialEmotion.
+
+    :param desirability: The desirability of each event for the goal owner.
+    :type desirability: float or numpy.ndarray
+
+    :param like: The like of each observer for the goal owner.
+    :type like: float or numpy.ndarray
+
+    :return: The emotion index of each appraisal, which gets abs(utility * deltaLikelihood * like) added.
+    :rtype: numpy.ndarray
+    """
+    return SOCIAL_EMOTION_TABLE[socialEmotionKey(np.asarray(desirability), np.asarray(like))]
+
+def _emotionList(intensities: np.ndarray) -> list[Emotion]:
+    #Converts a row of intensities to the list of Emotion objects used by the Agent and Relation API, leaving out absent (zero) emotions.
+    return [Emotion(EMOTION_TYPES[i], float(intensities[i])) for i in np.flatnonzero(intensities > 0)]
+
+def _grown(array: np.ndarray, capacity: int, fill: float = 0.0) -> np.ndarray:
+    grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+def _drainedRows(intensities: np.ndarray, sent: np.ndarray, rows: Union[np.ndarray, None], epsilon: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    #Array version of the change test of Gamygdala.drainChanges() for the given rows (all when None), returns the rows, emotion indices and intensities of the changes and records them as sent.
+    if rows is None:
+        rows = np.arange(len(intensities))
+    current = intensities[rows]
+    last = sent[rows]
+    changedRows, emotionIndices = np.nonzero((current != last) & ((np.abs(current - last) > epsilon) | (current == 0)))
+    values = current[changedRows, emotionIndices]
+    changedRows = rows[changedRows]
+    sent[changedRows, emotionIndices] = values
+    return changedRows, emotionIndices, values
+
+class ArrayRelation(Relation):
+    """
+    A Relation whose emotions are a row of the relation intensity array of an ArrayGamygdala.
+    Until the agent holding the relation is registered, the intensities are kept in a private buffer.
+
+    :param targetName: The agent who is the target of the relation.
+    :type targetName: str
+
+    :param like: The relation (between -1 and 1).
+    :type like: float
+    """
+    __slots__ = ('_engine', '_row', '_buffer', '_lastDecayBuffer')
+
+    def __init__(self, targetName: str, like: float = 1.0):
+        self.agentName = targetName
+        self.like = like
+        self._engine = None
+        self._row = -1
+        self._buffer = np.zeros(NUM_EMOTIONS)
+        self._lastDecayBuffer = 0.0
+
+    @property
+    def intensities(self) -> np.ndarray:
+        """
+        A writable view of the intensities of the emotions felt for the target, indexed like EMOTION_NAMES.
+        """
+        if self._engine is None:
+            return self._buffer
+        return self._engine._relationIntensity[self._row]
+
+    @property
+    def lastDecayTime(self) -> float:
+        if self._engine is None:
+            return self._lastDecayBuffer
+        return float(self._engine._relationLastDecay[self._row])
+
+    @lastDecayTime.setter
+    def lastDecayTime(self, decayTime: float):
+        if self._engine is None:
+            self._lastDecayBuffer = decayTime
+        else:
+            self._engine._relationLastDecay[self._row] = decayTime
+
+    @property
+    def emotionList(self) -> list[Emotion]:
+        return _emotionList(self.intensities)
+
+    def addIntensity(self, emotionIndex: int, intensity: float):
+        #Writes to the array element directly, without creating a view of the row.
+        if self._engine is None:
+            self._buffer[emotionIndex] += intensity
+        else:
+            self._engine._relationIntensity[self._row, emotionIndex] += intensity
+
+    def decay(self, decayFunction: callable, deltaTime=None):
+        intensities = self.intensities
+        intensities[:] = decayFunction(intensities, deltaTime)
+        #Emotions decayed below zero are removed, i.e. set to zero.
+        np.maximum(intensities, 0.0, out=intensities)
+
+class ArrayAgent(Agent):
+    """
+    An Agent whose emotional state and gain are rows of the arrays of an ArrayGamygdala.
+    Until the agent is registered, its state is kept in a private buffer.
+    Note that internalState returns a new list, changing it does not change the agent's state, use updateEmotionalState() or intensities instead.
+    getEmotionalState() and getPADState() are not cached like those of Agent, as array operations of the engine change the rows of all agents at once, use ArrayGamygdala.getEmotionalStates() and getPADStates() to query many agents.
+
+    :param name: The name of the agent to be created.
+    :type name: str
+    """
+    def __init__(self, name='agent'):
+        self._engine = None
+        self._row = -1
+        self._buffer = np.zeros(NUM_EMOTIONS)
+        self._gainBuffer = 1.0
+        self._lastDecayBuffer = 0.0
+        super().__init__(name)
+        #The state is kept in the buffer or the engine's arrays, not in the list of Agent.
+        self._intensities = None
+
+    @property
+    def intensities(self) -> np.ndarray:
+        """
+        A writable view of the intensities of this agent's emotions, indexed like EMOTION_NAMES.
+        """
+        if self._engine is None:
+            return self._buffer
+        return self._engine._intensity[self._row]
+
+    @property
+    def internalState(self) -> list[Emotion]:
+        return _emotionList(self.intensities)
+
+    @internalState.setter
+    def internalState(self, emotions: list[Emotion]):
+        intensities = self.intensities
+        intensities[:] = 0.0
+        for emotion in emotions:
+            intensities[EMOTION_INDEX[emotion.name]] += emotion.intensity
+
+    @property
+    def gain(self) -> float:
+        if self._engine is None:
+            return self._gainBuffer
+        return float(self._engine._gain[self._row])
+
+    @gain.setter
+    def gain(self, gain: float):
+        if self._engine is None:
+            self._gainBuffer = gain
+        else:
+            self._engine._gain[self._row] = gain
+
+    @property
+    def lastDecayTime(self) -> float:
+        if self._engine is None:
+            return self._lastDecayBuffer
+        return float(self._engine._lastDecay[self._row])
+
+    @lastDecayTime.setter
+    def lastDecayTime(self, decayTime: float):
+        if self._engine is None:
+            self._lastDecayBuffer = decayTime
+        else:
+            self._engine._lastDecay[self._row] = decayTime
+
+    def _newRelation(self, agentName: str, like: float) -> ArrayRelation:
+        relation = ArrayRelation(agentName, like)
+        if self._engine is not None:
+            self._engine._attachRelation(self, relation)
+        return relation
+
+    def addIntensity(self, emotionIndex: int, intensity: float):
+        #Appraisals simply add to the old value of the emotion, see Agent.updateEmotionalState.
+        self._settle()
+        if self._engine is None:
+            self._buffer[emotionIndex] += intensity
+        else:
+            self._engine._intensity[self._row, emotionIndex] += intensity
+            if self._watched:
+                self._engine._touched[self] = None
+
+    def getEmotionalState(self, useGain: bool) -> tuple[Emotion, ...]:
+        with self._engineLock():
+            self._settle()
+            intensities = self.intensities
+            if useGain:
+                intensities = applyGain(intensities, self.gain)
+            return tuple(_emotionList(intensities))
+
+    def getPADState(self, useGain: bool) -> tuple[float, float, float]:
+        with self._engineLock():
+            self._settle()
+            PAD = self.intensities @ PAD_MATRIX
+            if useGain:
+                PAD = applyGain(PAD, self.gain)
+            return tuple(PAD.tolist())
+
+    def _decayRates(self, policy) -> np.ndarray:
+        if self._engine is None:
+            return np.array(policy.rates(self.decayGroup))
+        return self._engine._groupDecayRates()[self._engine._decayGroup[self._row]]
+
+    def _decayInternalState(self, decayFunction: callable, deltaTime=None):
+        intensities = self.intensities
+        intensities[:] = decayFunction(intensities, deltaTime)
+        np.maximum(intensities, 0.0, out=intensities)
+
+class ArrayGamygdala(Gamygdala):
+    """
+    A Gamygdala engine that keeps the emotional state of all its agents in NumPy arrays.
+    Row i of every per agent array belongs to self.agents[i]. Only ArrayAgent instances can be registered, createAgent() creates those for you.
+    The decay function set with setDecay() is called with whole arrays, which linearDecay and exponentialDecay support, and so is the decay() of a decay policy (see setDecayPolicy), with the rates of each row.
+
+    :param capacity: The number of agents (and relations) to allocate room for up front, the arrays grow as needed.
+    :type capacity: int
+
+    :param clock: The clock decayAll() measures the time passed with, see Gamygdala.
+    :type clock: clock.WallClock or clock.ManualClock or None
+    """
+    agentClass = ArrayAgent
+
+    def __init__(self, capacity: int = 64, clock=None):
+        super().__init__(clock)
+        self._agentCount = 0
+        self._intensity = np.zeros((capacity, NUM_EMOTIONS))
+        self._gain = np.ones(capacity)
+        self._lastDecay = np.zeros(capacity)
+        self._relationCount = 0
+        self._relationIntensity = np.zeros((capacity, NUM_EMOTIONS))
+        self._relationLastDecay = np.zeros(capacity)
+        self._relationSource = np.zeros(capacity, dtype=np.intp)
+        self._relationTarget = np.zeros(capacity, dtype=np.intp)
+        #Relation targets do not need to be registered agents (e.g. a causal agent that is not an NPC), so they get their own index.
+        self.targetNames: list[str] = []
+        self._targetIndex: dict[str, int] = {}
+        #The decay group of every agent row, as an index into decayGroups (0 is no group), and the rates of all decay groups derived from the decay policy, see setDecayGroup().
+        self._decayGroup = np.zeros(capacity, dtype=np.intp)
+        self.decayGroups: list = [None]
+        self._decayGroupIndex: dict = {None: 0}
+        self._decayRates = None
+        self._decayRatesKey = None
+        #Copies of the intensity arrays as drainChanges() last reported them.
+        self._sentIntensity = None
+        self._sentRelationIntensity = None
+
+    @property
+    def intensities(self) -> np.ndarray:
+        """
+        A writable (n_agents, 16) view of the emotion intensities of all agents.
+        """
+        return self._intensity[:self._agentCount]
+
+    @property
+    def gains(self) -> np.ndarray:
+        """
+        A writable (n_agents,) view of the gain of all agents.
+        """
+        return self._gain[:self._agentCount]
+
+    @property
+    def relationIntensities(self) -> np.ndarray:
+        """
+        A writable (n_relations, 16) view of the emotion intensities of all relations, see getRelationStates().
+        """
+        return self._relationIntensity[:self._relationCount]
+
+    def registerAgent(self, agent: ArrayAgent):
+        assert isinstance(agent, ArrayAgent), 'Error: ArrayGamygdala can only register ArrayAgent instances'
+        assert agent._engine is None, 'Error: the agent is already registered to an ArrayGamygdala'
+        self._reserveAgents(self._agentCount + 1)
+        row = self._agentCount
+        self._intensity[row] = agent._buffer
+        self._gain[row] = agent._gainBuffer
+        self._lastDecay[row] = agent._lastDecayBuffer
+        self._decayGroup[row] = self._decayGroupId(agent.decayGroup)
+        agent._engine = self
+        agent._row = row
+        #The buffer is not used once the state is in the arrays.
+        agent._buffer = None
+        self._agentCount += 1
+        for relation in agent.currentRelations:
+            self._attachRelation(agent, relation)
+        super().registerAgent(agent)
+
+    def spawnAgents(self, archetype, count: int, names: Union[list[str], None] = None) -> list[ArrayAgent]:
+        """
+        Creates and registers many agents of an archetype at once, see Gamygdala.spawnAgents(). The per agent arrays are grown once, to hold all new agents.
+        """
+        with self.lock:
+            self._reserveAgents(self._agentCount + count)
+            return super().spawnAgents(archetype, count, names)
+
+    def _reserveAgents(self, agentCount: int):
+        #Grows the per agent arrays to hold agentCount agents, at least doubling them so registering agents one by one stays cheap.
+        if agentCount > len(self._intensity):
+            capacity = max(agentCount, 2 * len(self._intensity) + 1)
+            self._intensity = _grown(self._intensity, capacity)
+            self._gain = _grown(self._gain, capacity, 1.0)
+            self._lastDecay = _grown(self._lastDecay, capacity)
+            self._decayGroup = _grown(self._decayGroup, capacity)
+
+    def _reserveRelations(self, relationCount: int):
+        #Like _reserveAgents, for the relation arrays.
+        if relationCount > len(self._relationIntensity):
+            capacity = max(relationCount, 2 * len(self._relationIntensity) + 1)
+            self._relationIntensity = _grown(self._relationIntensity, capacity)
+            self._relationLastDecay = _grown(self._relationLastDecay, capacity)
+            self._relationSource = _grown(self._relationSource, capacity)
+            self._relationTarget = _grown(self._relationTarget, capacity)
+
+    def _decayAgents(self, deltaTime: float):
+        #Used by decayAll(), the decay function (or policy) is applied once to the intensity array of all agents and once to that of all relations.
+        self._decayRows(self.intensities, self._decayGroup[:self._agentCount], deltaTime)
+        self._decayRows(self.relationIntensities, self._decayGroup[self._relationSource[:self._relationCount]], deltaTime)
+
+    def _settleAgents(self):
+        #Lazy decay for the whole population at once, every row is decayed by the time it missed (which is zero for rows that are up to date).
+        if not self.lazyDecay:
+            return
+        lastDecay = self._lastDecay[:self._agentCount]
+        self._decayRows(self.intensities, self._decayGroup[:self._agentCount], (self.decayTime - lastDecay)[:, None] / 1000)
+        lastDecay[:] = self.decayTime
+        lastDecay = self._relationLastDecay[:self._relationCount]
+        self._decayRows(self.relationIntensities, self._decayGroup[self._relationSource[:self._relationCount]], (self.decayTime - lastDecay)[:, None] / 1000)
+        lastDecay[:] = self.decayTime
+
+    def _decayRows(self, intensities: np.ndarray, decayGroups: np.ndarray, deltaTime):
+        #Decays rows of intensities in place, with the decay function or with the rates of the decay group of each row in the decay policy.
+        policy = self.decayPolicy
+        if policy is None:
+            intensities[:] = self.decayFunction(intensities, deltaTime)
+        else:
+            intensities[:] = policy.decay(intensities, self._groupDecayRates()[decayGroups], deltaTime)
+        np.maximum(intensities, 0.0, out=intensities)
+
+    def setDecayGroup(self, agentName: str, group):
+        with self.lock:
+            super().setDecayGroup(agentName, group)
+            agent = self._agentsByName.get(agentName)
+            if agent is not None:
+                self._decayGroup[agent._row] = self._decayGroupId(group)
+
+    def _decayGroupId(self, group) -> int:
+        groupId = self._decayGroupIndex.get(group)
+        if groupId is None:
+            groupId = len(self.decayGroups)
+            self.decayGroups.append(group)
+            self._decayGroupIndex[group] = groupId
+        return groupId
+
+    def _groupDecayRates(self) -> np.ndarray:
+        #The (n_groups, 16) rates of the decay groups in the decay policy, derived again when the policy, its rates or the groups change.
+        policy = self.decayPolicy
+        key = (policy, policy.version, len(self.decayGroups))
+        if key != self._decayRatesKey:
+            self._decayRates = np.array([policy.rates(group) for group in self.decayGroups], dtype=np.float64)
+            self._decayRatesKey = key
+        return self._decayRates
+
+    def drainChanges(self, epsilon: float = 1e-3) -> tuple[list[tuple[int, int, float]], list[tuple[int, str, int, float]]]:
+        """
+        The emotions that changed since the previous call, see Gamygdala.drainChanges(). The agent id is the agent's row.
+        The rows of the changed agents (all rows when decay ran) are compared to copies of the intensity arrays as last reported, in one array operation.
+        """
+        with self.lock:
+            self._settleAgents()
+            if self._sent is None:
+                self._sent = {}
+                for agent in self.agents:
+                    agent._watched = True
+                self._sentIntensity = np.zeros_like(self._intensity)
+                self._sentRelationIntensity = np.zeros_like(self._relationIntensity)
+                agentRows = relationRows = None
+            elif self._decayedSinceDrain:
+                agentRows = relationRows = None
+            else:
+                self._changed.update(self._touched)
+                agentRows = np.sort(np.fromiter((agent._row for agent in self._changed), dtype=np.intp, count=len(self._changed)))
+                relationRows = np.fromiter((relation._row for agent in self._changed for relation in agent.currentRelations), dtype=np.intp)
+            if len(self._sentIntensity) < len(self._intensity):
+                self._sentIntensity = _grown(self._sentIntensity, len(self._intensity))
+            if len(self._sentRelationIntensity) < len(self._relationIntensity):
+                self._sentRelationIntensity = _grown(self._sentRelationIntensity, len(self._relationIntensity))
+            rows, emotionIndices, values = _drainedRows(self.intensities, self._sentIntensity, agentRows, epsilon)
+            emotionChanges = list(zip(rows.tolist(), emotionIndices.tolist(), values.tolist()))
+            rows, emotionIndices, values = _drainedRows(self.relationIntensities, self._sentRelationIntensity, relationRows, epsilon)
+            targetNames = self.targetNames
+            relationChanges = sorted(zip(self._relationSource[rows].tolist(), [targetNames[target] for target in self._relationTarget[rows].tolist()], emotionIndices.tolist(), values.tolist()))
+            self._changed.clear()
+            self._decayedSinceDrain = False
+            return emotionChanges, relationChanges
+
+    def _markDecayed(self):
+        self._lastDecay[:self._agentCount] = self.decayTime
+        self._relationLastDecay[:self._relationCount] = self.decayTime
+
+    def getEmotionalStates(self, useGain: bool = True) -> np.ndarray:
+        """
+        The emotional state of all agents, as is (useGain=False) or gained with each agent's gain (see Agent.getEmotionalState).
+
+        :param useGain: Whether to use the gain function or not.
+        :type useGain: bool
+
+        :return: An (n_agents, 16) array of intensities, columns ordered like EMOTION_NAMES.
+        :rtype: numpy.ndarray
+        """
+        with self.lock:
+            self._settleAgents()
+            if useGain:
+                return applyGain(self.intensities, self.gains[:, None])
+            return self.intensities.copy()
+
+    def getPADStates(self, agents: Union[list[ArrayAgent], None] = None, useGain: bool = True) -> np.ndarray:
+        """
+        The Pleasure Arousal Dominance mapping of the emotional state of many agents (see Agent.getPADState), computed as one matrix multiply of the intensity array by PAD_MATRIX.
+
+        :param agents: The agents to get the PAD state for, all registered agents (in registration order) when omitted.
+        :type agents: list[ArrayAgent] or None
+
+        :param useGain: Whether to apply each agent's gain limiter or not.
+        :type useGain: bool
+
+        :return: An (n, 3) array with Pleasure, Arousal and Dominance columns.
+        :rtype: numpy.ndarray
+        """
+        with self.lock:
+            self._settleAgents()
+            if agents is None:
+                intensities, gains = self.intensities, self.gains
+            else:
+                rows = np.fromiter((agent._row for agent in agents), dtype=np.intp, count=len(agents))
+                intensities, gains = self._intensity[rows], self._gain[rows]
+            PAD = intensities @ PAD_MATRIX
+            if useGain:
+                PAD = applyGain(PAD, gains[:, None])
+            return PAD
+
+    def getRelationStates(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The emotions all agents feel for others, as the coordinates of a sparse (n_agents, n_targets, 16) array.
+
+        :return: The agent row of each relation, its target index into targetNames and its (n_relations, 16) intensities.
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        count = self._relationCount
+        return self._relationSource[:count].copy(), self._relationTarget[:count].copy(), self.relationIntensities.copy()
+
+    def _targetId(self, targetName: str) -> int:
+        targetId = self._targetIndex.get(targetName)
+        if targetId is None:
+            targetId = len(self.targetNames)
+            self.targetNames.append(targetName)
+            self._targetIndex[targetName] = targetId
+        return targetId
+
+    def _attachRelation(self, agent: ArrayAgent, relation: ArrayRelation):
+        #Moves the relation's emotions into a new row of the relation arrays.
+        self._reserveRelations(self._relationCount + 1)
+        row = self._relationCount
+        self._relationIntensity[row] = relation._buffer
+        self._relationLastDecay[row] = relation._lastDecayBuffer
+        self._relationSource[row] = agent._row
+        self._relationTarget[row] = self._targetId(relation.agentName)
+        relation._engine = self
+        relation._row = row
+        relation._buffer = None
+        self._relationCount += 1